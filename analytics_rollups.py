@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Predpočítané rollupy (podmnožina data cube) nad analytics_ready a dotazovanie nad nimi.
+
+Základný cuboid sa počíta z detailu raz (group by všetkých dimenzií), ostatné
+rollupy sa z neho len zroľujú - všetky miery sú aditívne. Pri doplnení riadkov
+stačí pripočítať cuboid nových riadkov (a odpočítať cuboid zmenených / odstránených).
+Dotaz si vyberie najmenší rollup, ktorý obsahuje všetky dimenzie zoskupenia aj filtrov;
+detailnú tabuľku číta len pre dimenzie mimo cube (napr. Product, OrderStatus).
+
+Použitie:
+    python analytics_rollups.py --group-by Transaction_Year Category --filter PaymentMethod=PayPal
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+ROLLUPS_FILE = '/data/out/tables/analytics_rollups.csv'
+ANALYTICS_FILE = '/data/out/tables/analytics_ready.csv'
+
+# Dimenzie cube a ich typ v base cuboide (celé čísla / text)
+ROLLUP_DIMENSIONS = {
+    'Transaction_Year': 'int64',
+    'Transaction_Quarter': 'int64',
+    'Transaction_Month': 'int64',
+    'Category': 'object',
+    'PaymentMethod': 'object',
+    'Transaction_Value_Category': 'object',
+    'Had_Discount': 'int64',
+}
+
+# Miery: názov -> zdrojový stĺpec analytics_ready (None = počet záznamov)
+ROLLUP_MEASURES = {
+    'record_count': None,
+    'total_value': 'TotalValue',
+    'payment_amount': 'PaymentAmount',
+    'quality_issue_records': 'Had_Data_Quality_Issues',
+}
+
+_TIME = ['Transaction_Year', 'Transaction_Quarter', 'Transaction_Month']
+
+# Materializované rollupy: názov -> dimenzie zoskupenia. 'base' odpovie na každé zoskupenie
+# nad dimenziami cube, menšie rollupy pokrývajú bežné dotazy dashboardov.
+ROLLUPS = {
+    'base': list(ROLLUP_DIMENSIONS),
+    'month_category': _TIME + ['Category'],
+    'month_payment_method': _TIME + ['PaymentMethod'],
+    'month_value_discount': _TIME + ['Transaction_Value_Category', 'Had_Discount'],
+    'category_payment_value_discount': ['Category', 'PaymentMethod', 'Transaction_Value_Category',
+                                        'Had_Discount'],
+    'month': _TIME,
+    'total': [],
+}
+
+ROLLUP_COLUMNS = ['rollup'] + list(ROLLUP_DIMENSIONS) + list(ROLLUP_MEASURES)
+
+# Typy výstupnej tabuľky (dimenzie nullable - v rollupe bez danej dimenzie sú prázdne)
+ROLLUP_TABLE_TYPES = {
+    'rollup': 'string',
+    'Transaction_Year': 'Int16',
+    'Transaction_Quarter': 'Int8',
+    'Transaction_Month': 'Int8',
+    'Category': 'category',
+    'PaymentMethod': 'category',
+    'Transaction_Value_Category': 'category',
+    'Had_Discount': 'Int8',
+    'record_count': 'int64',
+    'total_value': 'float64',
+    'payment_amount': 'float64',
+    'quality_issue_records': 'int64',
+}
+
+def _base_frame(df):
+    """Dimenzie a miery detailu v jednotných typoch (rovnaké z CSV aj z typovaného frame-u)"""
+    data = {}
+    for dimension, dtype in ROLLUP_DIMENSIONS.items():
+        column = df[dimension]
+        if dtype == 'int64':
+            data[dimension] = pd.to_numeric(column, errors='coerce').astype('int64')
+        else:
+            data[dimension] = column.astype(object).where(column.notna(), None)
+    for measure, source in ROLLUP_MEASURES.items():
+        if source is None:
+            data[measure] = np.ones(len(df), dtype=np.int64)
+        else:
+            data[measure] = pd.to_numeric(df[source], errors='coerce').astype('float64').fillna(0)
+    return pd.DataFrame(data, index=df.index)
+
+def _empty_detail():
+    columns = list(ROLLUP_DIMENSIONS) + [source for source in ROLLUP_MEASURES.values() if source]
+    return pd.DataFrame({column: pd.Series(dtype=object) for column in columns})
+
+def _aggregate(frame, dimensions):
+    if not dimensions:
+        return frame[list(ROLLUP_MEASURES)].sum().to_frame().T
+    return (frame.groupby(dimensions, dropna=False, sort=True)[list(ROLLUP_MEASURES)]
+            .sum().reset_index())
+
+class RollupCube:
+    """
+    Base cuboid (súčty mier pre každú kombináciu dimenzií). Cuboidy chunkov alebo
+    doplnených riadkov sa sčítavajú (merge), zmenené a odstránené riadky sa odčítajú.
+    """
+
+    def __init__(self, base=None):
+        if base is None:
+            base = _aggregate(_base_frame(_empty_detail()), list(ROLLUP_DIMENSIONS))
+        self.base = base
+
+    @classmethod
+    def from_frame(cls, df):
+        """Cube z detailu analytics_ready (typovaného aj načítaného ako stringy)"""
+        return cls(_aggregate(_base_frame(df), list(ROLLUP_DIMENSIONS)))
+
+    def merge(self, other, sign=1):
+        """Pripočítanie (sign=1) alebo odčítanie (sign=-1) iného cube"""
+        other_base = other.base.copy()
+        other_base[list(ROLLUP_MEASURES)] *= sign
+        combined = _aggregate(pd.concat([self.base, other_base], ignore_index=True), list(ROLLUP_DIMENSIONS))
+        # Kombinácie, z ktorých sa odčítali všetky záznamy, zmiznú
+        self.base = combined[combined['record_count'] != 0].reset_index(drop=True)
+        return self
+
+    def table(self):
+        """Všetky rollupy v jednej tabuľke; dimenzie mimo rollupu sú prázdne"""
+        tables = []
+        for name, dimensions in ROLLUPS.items():
+            rollup = _aggregate(self.base, dimensions)
+            rollup.insert(0, 'rollup', name)
+            tables.append(rollup)
+        table = pd.concat(tables, ignore_index=True).reindex(columns=ROLLUP_COLUMNS)
+        return _typed_rollups(table)
+
+def _typed_rollups(table):
+    table = table.copy()
+    # Súčty peňazí na centy - sčítavanie / odčítavanie delt nenahromadí chybu float
+    table['total_value'] = pd.to_numeric(table['total_value']).round(2)
+    table['payment_amount'] = pd.to_numeric(table['payment_amount']).round(2)
+    for column, dtype in ROLLUP_TABLE_TYPES.items():
+        if dtype.lower().startswith(('int', 'float')):
+            table[column] = pd.to_numeric(table[column], errors='coerce').astype(dtype)
+        else:
+            table[column] = table[column].astype(dtype)
+    return table
+
+def read_rollups(path):
+    return _typed_rollups(pd.read_csv(path, dtype=str, keep_default_na=False, na_values=['']))
+
+class RollupQuery:
+    """
+    Dotazy nad rollupmi: vyberie sa najmenší rollup s dimenziami zoskupenia aj filtrov,
+    detail (analytics_ready) sa načíta len keď rollup nestačí - a len potrebné stĺpce.
+    """
+
+    def __init__(self, rollups, analytics_file=None):
+        self.rollups = rollups
+        self.analytics_file = analytics_file
+        self.rollup_sizes = rollups['rollup'].value_counts().to_dict()
+
+    @classmethod
+    def from_files(cls, rollups_file=ROLLUPS_FILE, analytics_file=ANALYTICS_FILE):
+        return cls(read_rollups(rollups_file), analytics_file)
+
+    def choose_rollup(self, group_by, filters=None):
+        """Názov najmenšieho rollupu, ktorý dotaz zodpovie, alebo None (treba detail)"""
+        needed = set(group_by) | set(filters or {})
+        candidates = [name for name, dimensions in ROLLUPS.items()
+                      if needed <= set(dimensions) and name in self.rollup_sizes]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda name: (self.rollup_sizes[name], len(ROLLUPS[name])))
+
+    def query(self, group_by, filters=None, measures=None):
+        """
+        Miery zoskupené podľa group_by. filters: stĺpec -> hodnota alebo zoznam hodnôt.
+        Vracia (výsledok, zdroj) - zdroj je názov rollupu alebo 'analytics_ready'.
+        """
+        group_by = list(group_by)
+        filters = filters or {}
+        measures = list(measures or ROLLUP_MEASURES)
+        rollup = self.choose_rollup(group_by, filters)
+        if rollup is not None:
+            frame = self.rollups[self.rollups['rollup'] == rollup]
+            source = rollup
+        else:
+            if self.analytics_file is None:
+                raise ValueError(f"Zoskupenie {group_by} nepokrýva žiadny rollup a detail nie je k dispozícii")
+            frame = self._read_detail(group_by, filters)
+            source = 'analytics_ready'
+
+        frame = frame[_filter_mask(frame, filters)]
+        if group_by:
+            result = frame.groupby(group_by, dropna=False, observed=True, sort=True)[measures].sum().reset_index()
+        else:
+            # Jeden riadok súčtov - Series zo sum() by počty pretypovala na float
+            result = pd.DataFrame({measure: [frame[measure].sum()] for measure in measures})
+        for measure in ('total_value', 'payment_amount'):
+            if measure in result:
+                result[measure] = result[measure].round(2)
+        for measure in ('record_count', 'quality_issue_records'):
+            if measure in result:
+                result[measure] = result[measure].astype(ROLLUP_TABLE_TYPES[measure])
+        return result, source
+
+    def _read_detail(self, group_by, filters):
+        sources = [source for source in ROLLUP_MEASURES.values() if source]
+        columns = list(dict.fromkeys(group_by + list(filters) + sources))
+        detail = pd.read_csv(self.analytics_file, dtype=str, usecols=columns)
+        frame = detail.drop(columns=sources)
+        for dimension, dtype in ROLLUP_DIMENSIONS.items():
+            if dimension in frame and dtype == 'int64':
+                frame[dimension] = pd.to_numeric(frame[dimension], errors='coerce').astype('Int64')
+        for measure, source in ROLLUP_MEASURES.items():
+            frame[measure] = (1 if source is None else
+                              pd.to_numeric(detail[source], errors='coerce').fillna(0))
+        frame['record_count'] = frame['record_count'].astype('int64')
+        frame['quality_issue_records'] = frame['quality_issue_records'].astype('int64')
+        return frame
+
+def _filter_mask(frame, filters):
+    mask = np.ones(len(frame), dtype=bool)
+    for column, values in filters.items():
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        if pd.api.types.is_integer_dtype(frame[column].dtype):
+            values = [int(value) for value in values]
+        else:
+            values = [str(value) for value in values]
+        mask &= frame[column].isin(values).to_numpy()
+    return mask
+
+def _parse_filters(items):
+    filters = {}
+    for item in items:
+        column, _, value = item.partition('=')
+        filters.setdefault(column, []).append(value)
+    return filters
+
+def main():
+    parser = argparse.ArgumentParser(description='Dotaz nad rollupmi analytics_ready')
+    parser.add_argument('--group-by', nargs='*', default=[], help='dimenzie zoskupenia')
+    parser.add_argument('--filter', nargs='*', default=[], metavar='STĹPEC=HODNOTA',
+                        help='filter (opakovaný stĺpec = ktorákoľvek z hodnôt)')
+    parser.add_argument('--rollups-file', default=ROLLUPS_FILE)
+    parser.add_argument('--analytics-file', default=ANALYTICS_FILE)
+    args = parser.parse_args()
+
+    query = RollupQuery.from_files(args.rollups_file, args.analytics_file)
+    result, source = query.query(args.group_by, _parse_filters(args.filter))
+    print(f"Zdroj: {source} ({len(result)} riadkov)")
+    print(result.to_string(index=False))
+
+if __name__ == '__main__':
+    main()
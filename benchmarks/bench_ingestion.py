@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark načítania vstupného CSV (read_input + apply_input_types).
+
+Vygeneruje syntetické transakcie a každý variant načítania spustí vo vlastnom
+procese - špička RSS tak patrí len jemu. Porovnáva pôvodné pd.read_csv(dtype=str),
+parser pandas a pyarrow (celý vstup, projekciu pre krok analytics a streamované chunky).
+
+Použitie: python benchmarks/bench_ingestion.py [počet_riadkov] [veľkosť_chunku]
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+VARIANTS = ['read_csv_str', 'pandas', 'pyarrow', 'pyarrow_analytics', 'pyarrow_chunks']
+
+def run_variant(variant, input_file, chunk_size):
+    """Jeden variant v aktuálnom procese - vracia (čas, riadky, MB v pandas)"""
+    import pandas as pd
+    import transform_script_keboola as transform
+
+    start = time.perf_counter()
+    if variant == 'read_csv_str':
+        frames = [pd.read_csv(input_file, dtype=str)]
+    elif variant == 'pandas':
+        frames = [transform.apply_input_types(transform.read_input(input_file, engine='pandas'))]
+    elif variant == 'pyarrow':
+        frames = [transform.apply_input_types(transform.read_input(input_file, engine='pyarrow'))]
+    elif variant == 'pyarrow_analytics':
+        usecols, email_flag = transform.input_projection(['analytics'])
+        frames = [transform.apply_input_types(
+            transform.read_input(input_file, usecols, email_flag=email_flag, engine='pyarrow'))]
+    else:
+        # Drží sa len posledný chunk - ako v streamovacom režime
+        rows = memory = 0
+        for chunk in transform.read_input(input_file, chunksize=chunk_size, engine='pyarrow'):
+            chunk = transform.apply_input_types(chunk)
+            rows += len(chunk)
+            memory = max(memory, chunk.memory_usage(deep=True).sum())
+        return time.perf_counter() - start, rows, memory / 1024 / 1024
+    seconds = time.perf_counter() - start
+    return seconds, len(frames[0]), frames[0].memory_usage(deep=True).sum() / 1024 / 1024
+
+def peak_rss_mb():
+    """Špička RSS procesu - VmHWM sa pri exec nuluje, ru_maxrss zdedí špičku rodiča (generátora)"""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def child(variant, input_file, chunk_size):
+    seconds, rows, frame_mb = run_variant(variant, input_file, chunk_size)
+    peak_mb = peak_rss_mb()
+    print(json.dumps({'seconds': seconds, 'rows': rows, 'frame_mb': frame_mb, 'peak_rss_mb': peak_mb}))
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    from generate_transactions import generate_transactions
+
+    with tempfile.TemporaryDirectory(prefix='bench_ingestion_') as work_dir:
+        input_file = os.path.join(work_dir, 'csv_input.csv')
+        generate_transactions(rows, input_file)
+        print(f"Vstup: {rows} riadkov, {os.path.getsize(input_file) / 1024 / 1024:.1f} MB, "
+              f"chunk {chunk_size}, CPU: {os.cpu_count()}")
+        print(f"{'variant':<20}{'čas s':>9}{'riadkov/s':>13}{'frame MB':>10}{'špička RSS MB':>15}")
+        for variant in VARIANTS:
+            completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', variant,
+                                        input_file, str(chunk_size)], capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"{variant:<20} chyba: {completed.stderr.strip().splitlines()[-1]}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            print(f"{variant:<20}{result['seconds']:>9.2f}{result['rows'] / result['seconds']:>13.0f}"
+                  f"{result['frame_mb']:>10.1f}{result['peak_rss_mb']:>15.1f}")
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark výstupných formátov: CSV vs. CSV.gz vs. Parquet vs. Arrow IPC.
+
+Porovnáva veľkosť súboru a čas zápisu / čítania pre cleaned_transactions
+a analytics_ready na zopakovanom input.csv.
+Použitie: python benchmarks/bench_output_formats.py [počet_opakovaní]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import transform_script_keboola as transform
+
+def load_scaled_input(repeat):
+    df = transform.read_input(os.path.join(REPO_DIR, 'input.csv'))
+    return transform.apply_input_types(pd.concat([df] * repeat, ignore_index=True))
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def bench_table(df, table_name, work_dir):
+    csv_path = os.path.join(work_dir, f'{table_name}.csv')
+    gz_path = os.path.join(work_dir, f'{table_name}.csv.gz')
+    formats = {
+        'csv': (lambda: df.to_csv(csv_path, index=False),
+                lambda: transform.read_output_table(csv_path),
+                csv_path),
+        'csv.gz': (lambda: df.to_csv(gz_path, index=False),
+                   lambda: transform.apply_table_schema(pd.read_csv(gz_path, dtype=str), table_name),
+                   gz_path),
+    }
+    for output_format, extension in transform.COLUMNAR_EXTENSIONS.items():
+        path = os.path.join(work_dir, table_name + extension)
+        formats[output_format] = (
+            lambda output_format=output_format: transform.write_columnar_table(df, work_dir, table_name,
+                                                                               output_format),
+            lambda path=path: transform.read_output_table(path),
+            path,
+        )
+
+    print(f"\n{table_name} ({len(df)} riadkov)")
+    print(f"{'formát':<10}{'veľkosť MB':>12}{'zápis s':>10}{'čítanie s':>11}")
+    for output_format, (write, read, path) in formats.items():
+        _, write_time = timed(write)
+        _, read_time = timed(read)
+        print(f"{output_format:<10}{os.path.getsize(path) / 1024 / 1024:>12.2f}{write_time:>10.2f}{read_time:>11.2f}")
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    df = load_scaled_input(repeat)
+    df_cleaned = transform.clean_data(df)
+    df_analytics = transform.create_analytics_table(df_cleaned)
+
+    with tempfile.TemporaryDirectory(prefix='bench_formats_') as work_dir:
+        bench_table(df_cleaned, 'cleaned_transactions', work_dir)
+        bench_table(df_analytics, 'analytics_ready', work_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark škálovania paralelného režimu transformácie (1/2/4/8 workerov).
+
+Vstup sa vytvorí zopakovaním input.csv, aby bolo čo paralelizovať.
+Použitie: python benchmarks/bench_parallel.py [počet_opakovaní] [veľkosť_chunku]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import contextlib
+import io
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import transform_script_keboola as transform
+
+WORKER_COUNTS = [1, 2, 4, 8]
+
+def build_scaled_input(target_file, repeat):
+    """Zopakovanie riadkov input.csv (bez hlavičky) repeat-krát"""
+    with open(os.path.join(REPO_DIR, 'input.csv'), encoding='utf-8') as f:
+        header = f.readline()
+        body = f.read()
+    if not body.endswith('\n'):
+        body += '\n'
+    with open(target_file, 'w', encoding='utf-8') as out:
+        out.write(header)
+        for _ in range(repeat):
+            out.write(body)
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+
+    with tempfile.TemporaryDirectory(prefix='bench_parallel_') as work_dir:
+        input_file = os.path.join(work_dir, 'csv_input.csv')
+        build_scaled_input(input_file, repeat)
+        print(f"Vstup: {os.path.getsize(input_file) / 1024 / 1024:.1f} MB, chunk {chunk_size} riadkov, "
+              f"CPU: {os.cpu_count()}")
+
+        baseline = None
+        for workers in WORKER_COUNTS:
+            output_dir = os.path.join(work_dir, f'out_{workers}')
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                transform.run_streaming(input_file, output_dir, chunk_size, workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"workers={workers}: {elapsed:.2f} s (zrýchlenie {baseline / elapsed:.2f}x)")
+
+if __name__ == '__main__':
+    main()
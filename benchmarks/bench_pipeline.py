@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark jednotlivých krokov transformácie na syntetických dátach.
+
+Pre každú veľkosť vygeneruje vstup (generate_transactions.py), zmeria čas
+a špičku alokovanej pamäte (tracemalloc) pre load, find_duplicates,
+analyze_data_quality, normalize_dates, clean_data, create_analytics_table a zápis CSV a výsledky
+uloží ako JSON s hashom commitu, aby sa dali porovnávať medzi commitmi
+(benchmarks/results/ je v .gitignore - výsledky sú lokálne, nie súčasť repozitára).
+
+Použitie:
+    python benchmarks/bench_pipeline.py --rows 10000 100000 1000000
+    python benchmarks/bench_pipeline.py --rows 100000 --baseline benchmarks/results/<iný commit>.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import transform_script_keboola as transform
+from generate_transactions import generate_transactions
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def measure(func, track_memory=True):
+    """Čas behu a špička alokovanej pamäte (druhý beh pod tracemalloc, aby neskresľoval čas)"""
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+
+    peak_bytes = None
+    if track_memory:
+        gc.collect()
+        tracemalloc.start()
+        func()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak_bytes
+
+def bench_size(rows, work_dir, track_memory):
+    input_file = os.path.join(work_dir, f'transactions_{rows}.csv')
+    generate_transactions(rows, input_file)
+
+    stages = []
+    def record(name, func):
+        transform._DATE_CACHE.clear()
+        result, seconds, peak_bytes = measure(func, track_memory)
+        stages.append({
+            'stage': name,
+            'seconds': round(seconds, 4),
+            'rows_per_second': round(rows / seconds) if seconds else None,
+            'peak_bytes': peak_bytes,
+        })
+        print(f"  {name:<24}{seconds:>9.3f} s" +
+              (f"{peak_bytes / 1024 / 1024:>10.1f} MB" if peak_bytes is not None else ''))
+        return result
+
+    print(f"\n{rows} riadkov ({os.path.getsize(input_file) / 1024 / 1024:.1f} MB)")
+    df = record('load', lambda: transform.apply_input_types(transform.read_input(input_file)))
+    duplicates = record('find_duplicates', lambda: transform.find_duplicates(transform.duplicate_keys(df)))
+    record('analyze_data_quality', lambda: transform.analyze_data_quality(df, duplicates))
+    record('normalize_dates', lambda: transform.normalize_dates(df['TransactionDate']))
+    df_cleaned = record('clean_data', lambda: transform.clean_data(df))
+    df_analytics = record('create_analytics_table', lambda: transform.create_analytics_table(df_cleaned))
+
+    def write_outputs():
+        df_cleaned.to_csv(os.path.join(work_dir, 'cleaned_transactions.csv'), index=False)
+        df_analytics.to_csv(os.path.join(work_dir, 'analytics_ready.csv'), index=False)
+    record('write_csv', write_outputs)
+
+    os.remove(input_file)
+    return {'rows': rows, 'stages': stages}
+
+def compare_with_baseline(results, baseline_file):
+    """Pomer časov voči inému behu (napr. z predchádzajúceho commitu)"""
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = json.load(f)
+    baseline_seconds = {
+        (size['rows'], stage['stage']): stage['seconds']
+        for size in baseline['sizes'] for stage in size['stages']
+    }
+    print(f"\nPorovnanie s {baseline['commit']} (>1 = pomalšie):")
+    for size in results['sizes']:
+        for stage in size['stages']:
+            previous = baseline_seconds.get((size['rows'], stage['stage']))
+            if previous:
+                print(f"  {size['rows']:>10} {stage['stage']:<24}{stage['seconds'] / previous:>7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark krokov transformácie')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--output', help='cieľový JSON (predvolene benchmarks/results/pipeline_<commit>.json)')
+    parser.add_argument('--baseline', help='JSON z iného behu na porovnanie')
+    parser.add_argument('--no-memory', action='store_true', help='nemerať pamäť (rýchlejšie)')
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+        'sizes': [],
+    }
+    with tempfile.TemporaryDirectory(prefix='bench_pipeline_') as work_dir:
+        for rows in args.rows:
+            results['sizes'].append(bench_size(rows, work_dir, not args.no_memory))
+
+    output_file = args.output or os.path.join(RESULTS_DIR, f'pipeline_{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nVýsledky uložené do {output_file}")
+
+    if args.baseline:
+        compare_with_baseline(results, args.baseline)
+
+if __name__ == '__main__':
+    main()
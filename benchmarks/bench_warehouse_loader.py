@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark načítania analytics_ready do star schémy (warehouse_loader.py).
+
+Vygeneruje syntetické transakcie, pretransformuje ich na analytics_ready a zmeria
+plné načítanie do prázdnej SQLite databázy, inkrementálne doplnenie ďalších
+riadkov a opakované načítanie bez zmien (len preskočenie faktov). Atribúty
+zákazníkov pre SCD2 CustomerDim sa berú z príslušného cleaned_transactions.
+
+Použitie: python benchmarks/bench_warehouse_loader.py [počet_riadkov] [riadkov_na_doplnenie]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd
+
+import transform_script_keboola as transform
+import warehouse_loader
+from generate_transactions import generate_transactions
+
+def build_tables(rows, work_dir, seed):
+    input_file = os.path.join(work_dir, f'input_{seed}.csv')
+    generate_transactions(rows, input_file, seed=seed)
+    df = transform.apply_input_types(transform.read_input(input_file))
+    df_cleaned = transform.clean_data(df)
+    df_analytics = transform.create_analytics_table(df_cleaned)
+    os.remove(input_file)
+    return df_cleaned[warehouse_loader.CUSTOMER_SOURCE_COLUMNS], df_analytics
+
+def timed_load(analytics_file, cleaned_file, warehouse_file):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return warehouse_loader.load_warehouse(analytics_file, warehouse_file, cleaned_file=cleaned_file)
+
+def report(label, stats):
+    print(f"{label:<22}{stats['read_records']:>11}{stats['loaded_records']:>11}"
+          f"{stats['seconds']:>9.2f}{stats['rows_per_second']:>13.0f}")
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    append_rows = int(sys.argv[2]) if len(sys.argv) > 2 else rows // 10
+
+    with tempfile.TemporaryDirectory(prefix='bench_warehouse_') as work_dir:
+        base_cleaned, base = build_tables(rows, work_dir, seed=1)
+        extra_cleaned, extra = build_tables(append_rows, work_dir, seed=2)
+        base_file = os.path.join(work_dir, 'analytics_ready.csv')
+        base_cleaned_file = os.path.join(work_dir, 'cleaned_transactions.csv')
+        extended_file = os.path.join(work_dir, 'analytics_ready_extended.csv')
+        extended_cleaned_file = os.path.join(work_dir, 'cleaned_transactions_extended.csv')
+        base.to_csv(base_file, index=False)
+        base_cleaned.to_csv(base_cleaned_file, index=False)
+        # Nové riadky na konci - kľúč faktu (TransactionID + hash obsahu) od poradia nezávisí
+        pd.concat([base, extra]).to_csv(extended_file, index=False)
+        pd.concat([base_cleaned, extra_cleaned]).to_csv(extended_cleaned_file, index=False)
+        warehouse_file = os.path.join(work_dir, 'warehouse.sqlite')
+
+        print(f"{'beh':<22}{'riadky':>11}{'nové fakty':>11}{'čas s':>9}{'riadkov/s':>13}")
+        report('plné načítanie', timed_load(base_file, base_cleaned_file, warehouse_file))
+        report('inkrementálne', timed_load(extended_file, extended_cleaned_file, warehouse_file))
+        report('bez zmien', timed_load(extended_file, extended_cleaned_file, warehouse_file))
+        print(f"Veľkosť databázy: {os.path.getsize(warehouse_file) / 1024 / 1024:.1f} MB")
+
+if __name__ == '__main__':
+    main()
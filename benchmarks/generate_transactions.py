@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Generátor syntetických transakcií so schémou a chybami ako v input.csv.
+
+Podiely chýb (DEFECT_RATES) sú namerané na input.csv: chýbajúce kategórie,
+InvalidProd2, invalid_email / not_an_email, UnknownStatus, UNKNOWN ADDRESS,
+zmiešané formáty dátumov, nesedia PaymentAmount a pod. Súbor sa zapisuje
+po blokoch, takže sa dá vygenerovať aj 50M riadkov pri konštantnej pamäti.
+
+Použitie: python benchmarks/generate_transactions.py ROWS OUTPUT.csv [--seed 42]
+"""
+
+import argparse
+import binascii
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    'TransactionID', 'Category', 'Product', 'TransactionDate', 'Quantity', 'Price', 'TotalValue',
+    'CustomerID', 'PaymentMethod', 'ShippingAddress', 'Email', 'OrderStatus', 'DiscountCode',
+    'PaymentAmount'
+]
+
+# Produkty a ich kategórie z input.csv
+PRODUCT_CATEGORIES = {
+    'Laptop': 'Electronics', 'Smartphone': 'Electronics', 'Headphones': 'Electronics',
+    'Smartwatch': 'Electronics',
+    'Dumbbells': 'Sports', 'Yoga Mat': 'Sports', 'Running Shoes': 'Sports', 'Tennis Racket': 'Sports',
+    'Sofa': 'Home & Garden', 'Blender': 'Home & Garden', 'Lawn Mower': 'Home & Garden',
+    'Vacuum Cleaner': 'Home & Garden',
+    'Board Game': 'Toys', 'Action Figure': 'Toys', 'Puzzle': 'Toys', 'Lego Set': 'Toys',
+    'Perfume': 'Beauty', 'Shampoo': 'Beauty', 'Face Cream': 'Beauty', 'Lipstick': 'Beauty',
+    'Cookbook': 'Books', 'Biography': 'Books', "Children's Book": 'Books', 'Fiction Novel': 'Books',
+    'Thermometer': 'Health', 'Vitamins': 'Health', 'Bandages': 'Health', 'Protein Powder': 'Health',
+    'Jacket': 'Fashion', 'T-shirt': 'Fashion', 'Sneakers': 'Fashion', 'Jeans': 'Fashion',
+}
+
+PAYMENT_METHODS = ['Credit Card', 'PayPal', 'Bank Transfer']
+PAYMENT_METHOD_WEIGHTS = [0.45, 0.33, 0.22]
+ORDER_STATUSES = ['Completed', 'Pending', 'Cancelled', 'Refunded']
+ORDER_STATUS_WEIGHTS = [0.54, 0.31, 0.11, 0.04]
+
+# Podiely chýb namerané na input.csv (1020 riadkov)
+DEFECT_RATES = {
+    'missing_category': 0.057,
+    'invalid_product': 0.021,       # InvalidProd1 / InvalidProd2 s InvalidCat1 / InvalidCat2
+    'missing_product': 0.060,
+    'missing_date': 0.046,
+    'dmy_date': 0.029,              # DD-MM-YYYY HH:MM:SS namiesto YYYY-MM-DD
+    'missing_price': 0.049,
+    'negative_quantity': 0.004,
+    'total_value_outlier': 0.046,   # TotalValue != Quantity × Price
+    'missing_payment_amount': 0.049,
+    'payment_amount_mismatch': 0.050,
+    'missing_payment_method': 0.090,
+    'unsupported_method': 0.049,
+    'missing_status': 0.050,
+    'unknown_status': 0.049,
+    'invalid_email': 0.196,
+    'not_an_email': 0.049,
+    'missing_address': 0.087,
+    'unknown_address': 0.049,
+    'discount': 0.218,
+    'duplicate_id': 0.020,
+}
+
+STREETS = ['Ellison Pass', 'Malone Mills', 'Miller Keys', 'Diana Knoll', 'Carolyn Ferry', 'Davis Canyon']
+CITIES = ['Ericview, OR', 'East Brian, KY', 'South Randyton, NH', 'Stephenberg, WY', 'Tammystad, TN']
+NAMES = ['elizabethjones', 'taylordorothy', 'sandovalnicholas', 'jeffrey82', 'galvarez', 'tmorrow']
+DOMAINS = ['gmail.com', 'hotmail.com', 'yahoo.com', 'example.org']
+
+DATE_START = np.datetime64('2023-01-01')
+DATE_DAYS = 731
+
+def _uuids(rng, n):
+    """Náhodné UUID-tvaré reťazce (vektorovo, bez volania uuid4 na riadok)"""
+    hex_ids = pd.Series(np.frombuffer(binascii.hexlify(rng.bytes(16 * n)), dtype='S32').astype('U32'))
+    return (hex_ids.str[0:8] + '-' + hex_ids.str[8:12] + '-4' + hex_ids.str[13:16] + '-'
+            + hex_ids.str[16:20] + '-' + hex_ids.str[20:32]).to_numpy(dtype=object)
+
+def _mask(rng, n, defect):
+    return rng.random(n) < DEFECT_RATES[defect]
+
+def _concat(*parts):
+    """Spojenie stĺpcov / konštánt po riadkoch do stringov"""
+    result = None
+    for part in parts:
+        part = part if isinstance(part, str) else pd.Series(part).astype(str)
+        result = part if result is None else result + part
+    return result.to_numpy(dtype=object)
+
+def _pick(rng, values, n):
+    return np.array(values, dtype=object)[rng.integers(0, len(values), n)]
+
+def generate_block(rng, n, customer_ids):
+    """Jeden blok n syntetických transakcií ako DataFrame so stringovými stĺpcami"""
+    products = np.array(list(PRODUCT_CATEGORIES), dtype=object)
+    product = products[rng.integers(0, len(products), n)]
+    category = pd.Series(product).map(PRODUCT_CATEGORIES).to_numpy(dtype=object)
+
+    invalid = _mask(rng, n, 'invalid_product')
+    product[invalid] = np.where(rng.random(invalid.sum()) < 0.5, 'InvalidProd1', 'InvalidProd2')
+    category[invalid] = np.where(rng.random(invalid.sum()) < 0.5, 'InvalidCat1', 'InvalidCat2')
+    category[_mask(rng, n, 'missing_category')] = None
+    product[_mask(rng, n, 'missing_product')] = None
+
+    # Dátumy - väčšinou ISO, časť DD-MM-YYYY s časom, časť chýba
+    days = DATE_START + rng.integers(0, DATE_DAYS, n).astype('timedelta64[D]')
+    dates = pd.Series(days)
+    transaction_date = dates.dt.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    dmy = _mask(rng, n, 'dmy_date')
+    seconds = pd.to_timedelta(rng.integers(0, 86400, dmy.sum()), unit='s')
+    transaction_date[dmy] = (dates[dmy] + seconds).dt.strftime('%d-%m-%Y %H:%M:%S').to_numpy(dtype=object)
+    transaction_date[_mask(rng, n, 'missing_date')] = None
+
+    # Množstvá a ceny
+    quantity = rng.integers(1, 6, n)
+    negative = _mask(rng, n, 'negative_quantity')
+    quantity[negative] = -rng.integers(1, 11, negative.sum())
+    price = np.round(rng.uniform(10, 500, n), 2)
+    total_value = np.round(quantity * price, 2)
+    outlier = _mask(rng, n, 'total_value_outlier')
+    total_value[outlier] = np.round(rng.uniform(100, 20000, outlier.sum()), 2)
+    payment_amount = total_value.copy()
+    mismatch = _mask(rng, n, 'payment_amount_mismatch')
+    payment_amount[mismatch] = np.round(payment_amount[mismatch] * rng.uniform(0.3, 0.8, mismatch.sum()), 2)
+
+    price = price.astype(object)
+    price[_mask(rng, n, 'missing_price')] = None
+    payment_amount = payment_amount.astype(object)
+    payment_amount[_mask(rng, n, 'missing_payment_amount')] = None
+
+    payment_method = rng.choice(np.array(PAYMENT_METHODS, dtype=object), n, p=PAYMENT_METHOD_WEIGHTS)
+    payment_method[_mask(rng, n, 'unsupported_method')] = 'UnsupportedMethod'
+    payment_method[_mask(rng, n, 'missing_payment_method')] = None
+
+    order_status = rng.choice(np.array(ORDER_STATUSES, dtype=object), n, p=ORDER_STATUS_WEIGHTS)
+    order_status[_mask(rng, n, 'unknown_status')] = 'UnknownStatus'
+    order_status[_mask(rng, n, 'missing_status')] = None
+
+    # Viacriadkové adresy ako v input.csv
+    address = _concat(rng.integers(100, 99999, n), ' ', _pick(rng, STREETS, n), '\n',
+                      _pick(rng, CITIES, n), ' ', rng.integers(10000, 99999, n))
+    address[_mask(rng, n, 'unknown_address')] = 'UNKNOWN ADDRESS'
+    address[_mask(rng, n, 'missing_address')] = None
+
+    email = _concat(_pick(rng, NAMES, n), rng.integers(1, 999, n), '@', _pick(rng, DOMAINS, n))
+    invalid_email = _mask(rng, n, 'invalid_email')
+    email[invalid_email] = 'invalid_email'
+    email[_mask(rng, n, 'not_an_email') & ~invalid_email] = 'not_an_email'
+
+    discount = np.full(n, None, dtype=object)
+    has_discount = _mask(rng, n, 'discount')
+    letters = list('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+    discount_count = has_discount.sum()
+    discount[has_discount] = _concat('DISCOUNT', rng.integers(10, 99, discount_count),
+                                     _pick(rng, letters, discount_count), _pick(rng, letters, discount_count))
+
+    transaction_id = _uuids(rng, n)
+    # Opakované TransactionID (replay exportu) s čiastočne iným obsahom
+    duplicate = np.flatnonzero(_mask(rng, n, 'duplicate_id'))
+    transaction_id[duplicate] = transaction_id[rng.integers(0, n, len(duplicate))]
+
+    return pd.DataFrame({
+        'TransactionID': transaction_id,
+        'Category': category,
+        'Product': product,
+        'TransactionDate': transaction_date,
+        'Quantity': quantity,
+        'Price': price,
+        'TotalValue': total_value,
+        'CustomerID': customer_ids[rng.integers(0, len(customer_ids), n)],
+        'PaymentMethod': payment_method,
+        'ShippingAddress': address,
+        'Email': email,
+        'OrderStatus': order_status,
+        'DiscountCode': discount,
+        'PaymentAmount': payment_amount,
+    }, columns=COLUMNS)
+
+def generate_transactions(rows, output_file, seed=42, block_size=500_000):
+    """Zápis rows syntetických transakcií do CSV po blokoch"""
+    rng = np.random.default_rng(seed)
+    # Zákazníci sa opakujú - zhruba tretina unikátnych ako v reálnych dátach
+    customer_ids = _uuids(rng, max(1, min(rows // 3, 1_000_000)))
+    written = 0
+    with open(output_file, 'w', newline='', encoding='utf-8') as out:
+        while written < rows:
+            n = min(block_size, rows - written)
+            generate_block(rng, n, customer_ids).to_csv(out, index=False, header=written == 0,
+                                                        lineterminator='\n')
+            written += n
+    return output_file
+
+def main():
+    parser = argparse.ArgumentParser(description='Generátor syntetických transakcií')
+    parser.add_argument('rows', type=int, help='počet riadkov (napr. 10000 až 50000000)')
+    parser.add_argument('output', help='cieľový CSV súbor')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--block-size', type=int, default=500_000)
+    args = parser.parse_args()
+
+    generate_transactions(args.rows, args.output, args.seed, args.block_size)
+    print(f"Vygenerovaných {args.rows} riadkov do {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,65 @@
 import os
+import io
 import json
+import hashlib
+import tempfile
 import requests
 import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
 import pytz
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt, wait_exponential
+from geojson_flattener import LIBRARY_COLUMNS, GeoJSONTableWriter, JSONError
+
+OUTPUT_FILE = 'libraries.csv'
+TMP_OUTPUT_FILE = OUTPUT_FILE + '.tmp'
+COLUMNS = [name for name, _, _, _ in LIBRARY_COLUMNS]
+
+# Paginated extraction (limit/offset) for larger Golemio datasets; 0 = single request
+PAGE_SIZE = int(os.getenv('GOLEMIO_PAGE_SIZE') or 0)
+# Maximum number of pages requested at the same time
+CONCURRENCY = int(os.getenv('GOLEMIO_CONCURRENCY') or 4)
+# Upper bound on pages of one extraction - reaching it means the API does not page as expected
+MAX_PAGES = int(os.getenv('GOLEMIO_MAX_PAGES') or 10_000)
+
+url = os.getenv('GOLEMIO_API_URL', "https://api.golemio.cz/v2/municipallibraries")  # Update to correct endpoint
+
+# Local response cache: ETag / Last-Modified validators and a hash of the last payload,
+# so unchanged data is neither parsed nor rewritten to libraries.csv
+CACHE_DIR = os.getenv('GOLEMIO_CACHE_DIR', '.golemio_cache')
+CACHE_FILE = os.path.join(CACHE_DIR, hashlib.sha256(url.encode('utf-8')).hexdigest()[:16] + '.json')
+
+def file_sha256(path):
+    content_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+def drop_cache():
+    if os.path.exists(CACHE_FILE):
+        os.remove(CACHE_FILE)
+
+def keep_or_create_output(reason):
+    """
+    On errors the last good libraries.csv is kept. Only without one an empty CSV with headers
+    is created - and the cached validators are dropped, so the next run fetches the full data.
+    """
+    if os.path.exists(OUTPUT_FILE):
+        print(f"Keeping the last {OUTPUT_FILE} due to {reason}")
+        return
+    df = pd.DataFrame(columns=COLUMNS)
+    df.to_csv(OUTPUT_FILE, index=False, encoding='utf-8')
+    drop_cache()
+    print(f"Created empty libraries.csv with headers due to {reason}")
 
 API_KEY = os.getenv('GOLEMIO_API_KEY')
 if not API_KEY:
     print("Error: API key not set")
-    df = pd.DataFrame(columns=['ID knižnice', 'Názov knižnice', 'Ulica', 'PSČ', 'Mesto', 'Kraj', 'Krajina', 'Zemepisná šírka', 'Zemepisná dĺžka', 'Čas otvorenia'])
-    df.to_csv('libraries.csv', index=False, encoding='utf-8')
-    print("Created empty libraries.csv with headers due to missing API key")
+    keep_or_create_output("missing API key")
     exit(0)
 
 API_KEY = str(API_KEY).strip()
@@ -27,81 +75,188 @@ praha_tz = pytz.timezone('Europe/Prague')
 now = datetime.now(praha_tz)
 print(f"Aktuálny čas v Prahe: {now}")
 
-url = "https://api.golemio.cz/v2/municipallibraries"  # Update to correct endpoint
 headers = {
     "X-Access-Token": API_KEY,
     "Content-Type": "application/json",
     "User-Agent": "GitHub-Actions-Bot/1.0"
 }
 
+# One pooled session for all requests - connections are reused across pages
+session = requests.Session()
+session.headers.update(headers)
+adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(CONCURRENCY, 1))
+session.mount('https://', adapter)
+session.mount('http://', adapter)
+
+def load_cache():
+    """
+    Cached validators for url. Ignored unless libraries.csv is exactly the file written from
+    the cached payload (missing, placeholder or older checkout) - then it always gets rebuilt.
+    """
+    if not os.path.exists(OUTPUT_FILE) or not os.path.exists(CACHE_FILE):
+        return {}
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('url') != url or cache.get('output_sha256') != file_sha256(OUTPUT_FILE):
+        return {}
+    return cache
+
+def save_cache(response, content_hash):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache = {
+        'url': url,
+        'etag': response.headers.get('ETag') if response is not None else None,
+        'last_modified': response.headers.get('Last-Modified') if response is not None else None,
+        'content_sha256': content_hash,
+        'output_sha256': file_sha256(OUTPUT_FILE),
+        'fetched_at': now.isoformat(),
+    }
+    tmp_file = CACHE_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_file, CACHE_FILE)
+
+def conditional_headers(cache):
+    extra_headers = {}
+    if cache.get('etag'):
+        extra_headers['If-None-Match'] = cache['etag']
+    if cache.get('last_modified'):
+        extra_headers['If-Modified-Since'] = cache['last_modified']
+    return extra_headers
+
 print(f"Making request to: {url}")
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def make_api_request():
-    return requests.get(url, headers=headers, timeout=30)
+def make_api_request(extra_headers=None):
+    # Streamed - the body is spooled to disk while hashing, never held in memory
+    return session.get(url, headers=extra_headers, timeout=30, stream=True)
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+def fetch_page(offset):
+    """Raw body of one page; HTTP errors are retried like connection errors"""
+    response = session.get(url, params={'limit': PAGE_SIZE, 'offset': offset}, timeout=30)
+    response.raise_for_status()
+    return response.content
+
+def fetch_pages():
+    """
+    Page bodies in offset order, fetched concurrently. At most CONCURRENCY pages are in flight,
+    so only those are held in memory; the consumer stops at the first short or repeated page.
+    """
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        pending = deque()
+        next_offset = 0
+        try:
+            while True:
+                while len(pending) < CONCURRENCY:
+                    pending.append(executor.submit(fetch_page, next_offset))
+                    next_offset += PAGE_SIZE
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+def replace_output(record_count, content_hash, response=None):
+    """Moves the freshly written CSV over libraries.csv and remembers the payload hash"""
+    if not record_count:
+        print("Warning: No libraries found in API response")
+    os.replace(TMP_OUTPUT_FILE, OUTPUT_FILE)
+    if record_count:
+        save_cache(response, content_hash)
+    else:
+        drop_cache()
+    print(f"Saved {record_count} records to {OUTPUT_FILE}")
+
+def extract_paginated():
+    """
+    Streams pages into libraries.csv as they arrive. The CSV is built in a temporary file
+    and replaces libraries.csv only when the combined payload hash differs from the cached one.
+    Conditional (ETag) requests are not used here - the validators differ per page.
+    """
+    cache = load_cache()
+    content_hash = hashlib.sha256()
+    page_hashes = set()
+    record_count = 0
+    with GeoJSONTableWriter(TMP_OUTPUT_FILE, LIBRARY_COLUMNS) as writer, closing(fetch_pages()) as pages:
+        for page_index, content in enumerate(pages):
+            # An endpoint ignoring limit/offset returns the same page again - it already held everything
+            page_hash = hashlib.sha256(content).digest()
+            if page_hash in page_hashes:
+                print(f"Page {page_index + 1} repeats an earlier page, the API ignores paging - stopping")
+                break
+            if page_index == MAX_PAGES:
+                raise RuntimeError(f"More than {MAX_PAGES} pages (GOLEMIO_MAX_PAGES), extraction aborted")
+            page_hashes.add(page_hash)
+            content_hash.update(content)
+            page_records = writer.write_features(io.BytesIO(content))
+            record_count += page_records
+            print(f"Page {page_index + 1}: {record_count} records")
+            if page_records < PAGE_SIZE:
+                break
+
+    content_hash = content_hash.hexdigest()
+    if record_count and content_hash == cache.get('content_sha256'):
+        os.remove(TMP_OUTPUT_FILE)
+        print(f"Response identical to the cached one, keeping {OUTPUT_FILE}")
+        return
+    replace_output(record_count, content_hash)
 
 try:
-    response = make_api_request()
+    if PAGE_SIZE > 0:
+        print(f"Paginated extraction: {PAGE_SIZE} records per page, {CONCURRENCY} concurrent requests")
+        extract_paginated()
+        exit(0)
+
+    cache = load_cache()
+    response = make_api_request(conditional_headers(cache))
     print(f"Response status code: {response.status_code}")
     
+    if response.status_code == 304:
+        print(f"Not modified since {cache.get('fetched_at')}, keeping {OUTPUT_FILE}")
+        exit(0)
+    
     if response.status_code == 200:
-        data = response.json()
-        print(f"Raw response: {json.dumps(data, indent=2)[:1000]}...")
-        libraries = data.get('features', [])
-        if not libraries:
-            print("Warning: No libraries found in API response")
-            df = pd.DataFrame(columns=['ID knižnice', 'Názov knižnice', 'Ulica', 'PSČ', 'Mesto', 'Kraj', 'Krajina', 'Zemepisná šírka', 'Zemepisná dĺžka', 'Čas otvorenia'])
-            df.to_csv('libraries.csv', index=False, encoding='utf-8')
-            print("Created empty libraries.csv with headers")
-            exit(0)
-        
-        extracted_data = []
-        for library in libraries:
-            props = library.get('properties', {})
-            address = props.get('address', {})
-            geo = library.get('geometry', {}).get('coordinates', [None, None])
-            opening_hours = json.dumps(props.get('openingHours', []))
-            
-            extracted_data.append({
-                'ID knižnice': props.get('id', 'N/A'),
-                'Názov knižnice': props.get('name', 'N/A'),
-                'Ulica': address.get('street', 'N/A'),
-                'PSČ': address.get('postalCode', 'N/A'),
-                'Mesto': address.get('city', 'N/A'),
-                'Kraj': address.get('region', 'N/A'),
-                'Krajina': address.get('country', 'N/A'),
-                'Zemepisná šírka': geo[1] if geo[1] else 'N/A',
-                'Zemepisná dĺžka': geo[0] if geo[0] else 'N/A',
-                'Čas otvorenia': opening_hours
-            })
-        
-        df = pd.DataFrame(extracted_data)
-        df.to_csv('libraries.csv', index=False, encoding='utf-8')
-        print(f"Saved {len(extracted_data)} records to libraries.csv")
+        with tempfile.TemporaryFile() as body:
+            content_hash = hashlib.sha256()
+            for block in response.iter_content(chunk_size=1024 * 1024):
+                content_hash.update(block)
+                body.write(block)
+            content_hash = content_hash.hexdigest()
+            print(f"Downloaded {body.tell()} bytes")
+            if content_hash == cache.get('content_sha256'):
+                # Server ignored the validators but sent the same payload - refresh them and skip parsing
+                save_cache(response, content_hash)
+                print(f"Response identical to the cached one, keeping {OUTPUT_FILE}")
+                exit(0)
+
+            # Features are parsed incrementally from the spooled body straight into the CSV
+            body.seek(0)
+            with GeoJSONTableWriter(TMP_OUTPUT_FILE, LIBRARY_COLUMNS) as writer:
+                record_count = writer.write_features(body)
+        replace_output(record_count, content_hash, response)
     
     else:
         print(f"Error: Status code {response.status_code}")
         print(f"Full response text: {response.text}")
-        df = pd.DataFrame(columns=['ID knižnice', 'Názov knižnice', 'Ulica', 'PSČ', 'Mesto', 'Kraj', 'Krajina', 'Zemepisná šírka', 'Zemepisná dĺžka', 'Čas otvorenia'])
-        df.to_csv('libraries.csv', index=False, encoding='utf-8')
-        print("Created empty libraries.csv with headers due to API error")
+        keep_or_create_output("API error")
         exit(0)
 
 except requests.exceptions.RequestException as e:
     print(f"HTTP request error: {e}")
-    df = pd.DataFrame(columns=['ID knižnice', 'Názov knižnice', 'Ulica', 'PSČ', 'Mesto', 'Kraj', 'Krajina', 'Zemepisná šírka', 'Zemepisná dĺžka', 'Čas otvorenia'])
-    df.to_csv('libraries.csv', index=False, encoding='utf-8')
-    print("Created empty libraries.csv with headers due to HTTP error")
+    keep_or_create_output("HTTP error")
     exit(0)
-except json.JSONDecodeError:
+except (json.JSONDecodeError, JSONError):
     print("Error: Invalid JSON response from API")
-    df = pd.DataFrame(columns=['ID knižnice', 'Názov knižnice', 'Ulica', 'PSČ', 'Mesto', 'Kraj', 'Krajina', 'Zemepisná šírka', 'Zemepisná dĺžka', 'Čas otvorenia'])
-    df.to_csv('libraries.csv', index=False, encoding='utf-8')
-    print("Created empty libraries.csv with headers due to JSON error")
+    keep_or_create_output("JSON error")
     exit(0)
 except Exception as e:
     print(f"Unexpected error: {e}")
-    df = pd.DataFrame(columns=['ID knižnice', 'Názov knižnice', 'Ulica', 'PSČ', 'Mesto', 'Kraj', 'Krajina', 'Zemepisná šírka', 'Zemepisná dĺžka', 'Čas otvorenia'])
-    df.to_csv('libraries.csv', index=False, encoding='utf-8')
-    print("Created empty libraries.csv with headers due to unexpected error")
-    exit(0)
\ No newline at end of file
+    keep_or_create_output("unexpected error")
+    exit(0)
+finally:
+    # Partially written CSV of a failed run
+    if os.path.exists(TMP_OUTPUT_FILE):
+        os.remove(TMP_OUTPUT_FILE)
\ No newline at end of file
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Streaming GeoJSON -> table flattener.
+
+Features are read one at a time with an incremental JSON parser (ijson), so a
+response is never materialized or re-serialized as a whole. Values are picked
+by a declared column schema into per-column lists and written batch by batch
+to CSV or Parquet, keeping memory flat regardless of payload size.
+
+Usage: python geojson_flattener.py INPUT.geojson OUTPUT.csv|OUTPUT.parquet
+"""
+
+import argparse
+import json
+import os
+
+import ijson
+import numpy as np
+import pandas as pd
+
+# Raised by the parser on malformed or truncated JSON
+JSONError = ijson.JSONError
+
+OUTPUT_FORMATS = {'.csv': 'csv', '.parquet': 'parquet'}
+BATCH_SIZE = 10_000
+
+# Column schema: (output column, path inside the feature, dtype, value when missing).
+# dtype is 'string', 'float64' (missing -> NaN) or 'json' (value serialized as JSON text).
+# Example - the Golemio municipal libraries export:
+LIBRARY_COLUMNS = [
+    ('ID knižnice', ('properties', 'id'), 'string', 'N/A'),
+    ('Názov knižnice', ('properties', 'name'), 'string', 'N/A'),
+    ('Ulica', ('properties', 'address', 'street'), 'string', 'N/A'),
+    ('PSČ', ('properties', 'address', 'postalCode'), 'string', 'N/A'),
+    ('Mesto', ('properties', 'address', 'city'), 'string', 'N/A'),
+    ('Kraj', ('properties', 'address', 'region'), 'string', 'N/A'),
+    ('Krajina', ('properties', 'address', 'country'), 'string', 'N/A'),
+    ('Zemepisná šírka', ('geometry', 'coordinates', 1), 'float64', None),
+    ('Zemepisná dĺžka', ('geometry', 'coordinates', 0), 'float64', None),
+    ('Čas otvorenia', ('properties', 'openingHours'), 'json', []),
+]
+
+def _lookup(feature, path, default):
+    value = feature
+    for key in path:
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return default
+    return default if value is None else value
+
+def iter_features(stream, prefix='features.item'):
+    """GeoJSON features one by one from a binary file-like object"""
+    return ijson.items(stream, prefix, use_float=True)
+
+def iter_feature_batches(features, columns, batch_size=BATCH_SIZE):
+    """DataFrames of at most batch_size flattened features, typed according to the column schema"""
+    values = [[] for _ in columns]
+    for feature in features:
+        for column_values, (_, path, dtype, default) in zip(values, columns):
+            value = _lookup(feature, path, default)
+            column_values.append(json.dumps(value) if dtype == 'json' else value)
+        if len(values[0]) >= batch_size:
+            yield _batch_frame(values, columns)
+            values = [[] for _ in columns]
+    if values[0]:
+        yield _batch_frame(values, columns)
+
+def _batch_frame(values, columns):
+    data = {}
+    for column_values, (name, _, dtype, _) in zip(values, columns):
+        if dtype == 'float64':
+            data[name] = pd.to_numeric(pd.Series(column_values, dtype=object), errors='coerce').astype('float64')
+        else:
+            data[name] = np.array(column_values, dtype=object)
+    return pd.DataFrame(data)
+
+def _arrow_schema(columns):
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+    return pyarrow.schema([
+        pyarrow.field(name, pyarrow.float64() if dtype == 'float64' else pyarrow.string())
+        for name, _, dtype, _ in columns
+    ])
+
+class GeoJSONTableWriter:
+    """Appends flattened features to one CSV or Parquet file, from any number of GeoJSON streams"""
+
+    def __init__(self, path, columns, output_format=None, batch_size=BATCH_SIZE):
+        output_format = output_format or OUTPUT_FORMATS.get(os.path.splitext(path)[1], 'csv')
+        if output_format not in OUTPUT_FORMATS.values():
+            raise ValueError(f"Unsupported output format: {output_format}")
+        self.path = path
+        self.columns = columns
+        self.output_format = output_format
+        self.batch_size = batch_size
+        self.record_count = 0
+        self._file = None
+        self._parquet_writer = None
+        self._schema = None
+
+    def write_features(self, stream, prefix='features.item'):
+        """Flattens all features of one GeoJSON stream, returns their count"""
+        written = 0
+        for batch in iter_feature_batches(iter_features(stream, prefix), self.columns, self.batch_size):
+            self._write_batch(batch)
+            written += len(batch)
+        return written
+
+    def _write_batch(self, batch):
+        if self.output_format == 'parquet':
+            import pyarrow
+            import pyarrow.parquet
+            if self._parquet_writer is None:
+                self._schema = _arrow_schema(self.columns)
+                self._parquet_writer = pyarrow.parquet.ParquetWriter(self.path, self._schema)
+            self._parquet_writer.write_table(pyarrow.Table.from_pandas(batch, schema=self._schema,
+                                                                       preserve_index=False))
+        else:
+            header = self._file is None
+            if header:
+                self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            batch.to_csv(self._file, index=False, header=header)
+        self.record_count += len(batch)
+
+    def close(self):
+        # No features at all - still produce a file with the header / schema
+        if self._file is None and self._parquet_writer is None:
+            self._write_batch(_batch_frame([[] for _ in self.columns], self.columns))
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def flatten_geojson(stream, path, columns, output_format=None, batch_size=BATCH_SIZE):
+    """Flattens one GeoJSON stream into path, returns the number of features"""
+    with GeoJSONTableWriter(path, columns, output_format, batch_size) as writer:
+        return writer.write_features(stream)
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming GeoJSON -> CSV / Parquet flattener')
+    parser.add_argument('input', help='GeoJSON FeatureCollection file')
+    parser.add_argument('output', help='target .csv or .parquet file')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    with open(args.input, 'rb') as stream:
+        record_count = flatten_geojson(stream, args.output, LIBRARY_COLUMNS, batch_size=args.batch_size)
+    print(f"Saved {record_count} records to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Scripty sú v koreni repozitára (nie balík) - testy ich importujú priamo
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
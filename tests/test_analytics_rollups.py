@@ -0,0 +1,53 @@
+"""
+Dotazy RollupQuery nad analytics_rollups - rovnaké výsledky a typy z rollupu aj z detailu.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import REPO_DIR
+import analytics_rollups
+import transform_script_keboola as transform
+
+INPUT_FILE = os.path.join(REPO_DIR, 'input.csv')
+
+COUNT_MEASURES = ['record_count', 'quality_issue_records']
+
+@pytest.fixture(scope='module')
+def rollup_query(tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp('tables')
+    transform._DATE_CACHE.clear()
+    transform.run_transformation(INPUT_FILE, str(output_dir), files_dir=str(output_dir), stages=transform.ALL_STAGES,
+                                 chunk_size=0, workers=1, columnar_format='', state_dir='', profiler='',
+                                 metrics_enabled=False)
+    return analytics_rollups.RollupQuery.from_files(str(output_dir / 'analytics_rollups.csv'),
+                                                    str(output_dir / 'analytics_ready.csv'))
+
+def detail_query(rollup_query, group_by, filters):
+    """Rovnaký dotaz len nad detailom (bez rollupov)"""
+    return analytics_rollups.RollupQuery(rollup_query.rollups.iloc[:0], rollup_query.analytics_file).query(
+        group_by, filters)
+
+@pytest.mark.parametrize('group_by, filters, source', [
+    ([], {}, 'total'),
+    ([], {'Category': 'Electronics'}, 'month_category'),
+    ([], {'Product': 'Laptop'}, 'analytics_ready'),
+    (['Category'], {}, 'month_category'),
+])
+def test_query_matches_detail(rollup_query, group_by, filters, source):
+    result, actual_source = rollup_query.query(group_by, filters)
+    assert actual_source == source
+    for measure in COUNT_MEASURES:
+        assert result[measure].dtype == 'int64', measure
+    expected, _ = detail_query(rollup_query, group_by, filters)
+    pd.testing.assert_frame_equal(result[list(analytics_rollups.ROLLUP_MEASURES)],
+                                  expected[list(analytics_rollups.ROLLUP_MEASURES)])
+
+def test_empty_group_by_totals(rollup_query):
+    result, _ = rollup_query.query([])
+    detail = pd.read_csv(rollup_query.analytics_file, dtype=str)
+    assert len(result) == 1
+    assert result.at[0, 'record_count'] == len(detail)
+    assert result.at[0, 'quality_issue_records'] == pd.to_numeric(detail['Had_Data_Quality_Issues']).sum()
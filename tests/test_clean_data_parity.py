@@ -0,0 +1,206 @@
+"""
+Parita vektorizovaného clean_data s pôvodnými riadkovými opravami (apply po riadkoch) na input.csv.
+
+Referenčné opravy sú prevzaté z pôvodného scriptu bez zmien. Kategórie sa porovnávajú
+s matcherom len z pravidiel - naučené mapovanie Product -> Category je neskoršie rozšírenie.
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import REPO_DIR
+import transform_script_keboola as transform
+
+INPUT_FILE = os.path.join(REPO_DIR, 'input.csv')
+
+COMPARED_COLUMNS = [
+    'Category_Clean', 'Category_Was_Fixed',
+    'Product_Clean', 'Product_Was_Fixed',
+    'TransactionDate_Clean', 'Date_Was_Missing',
+    'Price_Clean', 'Price_Was_Fixed',
+    'PaymentMethod_Clean',
+    'ShippingAddress_Clean',
+    'Email_Clean', 'Email_Was_Invalid',
+    'OrderStatus_Clean',
+    'PaymentAmount_Clean',
+]
+
+def reference_clean_data(df):
+    """Pôvodné riadkové opravy (pred vektorizáciou)"""
+    df_clean = df.copy()
+
+    def fix_category(row):
+        if pd.isna(row['Category']) or row['Category'] == '':
+            product = str(row['Product']).upper()
+            if any(keyword in product for keyword in ['LAPTOP', 'SMARTPHONE', 'HEADPHONES']):
+                return 'Electronics', 1
+            elif any(keyword in product for keyword in ['DUMBBELLS', 'YOGA']):
+                return 'Sports', 1
+            elif any(keyword in product for keyword in ['SOFA', 'BLENDER']):
+                return 'Home & Garden', 1
+            elif any(keyword in product for keyword in ['BOARD GAME', 'ACTION FIGURE']):
+                return 'Toys', 1
+            elif any(keyword in product for keyword in ['PERFUME', 'SHAMPOO', 'FACE CREAM']):
+                return 'Beauty', 1
+            elif 'COOKBOOK' in product:
+                return 'Books', 1
+            elif any(keyword in product for keyword in ['THERMOMETER', 'VITAMINS']):
+                return 'Health', 1
+            elif 'JACKET' in product:
+                return 'Fashion', 1
+            else:
+                return 'Uncategorized', 1
+        return row['Category'], 0
+
+    category_fixes = df_clean.apply(fix_category, axis=1, result_type='expand')
+    df_clean['Category_Clean'] = category_fixes[0]
+    df_clean['Category_Was_Fixed'] = category_fixes[1]
+
+    def fix_product(row):
+        if pd.isna(row['Product']) or row['Product'] == '':
+            return 'Unknown Product', 1
+        elif row['Product'] == 'InvalidProd2':
+            return 'Product Name Correction Needed', 1
+        return row['Product'], 0
+
+    product_fixes = df_clean.apply(fix_product, axis=1, result_type='expand')
+    df_clean['Product_Clean'] = product_fixes[0]
+    df_clean['Product_Was_Fixed'] = product_fixes[1]
+
+    def parse_date(date_str):
+        if pd.isna(date_str) or date_str == '':
+            return None, 1
+
+        date_str = str(date_str).strip()
+
+        if re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
+            try:
+                return pd.to_datetime(date_str, format='%Y-%m-%d'), 0
+            except Exception:
+                pass
+
+        if re.match(r'^\d{2}-\d{2}-\d{4}', date_str):
+            try:
+                date_part = date_str.split(' ')[0]
+                return pd.to_datetime(date_part, format='%d-%m-%Y'), 0
+            except Exception:
+                pass
+
+        try:
+            return pd.to_datetime(date_str), 0
+        except Exception:
+            return None, 1
+
+    date_fixes = df_clean['TransactionDate'].apply(parse_date)
+    df_clean['TransactionDate_Clean'] = [fix[0] for fix in date_fixes]
+    df_clean['Date_Was_Missing'] = [fix[1] for fix in date_fixes]
+
+    def fix_price(row):
+        price = pd.to_numeric(row['Price'], errors='coerce')
+        total_value = pd.to_numeric(row['TotalValue'], errors='coerce')
+        quantity = pd.to_numeric(row['Quantity'], errors='coerce')
+
+        if pd.isna(price):
+            if not pd.isna(total_value) and not pd.isna(quantity) and quantity > 0:
+                return total_value / quantity, 1
+            else:
+                return 0, 1
+        return price, 0
+
+    price_fixes = df_clean.apply(fix_price, axis=1, result_type='expand')
+    df_clean['Price_Clean'] = price_fixes[0]
+    df_clean['Price_Was_Fixed'] = price_fixes[1]
+
+    def fix_payment_method(method):
+        if pd.isna(method) or method == '':
+            return 'Not Specified'
+        elif method == 'UnsupportedMethod':
+            return 'Method Verification Needed'
+        return method
+
+    df_clean['PaymentMethod_Clean'] = df_clean['PaymentMethod'].apply(fix_payment_method)
+
+    def fix_address(address):
+        if pd.isna(address) or address == '':
+            return 'Address Not Provided'
+        elif address == 'UNKNOWN ADDRESS':
+            return 'Address Verification Needed'
+        return address
+
+    df_clean['ShippingAddress_Clean'] = df_clean['ShippingAddress'].apply(fix_address)
+
+    def fix_email(email):
+        if pd.isna(email) or email in ['invalid_email', 'not_an_email']:
+            return 'Email Not Provided', 1
+        elif '@' not in str(email):
+            return 'Invalid Email Format', 1
+        return email, 0
+
+    email_fixes = df_clean['Email'].apply(fix_email)
+    df_clean['Email_Clean'] = [fix[0] for fix in email_fixes]
+    df_clean['Email_Was_Invalid'] = [fix[1] for fix in email_fixes]
+
+    def fix_order_status(status):
+        if status == 'UnknownStatus':
+            return 'Status Verification Needed'
+        elif pd.isna(status):
+            return 'Pending'
+        return status
+
+    df_clean['OrderStatus_Clean'] = df_clean['OrderStatus'].apply(fix_order_status)
+
+    def fix_payment_amount(row):
+        payment_amount = pd.to_numeric(row['PaymentAmount'], errors='coerce')
+        total_value = pd.to_numeric(row['TotalValue'], errors='coerce')
+
+        if pd.isna(payment_amount):
+            return total_value if not pd.isna(total_value) else 0
+
+        if pd.isna(total_value):
+            return payment_amount
+
+        if abs(payment_amount - total_value) > total_value * 0.1:
+            return total_value
+        return payment_amount
+
+    df_clean['PaymentAmount_Clean'] = df_clean.apply(fix_payment_amount, axis=1)
+
+    return df_clean
+
+def _comparable(column):
+    """Hodnoty stĺpca bez ohľadu na dtype (category / str / int8 / Float64 vs. object / int64)"""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.astype('datetime64[ns]').to_numpy()
+    if pd.api.types.is_numeric_dtype(column):
+        return pd.to_numeric(column).astype('float64').to_numpy()
+    column = column.astype(object)
+    return column.where(column.notna(), None).to_numpy()
+
+@pytest.fixture(scope='module')
+def cleaned_frames():
+    # Vstup ako v pôvodnom scripte: všetko ako string, numerické stĺpce cez to_numeric
+    raw = pd.read_csv(INPUT_FILE, dtype=str)
+    for col in ['Quantity', 'Price', 'TotalValue', 'PaymentAmount']:
+        raw[col] = pd.to_numeric(raw[col], errors='coerce')
+    reference = reference_clean_data(raw)
+
+    transform._DATE_CACHE.clear()
+    keyword_matcher = transform.CategoryMatcher(transform.DEFAULT_CATEGORY_RULES)
+    df = transform.apply_input_types(transform.read_input(INPUT_FILE))
+    vectorized = transform.clean_data(df, category_matcher=keyword_matcher)
+    return reference, vectorized
+
+@pytest.mark.parametrize('column', COMPARED_COLUMNS)
+def test_clean_column_matches_row_wise_fixers(cleaned_frames, column):
+    reference, vectorized = cleaned_frames
+    assert len(vectorized) == len(reference)
+    expected = _comparable(reference[column])
+    actual = _comparable(vectorized[column])
+    if expected.dtype.kind in 'fM':
+        np.testing.assert_array_equal(actual, expected)
+    else:
+        assert list(actual) == list(expected)
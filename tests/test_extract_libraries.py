@@ -0,0 +1,230 @@
+"""
+extract_libraries.py against a local Golemio stub (http.server) - the script runs as a subprocess
+in a temporary directory, exactly as in the scheduled workflow.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from conftest import REPO_DIR
+
+SCRIPT = os.path.join(REPO_DIR, 'extract_libraries.py')
+
+def make_features(count):
+    return [{
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [14.4 + i / 1000, 50.0 + i / 1000]},
+        'properties': {
+            'id': i,
+            'name': f'Knihovna {i}',
+            'address': {'street': f'Ulice {i}', 'postalCode': '110 00', 'city': 'Praha',
+                        'region': 'Praha', 'country': 'Czechia'},
+            'openingHours': [{'day': 'Monday', 'opens': '09:00', 'closes': '18:00'}] if i % 2 else [],
+        },
+    } for i in range(count)]
+
+class GolemioStub:
+    """Served features, ETag and status of the stub; every request is recorded"""
+
+    def __init__(self, features, etag='"v1"'):
+        self.features = features
+        self.etag = etag
+        self.status = 200
+        self.honor_paging = True
+        # Pages (by offset) answered with truncated JSON
+        self.broken_offsets = set()
+        self.requests = []
+
+    def response(self, query, headers):
+        self.requests.append({'query': query, 'headers': headers})
+        if self.status != 200:
+            return self.status, {}, b'Internal error'
+        if self.etag and headers.get('If-None-Match') == self.etag:
+            return 304, {'ETag': self.etag}, b''
+        features = self.features
+        if query.get('offset') in self.broken_offsets:
+            return 200, {}, b'{"type": "FeatureCollection", "features": [{"type": '
+        if self.honor_paging and 'limit' in query:
+            offset = int(query['offset'])
+            features = features[offset:offset + int(query['limit'])]
+        body = json.dumps({'type': 'FeatureCollection', 'features': features}).encode('utf-8')
+        return 200, {'ETag': self.etag} if self.etag else {}, body
+
+@pytest.fixture
+def golemio():
+    stub = GolemioStub(make_features(25))
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = {name: values[0] for name, values in parse_qs(urlparse(self.path).query).items()}
+            status, headers, body = stub.response(query, dict(self.headers))
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stub.url = f'http://127.0.0.1:{server.server_port}/v2/municipallibraries'
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+def run_extractor(work_dir, stub, **env):
+    work_dir.mkdir(exist_ok=True)
+    environment = {
+        **os.environ,
+        'GOLEMIO_API_KEY': 'test-key',
+        'GOLEMIO_API_URL': stub.url,
+        'GOLEMIO_CACHE_DIR': str(work_dir / 'cache'),
+        'PYTHONPATH': REPO_DIR,
+        **env,
+    }
+    completed = subprocess.run([sys.executable, SCRIPT], cwd=work_dir, env=environment,
+                               capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stdout + completed.stderr
+    return completed.stdout
+
+def read_output(work_dir):
+    return (work_dir / 'libraries.csv').read_bytes()
+
+def test_api_error_keeps_last_good_output(golemio, tmp_path):
+    run_extractor(tmp_path, golemio)
+    good = read_output(tmp_path)
+    assert good.count(b'\n') == 26
+
+    golemio.status = 500
+    assert 'Keeping the last libraries.csv' in run_extractor(tmp_path, golemio)
+    assert read_output(tmp_path) == good
+
+    # Payload unchanged since the error - 304 is safe, libraries.csv still holds the data
+    golemio.status = 200
+    output = run_extractor(tmp_path, golemio)
+    assert 'Response status code: 304' in output
+    assert read_output(tmp_path) == good
+
+def test_placeholder_output_drops_cache(golemio, tmp_path):
+    run_extractor(tmp_path, golemio)
+    good = read_output(tmp_path)
+    (tmp_path / 'libraries.csv').unlink()
+
+    golemio.status = 500
+    assert 'Created empty libraries.csv' in run_extractor(tmp_path, golemio)
+    assert read_output(tmp_path).count(b'\n') == 1
+    assert not os.listdir(tmp_path / 'cache')
+
+    golemio.status = 200
+    run_extractor(tmp_path, golemio)
+    assert 'If-None-Match' not in golemio.requests[-1]['headers']
+    assert read_output(tmp_path) == good
+
+def test_cache_ignored_for_foreign_output(golemio, tmp_path):
+    # libraries.csv from another run (e.g. an older checkout) must not be kept on a 304
+    run_extractor(tmp_path, golemio)
+    good = read_output(tmp_path)
+    (tmp_path / 'libraries.csv').write_bytes(good.split(b'\n', 1)[0] + b'\n')
+
+    run_extractor(tmp_path, golemio)
+    assert 'If-None-Match' not in golemio.requests[-1]['headers']
+    assert read_output(tmp_path) == good
+
+def _age_output(work_dir):
+    """Old mtime on libraries.csv - a later rewrite shows up as a changed mtime"""
+    os.utime(work_dir / 'libraries.csv', (1_000_000_000, 1_000_000_000))
+
+def test_not_modified_keeps_output(golemio, tmp_path):
+    run_extractor(tmp_path, golemio)
+    good = read_output(tmp_path)
+    _age_output(tmp_path)
+
+    output = run_extractor(tmp_path, golemio)
+    assert golemio.requests[-1]['headers'].get('If-None-Match') == '"v1"'
+    assert 'Response status code: 304' in output
+    assert 'Not modified since' in output
+    assert os.stat(tmp_path / 'libraries.csv').st_mtime == 1_000_000_000
+    assert read_output(tmp_path) == good
+
+def test_identical_payload_is_not_parsed(golemio, tmp_path):
+    # Server without validators - the same body is recognized by its hash
+    golemio.etag = None
+    run_extractor(tmp_path, golemio)
+    good = read_output(tmp_path)
+    _age_output(tmp_path)
+
+    output = run_extractor(tmp_path, golemio)
+    assert 'Response identical to the cached one' in output
+    assert os.stat(tmp_path / 'libraries.csv').st_mtime == 1_000_000_000
+    assert read_output(tmp_path) == good
+
+def test_changed_payload_rewrites_output(golemio, tmp_path):
+    run_extractor(tmp_path, golemio)
+    golemio.features = make_features(30)
+    golemio.etag = '"v2"'
+
+    output = run_extractor(tmp_path, golemio)
+    assert 'Saved 30 records' in output
+    assert read_output(tmp_path).count(b'\n') == 31
+
+def single_request_output(golemio, tmp_path):
+    run_extractor(tmp_path / 'single', golemio)
+    return read_output(tmp_path / 'single')
+
+def test_paging_ignored_by_server_stops(golemio, tmp_path):
+    expected = single_request_output(golemio, tmp_path)
+    golemio.honor_paging = False
+
+    output = run_extractor(tmp_path / 'paged', golemio, GOLEMIO_PAGE_SIZE='10')
+    assert 'repeats an earlier page' in output
+    assert read_output(tmp_path / 'paged') == expected
+
+def test_max_pages_aborts_and_keeps_output(golemio, tmp_path):
+    run_extractor(tmp_path, golemio, GOLEMIO_PAGE_SIZE='10')
+    good = read_output(tmp_path)
+    golemio.features = make_features(60)
+
+    output = run_extractor(tmp_path, golemio, GOLEMIO_PAGE_SIZE='10', GOLEMIO_MAX_PAGES='3')
+    assert 'More than 3 pages' in output
+    assert read_output(tmp_path) == good
+    assert not (tmp_path / 'libraries.csv.tmp').exists()
+
+def test_broken_page_removes_partial_output(golemio, tmp_path):
+    golemio.broken_offsets = {'10'}
+    output = run_extractor(tmp_path, golemio, GOLEMIO_PAGE_SIZE='5', GOLEMIO_CONCURRENCY='1')
+    assert 'Invalid JSON response' in output
+    assert read_output(tmp_path).count(b'\n') == 1
+    assert not (tmp_path / 'libraries.csv.tmp').exists()
+
+@pytest.mark.parametrize('page_size', ['1', '7', '25', '100'])
+def test_paginated_output_matches_single_request(golemio, tmp_path, page_size):
+    # 25 = whole set on one full page, the following page is empty
+    expected = single_request_output(golemio, tmp_path)
+
+    output = run_extractor(tmp_path / 'paged', golemio, GOLEMIO_PAGE_SIZE=page_size)
+    assert 'Saved 25 records' in output
+    assert read_output(tmp_path / 'paged') == expected
+    paged_requests = [request['query'] for request in golemio.requests if 'limit' in request['query']]
+    assert {request['limit'] for request in paged_requests} == {page_size}
+
+def test_paginated_identical_payload_keeps_output(golemio, tmp_path):
+    run_extractor(tmp_path, golemio, GOLEMIO_PAGE_SIZE='10')
+    good = read_output(tmp_path)
+    _age_output(tmp_path)
+
+    output = run_extractor(tmp_path, golemio, GOLEMIO_PAGE_SIZE='10')
+    assert 'Response identical to the cached one' in output
+    assert os.stat(tmp_path / 'libraries.csv').st_mtime == 1_000_000_000
+    assert read_output(tmp_path) == good
+    assert not (tmp_path / 'libraries.csv.tmp').exists()
@@ -0,0 +1,103 @@
+"""
+Inkrementálny režim (TRANSFORM_STATE_DIR) po doplnení riadkov - výstupy ako pri plnom behu,
+prepočítajú sa len nové riadky a riadky dotknuté zmenou naučeného mapovania kategórií.
+"""
+
+import csv
+import os
+import re
+
+import pandas as pd
+import pytest
+
+from conftest import REPO_DIR
+import transform_script_keboola as transform
+from test_streaming_parity import run_tables
+
+INPUT_FILE = os.path.join(REPO_DIR, 'input.csv')
+
+def read_rows():
+    with open(INPUT_FILE, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+def write_rows(rows, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f, lineterminator='\n').writerows(rows)
+
+def appended_row(header, template, **values):
+    row = list(template)
+    for column, value in values.items():
+        row[header.index(column)] = value
+    return row
+
+def run_incremental(input_file, output_dir, state_dir, capsys):
+    transform._DATE_CACHE.clear()
+    capsys.readouterr()
+    transform.run_transformation(input_file, str(output_dir), files_dir=str(output_dir), stages=transform.ALL_STAGES,
+                                 chunk_size=0, workers=1, columnar_format='', state_dir=str(state_dir),
+                                 profiler='', metrics_enabled=False)
+    line = re.search(r'Nové záznamy: .*', capsys.readouterr().out).group(0)
+    counts = {name.strip(): int(count) for name, count in re.findall(r'([^:,]+): (\d+)', line)}
+    tables = {}
+    for name in sorted(os.listdir(output_dir)):
+        with open(os.path.join(output_dir, name), 'rb') as f:
+            tables[name] = f.read()
+    return counts, tables
+
+def assert_incremental_append(tmp_path, capsys, extra_rows):
+    rows = read_rows()
+    state_dir = tmp_path / 'state'
+    run_incremental(INPUT_FILE, tmp_path / 'first', state_dir, capsys)
+
+    input_file = tmp_path / 'csv_input.csv'
+    write_rows(rows + extra_rows, input_file)
+    counts, actual = run_incremental(str(input_file), tmp_path / 'incremental', state_dir, capsys)
+    expected = run_tables(str(input_file), tmp_path / 'in_memory')
+    assert sorted(actual) == sorted(expected)
+    for name in expected:
+        assert actual[name] == expected[name], name
+    return counts, len(rows) - 1
+
+def test_new_learned_product_keeps_state(tmp_path, capsys):
+    # Nový produkt s kategóriou rozšíri naučené mapovanie - ostatné riadky sa nesmú prepočítať
+    header = read_rows()[0]
+    template = read_rows()[1]
+    kindle = appended_row(header, template, TransactionID='kindle-1', Product='Kindle', Category='Electronics')
+    counts, rows = assert_incremental_append(tmp_path, capsys, [kindle])
+    assert counts['Nové záznamy'] == 1
+    assert counts['nová naučená kategória'] == 0
+    assert counts['nezmenené'] == rows
+
+def test_relearned_category_recleans_rows_without_category(tmp_path, capsys):
+    # Bandages s inou kategóriou - podiel Health klesne pod learn_min_share a mapovanie zmizne
+    rows = read_rows()
+    header = rows[0]
+    product = header.index('Product')
+    category = header.index('Category')
+    without_category = sum(1 for row in rows[1:] if row[product] == 'Bandages' and row[category] == '')
+    assert without_category
+    extra = [appended_row(header, rows[1], TransactionID=f'bandages-{i}', Product='Bandages', Category='Fashion')
+             for i in range(15)]
+    counts, input_rows = assert_incremental_append(tmp_path, capsys, extra)
+    assert counts['Nové záznamy'] == len(extra)
+    assert counts['nová naučená kategória'] == without_category
+    assert counts['nezmenené'] == input_rows - without_category
+
+def test_columnar_output(tmp_path, capsys):
+    pytest.importorskip('pyarrow')
+    for run_dir, state_dir in [(tmp_path / 'in_memory', ''), (tmp_path / 'incremental', str(tmp_path / 'state'))]:
+        transform._DATE_CACHE.clear()
+        transform.run_transformation(INPUT_FILE, str(run_dir), files_dir=str(run_dir), stages=transform.ALL_STAGES,
+                                     chunk_size=0, workers=1, columnar_format='parquet', state_dir=state_dir,
+                                     profiler='', metrics_enabled=False)
+    for table_name in transform.OUTPUT_TABLES:
+        expected = transform.read_output_table(str(tmp_path / 'in_memory' / f'{table_name}.parquet'))
+        actual = transform.read_output_table(str(tmp_path / 'incremental' / f'{table_name}.parquet'))
+        pd.testing.assert_frame_equal(actual, expected, check_categorical=False)
+
+@pytest.mark.parametrize('options', [{'chunk_size': 100, 'workers': 1}, {'chunk_size': 0, 'workers': 2}])
+def test_streaming_options_are_rejected(tmp_path, options):
+    with pytest.raises(ValueError, match='Inkrementálny režim'):
+        transform.run_transformation(INPUT_FILE, str(tmp_path), files_dir=str(tmp_path), stages=transform.ALL_STAGES,
+                                     columnar_format='', state_dir=str(tmp_path / 'state'), profiler='',
+                                     metrics_enabled=False, **options)
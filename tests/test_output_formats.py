@@ -0,0 +1,33 @@
+"""
+Výstupné tabuľky načítané cez read_output_table - CSV, Parquet aj Arrow IPC s rovnakými hodnotami a typmi.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import REPO_DIR
+import transform_script_keboola as transform
+
+INPUT_FILE = os.path.join(REPO_DIR, 'input.csv')
+
+pytest.importorskip('pyarrow')
+
+@pytest.fixture(scope='module', params=list(transform.COLUMNAR_EXTENSIONS))
+def output_dir(request, tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp(request.param)
+    transform._DATE_CACHE.clear()
+    transform.run_transformation(INPUT_FILE, str(output_dir), files_dir=str(output_dir), stages=transform.ALL_STAGES,
+                                 chunk_size=0, workers=1, columnar_format=request.param, state_dir='',
+                                 profiler='', metrics_enabled=False)
+    return output_dir, transform.COLUMNAR_EXTENSIONS[request.param]
+
+@pytest.mark.parametrize('table_name', transform.OUTPUT_TABLES)
+def test_columnar_table_matches_csv(output_dir, table_name):
+    output_dir, extension = output_dir
+    expected = transform.read_output_table(str(output_dir / f'{table_name}.csv'))
+    actual = transform.read_output_table(str(output_dir / f'{table_name}{extension}'))
+    assert actual.dtypes.astype(str).to_dict() == expected.dtypes.astype(str).to_dict()
+    # Stĺpcové formáty nesú celú množinu kategórií z pamäte, CSV len použité hodnoty
+    pd.testing.assert_frame_equal(actual, expected, check_categorical=False)
@@ -0,0 +1,83 @@
+"""
+Výstupy streamovacieho (aj paralelného) režimu musia byť bajtovo rovnaké ako pri behu v pamäti.
+"""
+
+import csv
+import os
+
+import pytest
+
+from conftest import REPO_DIR
+import transform_script_keboola as transform
+
+INPUT_FILE = os.path.join(REPO_DIR, 'input.csv')
+
+STREAMING_MODES = {
+    'chunks': {'chunk_size': 100},
+    'parallel': {'chunk_size': 100, 'workers': 2},
+}
+
+def run_tables(input_file, output_dir, chunk_size=0, workers=1):
+    transform._DATE_CACHE.clear()
+    transform.run_transformation(input_file, str(output_dir), files_dir=str(output_dir), stages=transform.ALL_STAGES,
+                                 chunk_size=chunk_size, workers=workers, columnar_format='', state_dir='',
+                                 profiler='', metrics_enabled=False)
+    tables = {}
+    for name in sorted(os.listdir(output_dir)):
+        with open(os.path.join(output_dir, name), 'rb') as f:
+            tables[name] = f.read()
+    return tables
+
+def assert_same_tables(input_file, tmp_path, mode):
+    expected = run_tables(input_file, tmp_path / 'in_memory')
+    actual = run_tables(input_file, tmp_path / mode, **STREAMING_MODES[mode])
+    assert sorted(actual) == sorted(expected)
+    for name in expected:
+        assert actual[name] == expected[name], name
+
+@pytest.mark.parametrize('mode', STREAMING_MODES)
+def test_header_only_input(tmp_path, mode):
+    input_file = tmp_path / 'csv_input.csv'
+    with open(INPUT_FILE, encoding='utf-8') as f:
+        input_file.write_text(f.readline(), encoding='utf-8')
+    assert_same_tables(str(input_file), tmp_path, mode)
+    with open(tmp_path / mode / 'cleaned_transactions.csv', encoding='utf-8') as f:
+        assert f.readline().startswith('TransactionID,')
+
+@pytest.mark.parametrize('mode', STREAMING_MODES)
+def test_date_with_time_of_day(tmp_path, mode):
+    # Automaticky parsovaný dátum s časom v jednom riadku nesmie zmeniť formát ostatných chunkov
+    with open(INPUT_FILE, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    rows[700][rows[0].index('TransactionDate')] = '2024-03-05T10:30:00'
+    input_file = tmp_path / 'csv_input.csv'
+    with open(input_file, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f, lineterminator='\n').writerows(rows)
+    assert_same_tables(str(input_file), tmp_path, mode)
+
+@pytest.mark.parametrize('chunk_size', [1, 37, 100_000])
+def test_learned_categories_from_chunk_counts(chunk_size):
+    # Streamovací režim sa mapovanie učí zo sčítaných počtov po chunkoch - rovnako ako z celého vstupu
+    config = transform.load_category_rules()
+    expected = transform.build_category_matcher(transform.read_input(INPUT_FILE), config).learned
+    pair_counts = None
+    for chunk in transform.read_input(INPUT_FILE, usecols=['Product', 'Category'], chunksize=chunk_size):
+        pair_counts = transform.add_pair_counts(pair_counts,
+                                                transform.category_pair_counts(chunk['Product'], chunk['Category']))
+    assert transform.CategoryMatcher.from_pair_counts(config, pair_counts).learned == expected
+
+@pytest.mark.parametrize('engine', ['pyarrow', 'pandas'])
+def test_input_with_utf8_bom(tmp_path, monkeypatch, engine):
+    # Export z Excelu / Windows môže začínať BOM - výstupy rovnaké ako bez neho
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    monkeypatch.setattr(transform, 'CSV_ENGINE', engine)
+    input_file = tmp_path / 'csv_input.csv'
+    with open(INPUT_FILE, 'rb') as f:
+        input_file.write_bytes(b'\xef\xbb\xbf' + f.read())
+    expected = run_tables(INPUT_FILE, tmp_path / 'without_bom')
+    for run_dir, chunk_size in [('in_memory', 0), ('chunks', 100)]:
+        actual = run_tables(str(input_file), tmp_path / run_dir, chunk_size=chunk_size)
+        assert sorted(actual) == sorted(expected)
+        for name in expected:
+            assert actual[name] == expected[name], (run_dir, name)
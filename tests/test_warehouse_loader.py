@@ -0,0 +1,89 @@
+"""
+Opakované načítanie rozšíreného analytics_ready do warehouse - kľúč faktu nesmie závisieť od poradia riadkov.
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from conftest import REPO_DIR
+import transform_script_keboola as transform
+import warehouse_loader
+
+INPUT_FILE = os.path.join(REPO_DIR, 'input.csv')
+
+@pytest.fixture(scope='module')
+def tables(tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp('tables')
+    transform._DATE_CACHE.clear()
+    transform.run_transformation(INPUT_FILE, str(output_dir), files_dir=str(output_dir), stages=transform.ALL_STAGES,
+                                 chunk_size=0, workers=1, columnar_format='', state_dir='', profiler='',
+                                 metrics_enabled=False)
+    return output_dir
+
+def read_analytics(tables):
+    return pd.read_csv(tables / 'analytics_ready.csv', dtype=str, keep_default_na=False)
+
+def write_analytics(frame, path):
+    # Ako transformácia: stabilne podľa dátumu zostupne
+    frame.sort_values('TransactionDate', ascending=False, kind='mergesort').to_csv(path, index=False)
+
+def load(analytics_file, tables, warehouse_file):
+    return warehouse_loader.load_warehouse(str(analytics_file), str(warehouse_file),
+                                           cleaned_file=str(tables / 'cleaned_transactions.csv'))
+
+def fact_totals(warehouse_file):
+    with sqlite3.connect(warehouse_file) as conn:
+        return conn.execute("SELECT COUNT(*), ROUND(SUM(TotalAmount), 2) FROM SalesFact").fetchone()
+
+def test_replayed_transaction_with_later_date(tables, tmp_path):
+    analytics = read_analytics(tables)
+    warehouse_file = tmp_path / 'warehouse.sqlite'
+    stats = load(tables / 'analytics_ready.csv', tables, warehouse_file)
+    assert stats['loaded_records'] == len(analytics)
+    facts, total = fact_totals(warehouse_file)
+
+    # Replay existujúcej transakcie s neskorším dátumom - po triedení sa dostane pred pôvodné výskyty
+    replayed_id = analytics['TransactionID'][analytics['TransactionID'].duplicated()].iloc[0]
+    replay = analytics[analytics['TransactionID'] == replayed_id].head(1).copy()
+    replay['TotalValue'] = '1.00'
+    replay['TransactionDate'] = '2025-06-01'
+    extended_file = tmp_path / 'analytics_ready_extended.csv'
+    write_analytics(pd.concat([analytics, replay], ignore_index=True), extended_file)
+
+    stats = load(extended_file, tables, warehouse_file)
+    assert stats['loaded_records'] == 1
+    assert fact_totals(warehouse_file) == (facts + 1, round(total + 1.0, 2))
+
+    # Bez zmien - nič nové, ani po preusporiadaní súboru
+    write_analytics(pd.concat([analytics, replay], ignore_index=True).iloc[::-1], extended_file)
+    assert load(extended_file, tables, warehouse_file)['loaded_records'] == 0
+
+def test_identical_rows_are_counted(tables, tmp_path):
+    analytics = read_analytics(tables)
+    warehouse_file = tmp_path / 'warehouse.sqlite'
+    load(tables / 'analytics_ready.csv', tables, warehouse_file)
+    facts, _ = fact_totals(warehouse_file)
+
+    # Úplne rovnaký riadok ešte raz je nový fakt (ďalší výskyt), nie duplicita
+    extended_file = tmp_path / 'analytics_ready_extended.csv'
+    write_analytics(pd.concat([analytics, analytics.head(1)], ignore_index=True), extended_file)
+    assert load(extended_file, tables, warehouse_file)['loaded_records'] == 1
+    assert load(extended_file, tables, warehouse_file)['loaded_records'] == 0
+    assert fact_totals(warehouse_file)[0] == facts + 1
+
+def test_migration_rekeys_existing_facts(tables, tmp_path):
+    warehouse_file = tmp_path / 'warehouse.sqlite'
+    load(tables / 'analytics_ready.csv', tables, warehouse_file)
+
+    # Databáza verzie 2 so starými kľúčmi (TransactionID + poradie výskytu)
+    with sqlite3.connect(warehouse_file) as conn:
+        conn.execute("UPDATE SalesFact SET SourceRowKey = 'old#' || OrderItemID")
+        conn.execute("PRAGMA user_version = 2")
+
+    assert load(tables / 'analytics_ready.csv', tables, warehouse_file)['loaded_records'] == 0
+    with sqlite3.connect(warehouse_file) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == warehouse_loader.SCHEMA_VERSION
+        assert conn.execute("SELECT COUNT(*) FROM SalesFact WHERE SourceRowKey LIKE 'old#%'").fetchone()[0] == 0
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Príkazový riadok transformácie (transform_script_keboola.py) s rýchlym štartom.
+
+Pandas, numpy aj samotná transformácia sa importujú až pred prvým behom - --help,
+kontrola argumentov aj čakanie na prázdnu frontu sú bez nich. Režim serve drží
+interpreter aj načítané knižnice (a cache dátumov) medzi behmi a spracúva frontu
+vstupných súborov z adresára: každý *.csv sa spracuje do vlastného výstupného
+adresára a presunie do done/ (alebo failed/). Súbory treba do fronty presúvať
+atomicky (zápis pod iným názvom + rename), inak sa môže načítať rozpísaný súbor.
+
+Použitie:
+    python transform_cli.py run --input in.csv --output-dir out/ [--stages quality]
+    python transform_cli.py run --input in.csv --output-dir out/ --profile-startup
+    python transform_cli.py serve --queue-dir queue/ --output-dir out/ [--once]
+"""
+
+import argparse
+import importlib
+import os
+import shutil
+import sys
+import time
+
+_MODULE_START = time.perf_counter()
+
+# Kroky transformácie - ALL_STAGES z transform_script_keboola.py (tu bez importu pandas)
+STAGE_CHOICES = ['quality', 'clean', 'analytics']
+# Ťažké importy v poradí závislostí - v reporte štartu má každý vlastný čas
+HEAVY_MODULES = ['numpy', 'pandas', 'transform_script_keboola']
+
+def _process_age():
+    """Sekundy od štartu procesu (Linux /proc), None inde - pokrýva štart interpretera"""
+    try:
+        with open('/proc/self/stat', encoding='ascii') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime', encoding='ascii') as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    # starttime je 22. pole, za názvom procesu začínajú polia od 3.
+    return uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK')
+
+class StartupReport:
+    """Časy fáz štartu (interpreter, importy, prvý beh) pre --profile-startup"""
+
+    def __init__(self):
+        self.phases = []
+        age = _process_age()
+        if age is not None:
+            # Presnosť /proc je v stotinách sekundy
+            before_module = max(age - (time.perf_counter() - _MODULE_START), 0.0)
+            self.phases.append(('interpreter + import transform_cli', before_module))
+        self._last = _MODULE_START
+        self.mark('argumenty')
+
+    def mark(self, phase):
+        """Fáza od predchádzajúcej značky po teraz"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def print(self):
+        print(f"\n=== ŠTART ===")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<40}{seconds:>9.3f} s")
+        print(f"  {'spolu':<40}{sum(seconds for _, seconds in self.phases):>9.3f} s")
+
+def load_transform(report=None):
+    """Import transformácie až pri prvej potrebe; opakované volanie je zadarmo"""
+    module = None
+    for name in HEAVY_MODULES:
+        loaded = name in sys.modules
+        module = importlib.import_module(name)
+        if report is not None and not loaded:
+            report.mark(f'import {name}')
+    return module
+
+def _job_options(args):
+    """Nastavenia behu z argumentov - nezadané ostanú na predvolených hodnotách (env) transformácie"""
+    options = {
+        'files_dir': args.files_dir,
+        'stages': args.stages,
+        'chunk_size': args.chunk_size,
+        'workers': args.workers,
+        'columnar_format': args.columnar_format,
+        'profiler': args.profile,
+        'state_dir': getattr(args, 'state_dir', None),
+    }
+    options = {name: value for name, value in options.items() if value is not None}
+    if args.no_metrics:
+        options['metrics_enabled'] = False
+    return options
+
+def run(args):
+    report = StartupReport() if args.profile_startup else None
+    transform = load_transform(report)
+    options = _job_options(args)
+    # Bez --files-dir idú stĺpcové výstupy a profily k tabuľkám
+    options.setdefault('files_dir', args.output_dir)
+    transform.run_transformation(args.input or transform.INPUT_FILE, args.output_dir, **options)
+    if report is not None:
+        report.mark('beh transformácie')
+        report.print()
+
+def _queued_files(queue_dir):
+    return sorted(name for name in os.listdir(queue_dir)
+                  if name.endswith('.csv') and os.path.isfile(os.path.join(queue_dir, name)))
+
+def serve(args):
+    """Spracovanie fronty vstupných súborov v jednom procese s načítanými knižnicami"""
+    report = StartupReport() if args.profile_startup else None
+    done_dir = os.path.join(args.queue_dir, 'done')
+    failed_dir = os.path.join(args.queue_dir, 'failed')
+    os.makedirs(done_dir, exist_ok=True)
+    os.makedirs(failed_dir, exist_ok=True)
+
+    transform = load_transform(report)
+    if report is not None:
+        report.print()
+    options = _job_options(args)
+    # Stav inkrementálneho režimu patrí jednému vstupu - vo fronte sa nepoužíva ani z env
+    options['state_dir'] = ''
+    files_dir = options.pop('files_dir', None)
+
+    processed = failed = 0
+    while True:
+        queued = _queued_files(args.queue_dir)
+        if not queued:
+            if args.once:
+                break
+            time.sleep(args.poll_seconds)
+            continue
+
+        for name in queued:
+            input_file = os.path.join(args.queue_dir, name)
+            job_name = os.path.splitext(name)[0]
+            job_output = os.path.join(args.output_dir, job_name)
+            job_files = os.path.join(files_dir, job_name) if files_dir else job_output
+            start = time.perf_counter()
+            try:
+                transform.run_transformation(input_file, job_output, files_dir=job_files, **options)
+            except Exception as e:
+                # Chybný súbor nezastaví frontu - presunie sa do failed/ a pokračuje sa ďalším
+                failed += 1
+                print(f"Chyba pri spracovaní {name}: {e!r}", file=sys.stderr)
+                shutil.move(input_file, os.path.join(failed_dir, name))
+            else:
+                processed += 1
+                shutil.move(input_file, os.path.join(done_dir, name))
+                print(f"Spracovaný {name} za {time.perf_counter() - start:.2f} s -> {job_output}")
+
+    print(f"Fronta prázdna: spracovaných {processed}, chybných {failed}")
+
+def _add_job_arguments(parser):
+    parser.add_argument('--output-dir', required=True, help='adresár výstupných tabuliek')
+    parser.add_argument('--files-dir', help='adresár stĺpcových výstupov a profilov (predvolene --output-dir)')
+    parser.add_argument('--stages', nargs='+', choices=STAGE_CHOICES,
+                        help='len vybrané kroky (predvolene všetky alebo TRANSFORM_STAGES)')
+    parser.add_argument('--chunk-size', type=int, help='streamovací režim po chunkoch')
+    parser.add_argument('--workers', type=int, help='počet worker procesov')
+    parser.add_argument('--columnar-format', choices=['parquet', 'arrow'])
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], help='profil celého behu')
+    parser.add_argument('--no-metrics', action='store_true', help='nezapisovať transform_metrics')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='výpis času štartu interpretera, importov a prvého behu')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Transformácia transakcií (Keboola) z príkazového riadku')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='jeden beh transformácie')
+    run_parser.add_argument('--input', help='vstupné CSV (predvolene TRANSFORM_INPUT_FILE / Keboola cesta)')
+    run_parser.add_argument('--state-dir', help='inkrementálny režim so stavom v tomto adresári')
+    _add_job_arguments(run_parser)
+    run_parser.set_defaults(handler=run)
+
+    serve_parser = commands.add_parser('serve', help='spracovanie fronty vstupných súborov (teplý proces)')
+    serve_parser.add_argument('--queue-dir', required=True, help='adresár fronty (*.csv)')
+    serve_parser.add_argument('--poll-seconds', type=float, default=5.0, help='interval kontroly prázdnej fronty')
+    serve_parser.add_argument('--once', action='store_true', help='skončiť, keď je fronta prázdna')
+    _add_job_arguments(serve_parser)
+    serve_parser.set_defaults(handler=serve)
+
+    args = parser.parse_args(argv)
+    try:
+        args.handler(args)
+    except KeyboardInterrupt:
+        print("Prerušené", file=sys.stderr)
+        return 130
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
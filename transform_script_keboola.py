@@ -9,289 +9,1064 @@ import numpy as np
 import re
 from datetime import datetime
 import os
+import csv
+import heapq
+import tempfile
+import io
+import json
+import pickle
+import sqlite3
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
 
-# Nastavenie pandas options pre lepšie spracovanie
-pd.set_option('display.max_columns', None)
-pd.set_option('display.width', None)
+from analytics_rollups import ROLLUP_DIMENSIONS, ROLLUP_MEASURES, ROLLUP_TABLE_TYPES, RollupCube
 
-# Načítanie dát z Keboola input
-input_file = '/data/in/tables/csv_input.csv'
-df = pd.read_csv(input_file, dtype=str)  # Načítanie všetkých stĺpcov ako string
+try:
+    import resource
+except ImportError:  # Windows - bez merania RSS
+    resource = None
 
-print(f"Načítaných záznamov: {len(df)}")
-print(f"Stĺpcov: {len(df.columns)}")
+# Keboola input / output (mimo Keboola cez env premenné alebo transform_cli.py)
+INPUT_FILE = os.getenv('TRANSFORM_INPUT_FILE') or '/data/in/tables/csv_input.csv'
+OUTPUT_DIR = os.getenv('TRANSFORM_OUTPUT_DIR') or '/data/out/tables'
+FILES_OUTPUT_DIR = os.getenv('TRANSFORM_FILES_DIR') or '/data/out/files'
 
-# Konverzia numerických stĺpcov
-numeric_columns = ['Quantity', 'Price', 'TotalValue', 'PaymentAmount']
-for col in numeric_columns:
-    if col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+# Kroky transformácie a ich výstupné tabuľky:
+#   quality   - data_quality_issues, duplicate_transactions
+#   clean     - cleaned_transactions, validation_summary
+#   analytics - analytics_ready, analytics_rollups (čistenie beží aj bez kroku clean)
+ALL_STAGES = ['quality', 'clean', 'analytics']
+# Výber krokov (TRANSFORM_STAGES, napr. 'quality' alebo 'clean,analytics'), prázdne = všetky
+STAGES = [stage.strip() for stage in (os.getenv('TRANSFORM_STAGES') or '').split(',') if stage.strip()] or ALL_STAGES
+
+# Poradie výstupných tabuliek v súhrne
+OUTPUT_TABLES = ['data_quality_issues', 'cleaned_transactions', 'validation_summary', 'analytics_ready',
+                 'analytics_rollups', 'duplicate_transactions']
+
+# Parser vstupného CSV: 'pyarrow' (memory-mapped, viacvláknový), 'pandas', alebo 'auto' = pyarrow,
+# ak je nainštalovaný (pre komprimovaný vstup vždy pandas)
+CSV_ENGINE = (os.getenv('TRANSFORM_CSV_ENGINE') or 'auto').strip().lower()
+
+# Voliteľný stĺpcový výstup popri CSV: 'parquet' alebo 'arrow' (Arrow IPC stream), prázdne = len CSV
+COLUMNAR_FORMAT = (os.getenv('TRANSFORM_COLUMNAR_FORMAT') or '').strip().lower()
+COLUMNAR_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrows'}
+
+# Veľkosť chunku pre streamovací režim (0 = celý súbor naraz v pamäti)
+CHUNK_SIZE = int(os.getenv('TRANSFORM_CHUNK_SIZE') or 0)
+
+# Počet worker procesov (1 = sériové spracovanie)
+WORKERS = int(os.getenv('TRANSFORM_WORKERS') or 1)
+# Veľkosť partície pri paralelnom režime, ak nie je nastavený TRANSFORM_CHUNK_SIZE
+PARALLEL_CHUNK_SIZE = 100_000
+
+# Adresár so stavom inkrementálneho režimu (prázdne = plné spracovanie pri každom behu)
+STATE_DIR = os.getenv('TRANSFORM_STATE_DIR') or ''
+
+# Stĺpce s UUID - voliteľne ako pyarrow string (TRANSFORM_ARROW_STRINGS=1)
+ARROW_STRINGS = os.getenv('TRANSFORM_ARROW_STRINGS') == '1'
+
+# Výpis pamäte stĺpcov pred / po typovaní (TRANSFORM_MEMORY_REPORT=0 vypne)
+MEMORY_REPORT = os.getenv('TRANSFORM_MEMORY_REPORT', '1') != '0'
+
+# Tabuľka metrík krokov transform_metrics (TRANSFORM_METRICS=0 vypne)
+METRICS_ENABLED = os.getenv('TRANSFORM_METRICS', '1') != '0'
+
+# Profilovanie celého behu: 'cprofile' alebo 'pyinstrument', výstup do FILES_OUTPUT_DIR
+PROFILER = (os.getenv('TRANSFORM_PROFILE') or '').strip().lower()
+PROFILE_FILES = {'cprofile': 'transform_profile.prof', 'pyinstrument': 'transform_profile.html'}
 
 # =====================================================
-# 1. ANALÝZA PROBLÉMOV
+# 0. TYPOVÁ SCHÉMA
 # =====================================================
 
-def analyze_data_quality(df):
-    """Analýza kvality dát"""
-    issues = []
-    total_records = len(df)
-    
-    # Chýbajúce kategórie
-    missing_category = df['Category'].isna().sum() + (df['Category'] == '').sum()
-    issues.append({
-        'issue_type': 'Missing Category',
-        'issue_count': missing_category,
-        'percentage': round(missing_category * 100.0 / total_records, 2)
+# Typy stĺpcov vstupu aj výstupov - enum stĺpce ako category, príznaky int8,
+# čísla ako nullable Float64, UUID ako string (voliteľne pyarrow)
+_RAW_TRANSACTION_TYPES = {
+    'TransactionID': 'uuid',
+    'Category': 'category',
+    'Product': 'category',
+    'TransactionDate': 'string',
+    'Quantity': 'Float64',
+    'Price': 'Float64',
+    'TotalValue': 'Float64',
+    'CustomerID': 'uuid',
+    'PaymentMethod': 'category',
+    'ShippingAddress': 'string',
+    'Email': 'string',
+    'OrderStatus': 'category',
+    'DiscountCode': 'string',
+    'PaymentAmount': 'Float64',
+}
+
+TABLE_SCHEMAS = {
+    # Email_Was_Invalid je vo vstupe len keď sa namiesto Emailu načíta iba príznak (krok analytics)
+    'csv_input': {**_RAW_TRANSACTION_TYPES, 'Email_Was_Invalid': 'int8'},
+    'cleaned_transactions': {
+        **_RAW_TRANSACTION_TYPES,
+        'Category_Was_Fixed': 'int8',
+        'Product_Was_Fixed': 'int8',
+        'Date_Was_Missing': 'int8',
+        'Email_Was_Invalid': 'int8',
+        'Price_Was_Fixed': 'int8',
+        'Category_Clean': 'category',
+        'Product_Clean': 'category',
+        'TransactionDate_Clean': 'datetime64[ns]',
+        'Price_Clean': 'Float64',
+        'PaymentMethod_Clean': 'category',
+        'ShippingAddress_Clean': 'string',
+        'Email_Clean': 'string',
+        'OrderStatus_Clean': 'category',
+        'PaymentAmount_Clean': 'Float64',
+    },
+    'analytics_ready': {
+        **_RAW_TRANSACTION_TYPES,
+        'TransactionDate': 'datetime64[ns]',
+        'Transaction_Year': 'int16',
+        'Transaction_Month': 'int8',
+        'Transaction_Quarter': 'int8',
+        'Had_Discount': 'int8',
+        'Transaction_Value_Category': 'category',
+        'Had_Data_Quality_Issues': 'int8',
+    },
+    'data_quality_issues': {
+        'issue_type': 'string',
+        'issue_count': 'int64',
+        'percentage': 'float64',
+    },
+    'validation_summary': {
+        'metric': 'string',
+        'count': 'int64',
+    },
+    'analytics_rollups': ROLLUP_TABLE_TYPES,
+    'duplicate_transactions': {
+        'duplicate_type': 'category',
+        'input_row': 'int64',
+        'TransactionID': 'uuid',
+        'original_input_row': 'int64',
+        'original_TransactionID': 'uuid',
+        'CustomerID': 'uuid',
+        'Product': 'category',
+        'TotalValue': 'Float64',
+        'TransactionDate_Clean': 'datetime64[ns]',
+    },
+    'transform_metrics': {
+        'stage': 'string',
+        'calls': 'int64',
+        'rows': 'int64',
+        'wall_seconds': 'float64',
+        'cpu_seconds': 'float64',
+        'rows_per_second': 'float64',
+        'peak_rss_delta_mb': 'float64',
+    },
+}
+
+def _is_text_dtype(dtype):
+    return pd.api.types.is_string_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype)
+
+def apply_table_schema(df, table_name):
+    """
+    Pretypovanie tabuľky podľa TABLE_SCHEMAS (funguje aj na stringy načítané z CSV).
+    Stĺpce, ktoré už majú správny typ, sa nekopírujú.
+    """
+    schema = TABLE_SCHEMAS.get(table_name, {})
+    typed = {}
+    for col in df.columns:
+        column = df[col]
+        dtype = schema.get(col, 'string')
+        if dtype == 'uuid':
+            dtype = 'string[pyarrow]' if ARROW_STRINGS else 'string'
+        
+        if dtype == 'string' and _is_text_dtype(column.dtype):
+            typed[col] = column
+        elif str(column.dtype) == dtype:
+            typed[col] = column
+        elif dtype.startswith('datetime64'):
+            typed[col] = pd.to_datetime(column).astype(dtype)
+        elif dtype.lower().startswith(('int', 'float')):
+            typed[col] = pd.to_numeric(column, errors='coerce').astype(dtype)
+        else:
+            typed[col] = column.astype(dtype)
+    return pd.DataFrame(typed, index=df.index)
+
+def apply_input_types(df):
+    """Typovanie vstupnej tabuľky (numerické stĺpce, UUID, enum stĺpce)"""
+    return apply_table_schema(df, 'csv_input')
+
+def _float(column):
+    """Numerický stĺpec ako float64 s NaN - na výpočty v np.select"""
+    return pd.to_numeric(column, errors='coerce').astype('float64')
+
+def _legacy_column(column):
+    """Stĺpec v pôvodnej reprezentácii (object stringy, int64 príznaky, float64)"""
+    if isinstance(column.dtype, pd.CategoricalDtype) or _is_text_dtype(column.dtype):
+        return column.astype(object)
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return column.astype('int64')
+    if pd.api.types.is_float_dtype(column.dtype):
+        return column.astype('float64')
+    return column
+
+def memory_report(df):
+    """Pamäť po stĺpcoch (bajty) - pôvodná reprezentácia vs. typovaná"""
+    rows = [
+        {
+            'column': col,
+            'dtype': str(df[col].dtype),
+            'bytes_before': _legacy_column(df[col]).memory_usage(index=False, deep=True),
+            'bytes_after': df[col].memory_usage(index=False, deep=True),
+        }
+        for col in df.columns
+    ]
+    report = pd.DataFrame(rows)
+    total = {'column': 'SPOLU', 'dtype': '', 'bytes_before': report['bytes_before'].sum(),
+             'bytes_after': report['bytes_after'].sum()}
+    return pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+
+def print_memory_report(table_name, df):
+    report = memory_report(df)
+    total = report.iloc[-1]
+    print(f"\nPamäť {table_name}: {total['bytes_before'] / 1024 / 1024:.2f} MB -> "
+          f"{total['bytes_after'] / 1024 / 1024:.2f} MB")
+    print(report.to_string(index=False))
+
+# =====================================================
+# 0a. NAČÍTANIE VSTUPU
+# =====================================================
+
+# Hodnoty chápané ako chýbajúce - predvolené na_values z pd.read_csv (rovnaké pre oba parsery)
+CSV_NULL_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                   '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+COMPRESSED_EXTENSIONS = ('.gz', '.bz2', '.zip', '.xz', '.zst')
+
+# Neplatné hodnoty Emailu zo zdrojového systému
+INVALID_EMAIL_VALUES = ['invalid_email', 'not_an_email']
+
+# Stĺpce, ktoré krok analytics nepotrebuje - bez krokov quality a clean sa do pandas nenačítajú.
+# Z Emailu stačí príznak Email_Was_Invalid, vypočíta sa priamo z naparsovaného stĺpca.
+ANALYTICS_UNUSED_COLUMNS = ['ShippingAddress', 'Email']
+
+def input_projection(stages):
+    """Projekcia vstupu pre kroky: (stĺpce, email_flag) - None = všetky stĺpce"""
+    if 'quality' in stages or 'clean' in stages:
+        return None, False
+    return [col for col in _RAW_TRANSACTION_TYPES if col not in ANALYTICS_UNUSED_COLUMNS], True
+
+def email_flags(email):
+    """(email chýba alebo je placeholder, email bez @) - neplatný je email s ktorýmkoľvek z nich"""
+    not_provided = email.isna() | email.isin(INVALID_EMAIL_VALUES)
+    bad_format = ~not_provided & ~email.astype(str).str.contains('@', regex=False)
+    return not_provided, bad_format
+
+def read_input(input_file, usecols=None, chunksize=None, email_flag=False, engine=None):
+    """
+    Načítanie vstupu - celý frame, alebo pri chunksize iterátor frame-ov po chunksize riadkoch
+    (index pokračuje naprieč chunkami). usecols = projekcia stĺpcov, email_flag = namiesto
+    stĺpca Email len príznak Email_Was_Invalid. Enum stĺpce sa parsujú rovno do category,
+    ostatné ako string; numerické stĺpce a UUID dotypuje apply_input_types (aj po chunkoch).
+    """
+    engine = engine or CSV_ENGINE
+    if engine == 'auto':
+        compressed = input_file.lower().endswith(COMPRESSED_EXTENSIONS)
+        engine = 'pyarrow' if not compressed and _arrow_csv_available() else 'pandas'
+    if engine == 'pyarrow':
+        return _read_input_arrow(input_file, usecols, chunksize, email_flag)
+    if engine == 'pandas':
+        return _read_input_pandas(input_file, usecols, chunksize, email_flag)
+    raise ValueError(f"Nepodporovaný TRANSFORM_CSV_ENGINE: {engine}")
+
+def _with_email_flag(df):
+    not_provided, bad_format = email_flags(df['Email'])
+    df['Email_Was_Invalid'] = (not_provided | bad_format).astype('int8')
+    return df.drop(columns='Email')
+
+def _read_input_pandas(input_file, usecols, chunksize, email_flag):
+    dtypes = defaultdict(lambda: str, {
+        col: 'category' for col, dtype in TABLE_SCHEMAS['csv_input'].items() if dtype == 'category'
     })
+    if usecols is not None and email_flag:
+        usecols = list(usecols) + ['Email']
+    frames = pd.read_csv(input_file, dtype=dtypes, usecols=usecols, chunksize=chunksize)
+    if not email_flag:
+        return frames
+    if chunksize is None:
+        return _with_email_flag(frames)
+    return (_with_email_flag(chunk) for chunk in frames)
+
+def _arrow_csv_available():
+    try:
+        import pyarrow.csv
+    except ImportError:
+        return False
+    return True
+
+def _arrow_read_options(input_file, usecols, email_flag):
+    """Voľby pyarrow CSV: projekcia stĺpcov, category ako slovník, ostatné string, nové riadky v úvodzovkách"""
+    pa = _import_pyarrow()
+    # utf-8-sig - BOM na začiatku súboru nie je súčasť názvu prvého stĺpca (pyarrow ho tiež preskočí)
+    with open(input_file, newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), [])
+    if usecols is not None:
+        missing = set(usecols) - set(header)
+        if missing:
+            raise ValueError(f"Stĺpce {sorted(missing)} vo vstupe {input_file} nie sú")
+        wanted = set(usecols) | ({'Email'} if email_flag else set())
+        header = [col for col in header if col in wanted]
+    schema = TABLE_SCHEMAS['csv_input']
+    column_types = {col: pa.dictionary(pa.int32(), pa.string()) if schema.get(col) == 'category' else pa.string()
+                    for col in header}
+    return (pa.csv.ReadOptions(use_threads=True),
+            pa.csv.ParseOptions(newlines_in_values=True),
+            pa.csv.ConvertOptions(include_columns=header, column_types=column_types, null_values=CSV_NULL_VALUES,
+                                  strings_can_be_null=True, quoted_strings_can_be_null=True))
+
+def _arrow_frame(table, start, email_flag):
+    """
+    Arrow tabuľka -> pandas: Email sa zredukuje na príznak, numerické stĺpce sa pretypujú
+    v Arrow (nečíselné hodnoty dotypuje apply_input_types), kategórie zoradené ako z pd.read_csv.
+    """
+    pa = _import_pyarrow()
+    pc = pa.compute
+    if email_flag:
+        email = table['Email']
+        valid = pc.and_kleene(pc.invert(pc.is_in(email, value_set=pa.array(INVALID_EMAIL_VALUES))),
+                              pc.match_substring(email, '@'))
+        table = table.drop_columns(['Email']).append_column(
+            'Email_Was_Invalid', pc.cast(pc.invert(pc.fill_null(valid, False)), pa.int8()))
+    for i, name in enumerate(table.column_names):
+        if TABLE_SCHEMAS['csv_input'].get(name) == 'Float64':
+            try:
+                table = table.set_column(i, name, pc.cast(table[name], pa.float64()))
+            except pa.ArrowInvalid:
+                pass
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    df.index = pd.RangeIndex(start, start + len(df))
+    return df
+
+def _read_input_arrow(input_file, usecols, chunksize, email_flag):
+    pa = _import_pyarrow()
+    options = _arrow_read_options(input_file, usecols, email_flag)
+    if chunksize is None:
+        with pa.memory_map(input_file, 'r') as source:
+            table = pa.csv.read_csv(source, *options)
+        return _arrow_frame(table, 0, email_flag)
+    return _read_input_arrow_chunks(input_file, options, chunksize, email_flag)
+
+def _read_input_arrow_chunks(input_file, options, chunksize, email_flag):
+    """Streamované čítanie po blokoch parsera, preskladané do chunkov po chunksize riadkoch"""
+    pa = _import_pyarrow()
+    start = 0
+    pending = []
+    pending_rows = 0
+    with pa.memory_map(input_file, 'r') as source:
+        reader = pa.csv.open_csv(source, *options)
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            while pending_rows >= chunksize:
+                table = pa.Table.from_batches(pending, schema=reader.schema)
+                yield _arrow_frame(table.slice(0, chunksize), start, email_flag)
+                start += chunksize
+                rest = table.slice(chunksize)
+                pending = rest.to_batches()
+                pending_rows = rest.num_rows
+        if pending_rows:
+            yield _arrow_frame(pa.Table.from_batches(pending, schema=reader.schema), start, email_flag)
+
+# =====================================================
+# 0b. METRIKY BEHU A PROFILOVANIE
+# =====================================================
+
+def _peak_rss_bytes():
+    """Doterajšia špička RSS procesu (ru_maxrss je na Linuxe v KB, na macOS v bajtoch)"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class StageMetrics:
+    """
+    Wall / CPU čas, počet riadkov a nárast špičky RSS pre pomenované kroky.
+    Opakovaný krok (napr. v každom chunku) sa sčítava, vnorené kroky majú
+    názov s bodkou (clean_data.dates). Nárast RSS je posun špičky procesu
+    počas kroku - nenulový len pri kroku, ktorý špičku zvýšil.
+    """
     
-    # Chýbajúce produkty
-    missing_product = df['Product'].isna().sum() + (df['Product'] == '').sum()
-    issues.append({
-        'issue_type': 'Missing Product',
-        'issue_count': missing_product,
-        'percentage': round(missing_product * 100.0 / total_records, 2)
-    })
+    def __init__(self):
+        self._stages = {}
     
-    # Chýbajúce dátumy
-    missing_date = df['TransactionDate'].isna().sum() + (df['TransactionDate'] == '').sum()
-    issues.append({
-        'issue_type': 'Missing Transaction Date',
-        'issue_count': missing_date,
-        'percentage': round(missing_date * 100.0 / total_records, 2)
-    })
+    @contextmanager
+    def stage(self, name, rows=0):
+        """Meranie bloku kódu; počet riadkov sa dá doplniť cez vrátený dict (record['rows'] = ...)"""
+        record = {'rows': rows}
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        rss_start = _peak_rss_bytes()
+        try:
+            yield record
+        finally:
+            self.add(name, time.perf_counter() - wall_start, time.process_time() - cpu_start,
+                     record['rows'], _peak_rss_bytes() - rss_start)
     
-    # Neplatné emaily
-    invalid_emails = ((df['Email'] == 'invalid_email') | 
-                     (df['Email'] == 'not_an_email') | 
-                     df['Email'].isna()).sum()
-    issues.append({
-        'issue_type': 'Invalid Email Addresses',
-        'issue_count': invalid_emails,
-        'percentage': round(invalid_emails * 100.0 / total_records, 2)
-    })
+    def add(self, name, wall_seconds, cpu_seconds, rows=0, peak_rss_delta=0, calls=1):
+        stage = self._stages.setdefault(name, {'calls': 0, 'rows': 0, 'wall_seconds': 0.0,
+                                               'cpu_seconds': 0.0, 'peak_rss_delta': 0})
+        stage['calls'] += calls
+        stage['rows'] += rows
+        stage['wall_seconds'] += wall_seconds
+        stage['cpu_seconds'] += cpu_seconds
+        stage['peak_rss_delta'] = max(stage['peak_rss_delta'], peak_rss_delta)
     
-    # Chýbajúce adresy
-    missing_address = df['ShippingAddress'].isna().sum() + (df['ShippingAddress'] == '').sum()
-    issues.append({
-        'issue_type': 'Missing Shipping Address',
-        'issue_count': missing_address,
-        'percentage': round(missing_address * 100.0 / total_records, 2)
-    })
+    def merge(self, other):
+        """Pripočítanie metrík z iného chunku / worker procesu"""
+        for name, stage in other._stages.items():
+            self.add(name, stage['wall_seconds'], stage['cpu_seconds'], stage['rows'],
+                     stage['peak_rss_delta'], stage['calls'])
+        return self
     
-    # Chýbajúce payment methods
-    missing_payment = df['PaymentMethod'].isna().sum() + (df['PaymentMethod'] == '').sum()
-    issues.append({
-        'issue_type': 'Missing Payment Method',
-        'issue_count': missing_payment,
-        'percentage': round(missing_payment * 100.0 / total_records, 2)
-    })
+    def table(self):
+        rows = [
+            {
+                'stage': name,
+                'calls': stage['calls'],
+                'rows': stage['rows'],
+                'wall_seconds': round(stage['wall_seconds'], 4),
+                'cpu_seconds': round(stage['cpu_seconds'], 4),
+                'rows_per_second': (round(stage['rows'] / stage['wall_seconds'])
+                                    if stage['rows'] and stage['wall_seconds'] else None),
+                'peak_rss_delta_mb': round(stage['peak_rss_delta'] / 1024 / 1024, 2),
+            }
+            for name, stage in self._stages.items()
+        ]
+        return apply_table_schema(pd.DataFrame(rows, columns=list(TABLE_SCHEMAS['transform_metrics'])),
+                                  'transform_metrics')
+
+def write_metrics_table(metrics, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    table = metrics.table()
+    table.to_csv(output_path(output_dir, 'transform_metrics'), index=False)
+    print(f"\n=== METRIKY KROKOV ===")
+    print(table.to_string(index=False))
+
+@contextmanager
+def profile_run(profiler, files_dir):
+    """
+    Voliteľný profil celého behu do files_dir. cProfile zapíše .prof (pre snakeviz / pstats)
+    a textový výpis top funkcií, pyinstrument HTML. Worker procesy sa neprofilujú.
+    """
+    if not profiler:
+        yield
+        return
+    if profiler not in PROFILE_FILES:
+        raise ValueError(f"Nepodporovaný TRANSFORM_PROFILE: {profiler}")
     
-    # Chýbajúce ceny
-    missing_price = df['Price'].isna().sum()
-    issues.append({
-        'issue_type': 'Missing Price',
-        'issue_count': missing_price,
-        'percentage': round(missing_price * 100.0 / total_records, 2)
-    })
+    os.makedirs(files_dir, exist_ok=True)
+    profile_file = os.path.join(files_dir, PROFILE_FILES[profiler])
+    if profiler == 'cprofile':
+        import cProfile
+        import pstats
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+        try:
+            yield
+        finally:
+            cprofile.disable()
+            cprofile.dump_stats(profile_file)
+            with open(os.path.splitext(profile_file)[0] + '.txt', 'w', encoding='utf-8') as out:
+                pstats.Stats(cprofile, stream=out).sort_stats('cumulative').print_stats(50)
+    else:
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise ImportError("TRANSFORM_PROFILE=pyinstrument vyžaduje balík pyinstrument "
+                              "(pip install pyinstrument)") from e
+        sampler = Profiler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            with open(profile_file, 'w', encoding='utf-8') as out:
+                out.write(sampler.output_html())
+
+# =====================================================
+# 1. ANALÝZA PROBLÉMOV
+# =====================================================
+
+def _missing(column):
+    return column.isna() | (column == '')
+
+def _invalid_email(email):
+    return email.isna() | email.isin(INVALID_EMAIL_VALUES)
+
+def _negative(column):
+    return _float(column) < 0
+
+def _total_value_mismatch(quantity, price, total_value):
+    # TotalValue sa líši od Quantity × Price o viac ako cent (len ak sú známe všetky tri)
+    return (_float(total_value) - _float(quantity) * _float(price)).abs() > 0.01
+
+# Pravidlá kvality dát po riadkoch: (typ problému, stĺpce, predikát nad stĺpcami).
+# Nové pravidlo = nový riadok tu. Každý predikát vektorovo prejde len svoje stĺpce,
+# príznaky idú do jednej matice a počty sa sčítajú jednou redukciou.
+DATA_QUALITY_RULES = [
+    ('Missing Category', ['Category'], _missing),
+    ('Missing Product', ['Product'], _missing),
+    ('Missing Transaction Date', ['TransactionDate'], _missing),
+    ('Invalid Email Addresses', ['Email'], _invalid_email),
+    ('Missing Shipping Address', ['ShippingAddress'], _missing),
+    ('Missing Payment Method', ['PaymentMethod'], _missing),
+    ('Missing Price', ['Price'], lambda price: price.isna()),
+    ('Negative Quantity', ['Quantity'], _negative),
+    ('TotalValue Mismatch', ['Quantity', 'Price', 'TotalValue'], _total_value_mismatch),
+]
+
+# Pravidlo nad celou tabuľkou - opakované TransactionID (každý výskyt okrem prvého)
+DUPLICATE_TRANSACTION_ISSUE = 'Duplicate TransactionID'
+
+def data_quality_issue_matrix(df):
+    """Príznaky všetkých pravidiel naraz - matica riadky × DATA_QUALITY_RULES"""
+    matrix = np.empty((len(df), len(DATA_QUALITY_RULES)), dtype=bool)
+    for i, (_, columns, predicate) in enumerate(DATA_QUALITY_RULES):
+        matrix[:, i] = np.asarray(predicate(*(df[col] for col in columns)), dtype=bool)
+    return matrix
+
+class DataQualityProfile:
+    """
+    Profil kvality dát - všetky pravidlá sa vyhodnotia do jednej matice príznakov chunku
+    a počty sa sčítajú jednou redukciou. Profily chunkov sa dajú zlučovať (merge).
+    Duplicity nie sú vlastnosťou chunku - ich počty sa doplnia z tabuľky duplicít.
+    """
+    
+    def __init__(self):
+        self.total_records = 0
+        self.rule_counts = np.zeros(len(DATA_QUALITY_RULES), dtype=np.int64)
+        self.duplicate_counts = {issue_type: np.int64(0) for issue_type in DUPLICATE_ISSUES}
     
+    def update(self, df):
+        self.total_records += len(df)
+        self.rule_counts += data_quality_issue_matrix(df).sum(axis=0)
+        return self
+    
+    def merge(self, other):
+        self.total_records += other.total_records
+        self.rule_counts += other.rule_counts
+        return self
+    
+    def add_duplicates(self, duplicates):
+        """Počty duplicít z tabuľky duplicate_transactions celého vstupu"""
+        counts = duplicates['duplicate_type'].value_counts()
+        self.duplicate_counts = {issue_type: np.int64(counts.get(issue_type, 0)) for issue_type in DUPLICATE_ISSUES}
+        return self
+    
+    @property
+    def issue_counts(self):
+        issue_counts = {issue_type: count for (issue_type, _, _), count in zip(DATA_QUALITY_RULES, self.rule_counts)}
+        issue_counts.update(self.duplicate_counts)
+        return issue_counts
+    
+    def table(self):
+        return build_quality_issues_table(self.issue_counts, self.total_records)
+
+def build_quality_issues_table(issue_counts, total_records):
+    """Tabuľka problémov s percentami z celkového počtu záznamov"""
+    issues = [
+        {
+            'issue_type': issue_type,
+            'issue_count': issue_count,
+            'percentage': round(issue_count * 100.0 / total_records, 2)
+        }
+        for issue_type, issue_count in issue_counts.items()
+    ]
     return pd.DataFrame(issues).sort_values('issue_count', ascending=False)
 
-# Vytvorenie tabuľky s problémami
-quality_issues = analyze_data_quality(df)
-print("\nIdentifikované problémy:")
-print(quality_issues)
+def analyze_data_quality(df, duplicates=None):
+    """Analýza kvality dát (bez tabuľky duplicít sa duplicity hľadajú v df)"""
+    duplicates = find_duplicates(duplicate_keys(df)) if duplicates is None else duplicates
+    return DataQualityProfile().update(df).add_duplicates(duplicates).table()
+
+# =====================================================
+# 1b. DUPLICITNÉ TRANSAKCIE
+# =====================================================
+
+# Rovnaký zákazník, produkt a suma v rovnakom dni pod iným TransactionID (replay exportu)
+NEAR_DUPLICATE_ISSUE = 'Near-duplicate Transaction'
+DUPLICATE_ISSUES = [DUPLICATE_TRANSACTION_ISSUE, NEAR_DUPLICATE_ISSUE]
+
+# Blok takmer-duplicít: CustomerID + dátum zaokrúhlený na tento interval (pandas frequency)
+NEAR_DUPLICATE_BUCKET = 'D'
+
+# Počet partícií indexu duplicít na disku v streamovacom režime (v pamäti je naraz jedna)
+DEDUP_PARTITIONS = int(os.getenv('TRANSFORM_DEDUP_PARTITIONS') or 16)
+
+DUPLICATE_TABLE_COLUMNS = ['duplicate_type', 'input_row', 'TransactionID', 'original_input_row',
+                           'original_TransactionID', 'CustomerID', 'Product', 'TotalValue',
+                           'TransactionDate_Clean']
+
+def duplicate_keys(df):
+    """
+    Kľúče pre hľadanie duplicít (input_row = index riadku vo vstupe, aj pri chunkoch):
+    exact_key je hash TransactionID, near_key hash bloku CustomerID + dátum spolu
+    s produktom a sumou v centoch. Bez niektorej časti bloku near_key chýba.
+    """
+    dates, _ = normalize_dates(df['TransactionDate'])
+    near = pd.DataFrame({
+        'CustomerID': df['CustomerID'].astype(object),
+        'bucket': dates.dt.floor(NEAR_DUPLICATE_BUCKET),
+        'Product': df['Product'].astype(object),
+        'cents': (_float(df['TotalValue']) * 100).round(),
+    }, index=df.index)
+    near_key = pd.Series(pd.util.hash_pandas_object(near, index=False).to_numpy().view('int64'),
+                         index=df.index, dtype='Int64')
+    return pd.DataFrame({
+        'input_row': df.index.to_numpy(dtype=np.int64),
+        'exact_key': pd.util.hash_array(df['TransactionID'].to_numpy(dtype=object)).view('int64'),
+        'near_key': near_key.where(near.notna().all(axis=1)),
+        'TransactionID': df['TransactionID'],
+        'CustomerID': df['CustomerID'],
+        'Product': df['Product'],
+        'TotalValue': df['TotalValue'],
+        'TransactionDate_Clean': dates,
+    }, index=df.index)
+
+def _repeated_keys(keys, key_column, duplicate_type):
+    """Riadky, ktorých kľúč sa vo vstupe už vyskytol, s odkazom na prvý výskyt"""
+    keys = keys.sort_values('input_row', kind='mergesort')
+    repeated = keys[key_column].duplicated()
+    originals = keys.loc[~repeated, [key_column, 'input_row', 'TransactionID']].rename(
+        columns={'input_row': 'original_input_row', 'TransactionID': 'original_TransactionID'})
+    duplicates = keys[repeated].merge(originals, on=key_column, how='left')
+    duplicates.insert(0, 'duplicate_type', duplicate_type)
+    return duplicates[DUPLICATE_TABLE_COLUMNS]
+
+def _exact_duplicates(keys):
+    return _repeated_keys(keys, 'exact_key', DUPLICATE_TRANSACTION_ISSUE)
+
+def _near_duplicates(keys, exact_duplicate_rows):
+    """Takmer-duplicity - porovnávajú sa len riadky v rovnakom bloku, presné duplicity sa vynechajú"""
+    candidates = keys[keys['near_key'].notna() & ~keys['input_row'].isin(exact_duplicate_rows)]
+    return _repeated_keys(candidates, 'near_key', NEAR_DUPLICATE_ISSUE)
+
+def _duplicate_table(parts):
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        table = pd.DataFrame({column: pd.Series(dtype=object) for column in DUPLICATE_TABLE_COLUMNS})
+    else:
+        table = pd.concat(parts, ignore_index=True).sort_values('input_row', kind='mergesort')
+    return apply_table_schema(table.reset_index(drop=True), 'duplicate_transactions')
+
+def find_duplicates(keys):
+    """Tabuľka duplicate_transactions z kľúčov celého vstupu (duplicate_keys)"""
+    exact = _exact_duplicates(keys)
+    return _duplicate_table([exact, _near_duplicates(keys, exact['input_row'])])
+
+class DuplicateIndex:
+    """
+    Hash index duplicít pre vstup po chunkoch. Kľúče chunkov sa rozdelia podľa hashu
+    do partícií na disku (presné kľúče a bloky takmer-duplicít zvlášť) - všetky výskyty
+    kľúča sú v jednej partícii, takže sa duplicity hľadajú po partíciách
+    a v pamäti je naraz len jedna.
+    """
+    
+    def __init__(self, spill_dir, partitions=DEDUP_PARTITIONS):
+        self.spill_dir = spill_dir
+        self.partitions = partitions
+    
+    def _path(self, kind, partition):
+        return os.path.join(self.spill_dir, f'duplicate_keys_{kind}_{partition:03d}.pkl')
+    
+    def add(self, keys):
+        # Časť chunku sa do partície pripíše ako ďalší pickle (binárne, typy ostanú zachované)
+        for kind, key_column in (('exact', 'exact_key'), ('near', 'near_key')):
+            kind_keys = keys[keys[key_column].notna()]
+            partition = kind_keys[key_column].to_numpy(dtype=np.int64) % self.partitions
+            for index, part in kind_keys.groupby(partition, sort=False):
+                with open(self._path(kind, index), 'ab') as spill:
+                    pickle.dump(part, spill, protocol=pickle.HIGHEST_PROTOCOL)
+        return self
+    
+    def _partitions(self, kind):
+        for index in range(self.partitions):
+            path = self._path(kind, index)
+            if not os.path.exists(path):
+                continue
+            parts = []
+            with open(path, 'rb') as spill:
+                while True:
+                    try:
+                        parts.append(pickle.load(spill))
+                    except EOFError:
+                        break
+            yield pd.concat(parts, ignore_index=True)
+    
+    def duplicates(self):
+        """Tabuľka duplicate_transactions všetkých pridaných chunkov"""
+        exact = [_exact_duplicates(keys) for keys in self._partitions('exact')]
+        exact_rows = pd.concat([part['input_row'] for part in exact] + [pd.Series(dtype='int64')])
+        near = [_near_duplicates(keys, exact_rows) for keys in self._partitions('near')]
+        return _duplicate_table(exact + near)
 
 # =====================================================
 # 2. ČISTENIE DÁT
 # =====================================================
 
-def clean_data(df):
-    """Hlavná funkcia na čistenie dát"""
+# Pravidlá pre doplnenie kategórie podľa názvu produktu - z konfiguračného súboru
+# (TRANSFORM_CATEGORY_RULES, predvolene category_rules.json vedľa scriptu)
+CATEGORY_RULES_FILE = (os.getenv('TRANSFORM_CATEGORY_RULES') or
+                       os.path.join(os.path.dirname(os.path.abspath(__file__)), 'category_rules.json'))
+
+# Vstavané pravidlá, ak konfiguračný súbor nie je nasadený (napr. script vložený priamo v Keboole)
+DEFAULT_CATEGORY_RULES = {
+    'default_category': 'Uncategorized',
+    'learn_from_data': True,
+    'learn_min_share': 0.8,
+    'rules': [
+        {'category': 'Electronics', 'priority': 80, 'keywords': ['LAPTOP', 'SMARTPHONE', 'HEADPHONES']},
+        {'category': 'Sports', 'priority': 70, 'keywords': ['DUMBBELLS', 'YOGA']},
+        {'category': 'Home & Garden', 'priority': 60, 'keywords': ['SOFA', 'BLENDER']},
+        {'category': 'Toys', 'priority': 50, 'keywords': ['BOARD GAME', 'ACTION FIGURE']},
+        {'category': 'Beauty', 'priority': 40, 'keywords': ['PERFUME', 'SHAMPOO', 'FACE CREAM']},
+        {'category': 'Books', 'priority': 30, 'keywords': ['COOKBOOK']},
+        {'category': 'Health', 'priority': 20, 'keywords': ['THERMOMETER', 'VITAMINS']},
+        {'category': 'Fashion', 'priority': 10, 'keywords': ['JACKET']},
+    ],
+}
+
+def load_category_rules(path=CATEGORY_RULES_FILE):
+    """Konfigurácia pravidiel kategórií; chýbajúce kľúče doplní z DEFAULT_CATEGORY_RULES"""
+    if not os.path.exists(path):
+        return dict(DEFAULT_CATEGORY_RULES)
+    with open(path, encoding='utf-8') as f:
+        return {**DEFAULT_CATEGORY_RULES, **json.load(f)}
+
+class CategoryMatcher:
+    """
+    Odvodenie kategórie z názvu produktu. Poradie: naučené mapovanie Product -> Category
+    (z riadkov, kde kategória je), potom pravidlá s kľúčovými slovami, potom predvolená kategória.
+    Všetky kľúčové slová sú skompilované do jedného regexu; výsledok sa pamätá pre každý
+    unikátny názov produktu, takže cena je O(unikátne produkty), nie O(riadky).
+    """
+
+    def __init__(self, config, learned=None):
+        self.default_category = config['default_category']
+        self.learned = dict(learned or {})
+        # Poradie pravidiel: vyššia priorita vyhráva, pri zhode skoršie pravidlo v konfigurácii
+        rules = sorted(enumerate(config['rules']), key=lambda item: (-item[1]['priority'], item[0]))
+        self.categories = [rule['category'] for _, rule in rules]
+        keyword_rank = {}
+        for rank, (_, rule) in enumerate(rules):
+            for keyword in rule['keywords']:
+                keyword_rank.setdefault(keyword.upper(), rank)
+        # Nájdené kľúčové slovo zahŕňa aj všetky kratšie kľúčové slová, ktoré obsahuje
+        self._keyword_rank = {
+            keyword: min(rank for other, rank in keyword_rank.items() if other in keyword)
+            for keyword in keyword_rank
+        }
+        # Lookahead nájde na každej pozícii najdlhšie kľúčové slovo (aj prekrývajúce sa výskyty)
+        alternatives = '|'.join(re.escape(keyword) for keyword in sorted(keyword_rank, key=len, reverse=True))
+        self._pattern = re.compile(f'(?=({alternatives}))') if keyword_rank else None
+        self._cache = {}
+
+    @classmethod
+    def from_data(cls, config, products, categories):
+        """Matcher s mapovaním naučeným z dvojíc (Product, Category) - len ak to konfigurácia povolí"""
+        if not config.get('learn_from_data'):
+            return cls(config)
+        return cls.from_pair_counts(config, category_pair_counts(products, categories))
+
+    @classmethod
+    def from_pair_counts(cls, config, pair_counts):
+        """Matcher z počtov dvojíc (Product, Category), napr. sčítaných po chunkoch"""
+        if not config.get('learn_from_data') or pair_counts is None:
+            return cls(config)
+        return cls(config, learn_category_mapping(pair_counts, {rule['category'] for rule in config['rules']},
+                                                  config['learn_min_share']))
+
+    def _match(self, product):
+        if product in self.learned:
+            return self.learned[product]
+        if self._pattern is None:
+            return self.default_category
+        ranks = [self._keyword_rank[match] for match in self._pattern.findall(product.upper())]
+        return self.categories[min(ranks)] if ranks else self.default_category
+
+    def infer(self, products):
+        """Kategórie pre stĺpec produktov (chýbajúci produkt -> predvolená kategória)"""
+        codes, uniques = pd.factorize(products)
+        unique_categories = []
+        for product in uniques:
+            category = self._cache.get(product)
+            if category is None:
+                category = self._cache[product] = self._match(str(product))
+            unique_categories.append(category)
+        unique_categories.append(self.default_category)  # kód -1 = NaN
+        return np.array(unique_categories, dtype=object)[codes]
+
+    def fingerprint(self):
+        """Otlačok pravidiel bez naučeného mapovania (zmena = iné výsledky čistenia)"""
+        return json.dumps([self.categories, sorted(self._keyword_rank.items()), self.default_category])
+
+    def relearned_products(self, previous_learned):
+        """Produkty, ktorých naučená kategória sa oproti previous_learned zmenila (pribudla, zmizla)"""
+        return sorted(product for product in previous_learned.keys() | self.learned.keys()
+                      if previous_learned.get(product) != self.learned.get(product))
+
+def category_pair_counts(products, categories):
+    """
+    Počty dvojíc (Product, Category) z riadkov s vyplnenou kategóriou. Počty chunkov sa dajú
+    sčítať (add_pair_counts) - pamäť je úmerná počtu unikátnych dvojíc, nie riadkov.
+    """
+    pairs = pd.DataFrame({'Product': products.astype(object), 'Category': categories.astype(object)})
+    pairs = pairs[pairs['Product'].notna() & pairs['Category'].notna() & (pairs['Category'] != '')]
+    return pairs.value_counts(sort=False)
+
+def add_pair_counts(total, counts):
+    return counts if total is None else total.add(counts, fill_value=0).astype('int64')
+
+def learn_category_mapping(pair_counts, known_categories, min_share):
+    """
+    Product -> Category z počtov dvojíc (category_pair_counts). Produkt sa naučí, len ak jeho
+    najčastejšia (známa) kategória tvorí aspoň min_share jeho výskytov.
+    """
+    if pair_counts.empty:
+        return {}
+    counts = pair_counts.rename('count').reset_index()
+    # Pri rovnakom počte rozhoduje názov kategórie - výsledok nezávisí od poradia riadkov ani chunkov
+    counts = counts.sort_values(['Product', 'count', 'Category'], ascending=[True, False, True], kind='mergesort')
+    totals = counts.groupby('Product')['count'].sum()
+    mapping = {}
+    for product, category, count in counts.drop_duplicates('Product').itertuples(index=False, name=None):
+        if category in known_categories and count >= min_share * totals[product]:
+            mapping[product] = category
+    return mapping
+
+# Podporované formáty dátumov
+DATE_ISO_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')  # YYYY-MM-DD
+DATE_DMY_PATTERN = re.compile(r'^\d{2}-\d{2}-\d{4}')   # DD-MM-YYYY s časom
+
+# Cache už naparsovaných reťazcov: reťazec -> (dátum, Date_Was_Missing)
+_DATE_CACHE = {}
+DATE_CACHE_MAX_SIZE = 1_000_000
+
+def _parse_date_strings(values):
+    """
+    Parsovanie unikátnych reťazcov dátumov po skupinách formátov.
+    Každý známy formát sa parsuje jedným vektorizovaným to_datetime(format=...),
+    ostatné tvary (a neúspešné pokusy) idú na automatické parsovanie po jednom.
+    """
+    values = pd.Series(values, dtype=object)
+    parsed = pd.Series(None, index=values.index, dtype=object)
+    missing = pd.Series(1, index=values.index)
+    
+    stripped = values.str.strip()
+    pending = values != ''
+    
+    # Formát YYYY-MM-DD
+    iso = pending & stripped.str.match(DATE_ISO_PATTERN)
+    iso_dates = pd.to_datetime(stripped[iso], format='%Y-%m-%d', errors='coerce').dropna()
+    parsed[iso_dates.index] = list(iso_dates)
+    pending[iso_dates.index] = False
+    
+    # Formát DD-MM-YYYY s časom
+    dmy = pending & stripped.str.match(DATE_DMY_PATTERN)
+    dmy_dates = pd.to_datetime(stripped[dmy].str.split(' ').str[0], format='%d-%m-%Y', errors='coerce').dropna()
+    parsed[dmy_dates.index] = list(dmy_dates)
+    pending[dmy_dates.index] = False
+    
+    missing[~pending & (values != '')] = 0
+    
+    # Pokus o automatické parsovanie - čas sa zahodí ako pri DD-MM-YYYY s časom
+    # (triedenie analytics tabuľky potom zodpovedá dátumu zapísanému v CSV)
+    for index in pending[pending].index:
+        try:
+            parsed[index] = pd.to_datetime(stripped[index]).normalize()
+            missing[index] = 0
+        except (ValueError, TypeError, OverflowError):
+            pass
+    
+    return dict(zip(values, zip(parsed, missing)))
+
+def normalize_dates(dates):
+    """
+    Normalizácia stĺpca TransactionDate - vracia (dátumy, Date_Was_Missing).
+    Každý unikátny reťazec sa parsuje len raz, aj naprieč chunkami.
+    """
+    codes, uniques = pd.factorize(dates)
+    uncached = [value for value in uniques if value not in _DATE_CACHE]
+    if uncached:
+        if len(_DATE_CACHE) + len(uncached) > DATE_CACHE_MAX_SIZE:
+            _DATE_CACHE.clear()
+        _DATE_CACHE.update(_parse_date_strings(uncached))
+    
+    unique_results = [_DATE_CACHE[value] for value in uniques]
+    unique_dates = pd.to_datetime(pd.Series([result[0] for result in unique_results], dtype=object))
+    unique_missing = pd.Series([result[1] for result in unique_results], dtype=int)
+    
+    # Chýbajúce hodnoty (NaN) majú kód -1 a po reindexe ostanú NaT / 1
+    parsed_dates = pd.Series(unique_dates.reindex(codes).to_numpy(), index=dates.index)
+    date_missing = pd.Series(unique_missing.reindex(codes, fill_value=1).to_numpy(), index=dates.index)
+    return parsed_dates, date_missing
+
+def build_category_matcher(df, config=None):
+    """CategoryMatcher s mapovaním naučeným z produktov a kategórií celého vstupu df"""
+    config = load_category_rules() if config is None else config
+    return CategoryMatcher.from_data(config, df['Product'], df['Category'])
+
+def clean_data(df, metrics=None, category_matcher=None):
+    """
+    Hlavná funkcia na čistenie dát (čas jednotlivých opráv sa zapisuje do metrics).
+    Bez category_matcher sa mapovanie Product -> Category naučí z df samotného - pri chunkoch
+    treba matcher naučiť z celého vstupu, aby výsledok nezávisel od rozdelenia.
+    """
+    metrics = StageMetrics() if metrics is None else metrics
+    rows = len(df)
     df_clean = df.copy()
     
     # Sledovanie opráv
-    df_clean['Category_Was_Fixed'] = 0
-    df_clean['Product_Was_Fixed'] = 0
-    df_clean['Date_Was_Missing'] = 0
-    df_clean['Email_Was_Invalid'] = 0
-    df_clean['Price_Was_Fixed'] = 0
+    df_clean['Category_Was_Fixed'] = np.int8(0)
+    df_clean['Product_Was_Fixed'] = np.int8(0)
+    df_clean['Date_Was_Missing'] = np.int8(0)
+    if 'Email' in df_clean:
+        df_clean['Email_Was_Invalid'] = np.int8(0)
+    df_clean['Price_Was_Fixed'] = np.int8(0)
     
     # 1. OPRAVA KATEGÓRIÍ
-    def fix_category(row):
-        if pd.isna(row['Category']) or row['Category'] == '':
-            product = str(row['Product']).upper()
-            if any(keyword in product for keyword in ['LAPTOP', 'SMARTPHONE', 'HEADPHONES']):
-                return 'Electronics', 1
-            elif any(keyword in product for keyword in ['DUMBBELLS', 'YOGA']):
-                return 'Sports', 1
-            elif any(keyword in product for keyword in ['SOFA', 'BLENDER']):
-                return 'Home & Garden', 1
-            elif any(keyword in product for keyword in ['BOARD GAME', 'ACTION FIGURE']):
-                return 'Toys', 1
-            elif any(keyword in product for keyword in ['PERFUME', 'SHAMPOO', 'FACE CREAM']):
-                return 'Beauty', 1
-            elif 'COOKBOOK' in product:
-                return 'Books', 1
-            elif any(keyword in product for keyword in ['THERMOMETER', 'VITAMINS']):
-                return 'Health', 1
-            elif 'JACKET' in product:
-                return 'Fashion', 1
-            else:
-                return 'Uncategorized', 1
-        return row['Category'], 0
+    with metrics.stage('clean_data.category', rows):
+        # Kategória sa dopĺňa z názvu produktu len tam, kde chýba
+        category_missing = df_clean['Category'].isna() | (df_clean['Category'] == '')
+        if category_matcher is None:
+            category_matcher = build_category_matcher(df_clean)
+        inferred_category = category_matcher.infer(df_clean.loc[category_missing, 'Product'])
     
-    category_fixes = df_clean.apply(fix_category, axis=1, result_type='expand')
-    df_clean['Category_Clean'] = category_fixes[0]
-    df_clean['Category_Was_Fixed'] = category_fixes[1]
+        df_clean['Category_Clean'] = df_clean['Category'].astype(object)
+        df_clean.loc[category_missing, 'Category_Clean'] = inferred_category
+        df_clean['Category_Was_Fixed'] = category_missing.astype('int8')
     
     # 2. OPRAVA PRODUKTOV
-    def fix_product(row):
-        if pd.isna(row['Product']) or row['Product'] == '':
-            return 'Unknown Product', 1
-        elif row['Product'] == 'InvalidProd2':
-            return 'Product Name Correction Needed', 1
-        return row['Product'], 0
-    
-    product_fixes = df_clean.apply(fix_product, axis=1, result_type='expand')
-    df_clean['Product_Clean'] = product_fixes[0]
-    df_clean['Product_Was_Fixed'] = product_fixes[1]
+    with metrics.stage('clean_data.product', rows):
+        product = df_clean['Product']
+        product_missing = product.isna() | (product == '')
+        product_invalid = product == 'InvalidProd2'
+        df_clean['Product_Clean'] = np.select(
+            [product_missing, product_invalid],
+            ['Unknown Product', 'Product Name Correction Needed'],
+            default=product.astype(object)
+        )
+        df_clean['Product_Was_Fixed'] = (product_missing | product_invalid).astype('int8')
     
     # 3. OPRAVA DÁTUMOV
-    def parse_date(date_str):
-        if pd.isna(date_str) or date_str == '':
-            return None, 1
-        
-        date_str = str(date_str).strip()
-        
-        # Formát YYYY-MM-DD
-        if re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
-            try:
-                return pd.to_datetime(date_str, format='%Y-%m-%d'), 0
-            except:
-                pass
-        
-        # Formát DD-MM-YYYY s časom
-        if re.match(r'^\d{2}-\d{2}-\d{4}', date_str):
-            try:
-                date_part = date_str.split(' ')[0]
-                return pd.to_datetime(date_part, format='%d-%m-%Y'), 0
-            except:
-                pass
-        
-        # Pokus o automatické parsovanie
-        try:
-            return pd.to_datetime(date_str), 0
-        except:
-            return None, 1
-    
-    date_fixes = df_clean['TransactionDate'].apply(parse_date)
-    df_clean['TransactionDate_Clean'] = [fix[0] for fix in date_fixes]
-    df_clean['Date_Was_Missing'] = [fix[1] for fix in date_fixes]
+    with metrics.stage('clean_data.dates', rows):
+        df_clean['TransactionDate_Clean'], df_clean['Date_Was_Missing'] = normalize_dates(
+            df_clean['TransactionDate'])
     
     # 4. OPRAVA CIEN
-    def fix_price(row):
-        # Konverzia na numerické hodnoty
-        try:
-            price = pd.to_numeric(row['Price'], errors='coerce')
-            total_value = pd.to_numeric(row['TotalValue'], errors='coerce')
-            quantity = pd.to_numeric(row['Quantity'], errors='coerce')
-        except:
-            price = None
-            total_value = None
-            quantity = None
-        
-        if pd.isna(price):
-            if not pd.isna(total_value) and not pd.isna(quantity) and quantity > 0:
-                return total_value / quantity, 1
-            else:
-                return 0, 1
-        return price, 0
+    with metrics.stage('clean_data.price', rows):
+        price = _float(df_clean['Price'])
+        total_value = _float(df_clean['TotalValue'])
+        quantity = _float(df_clean['Quantity'])
     
-    price_fixes = df_clean.apply(fix_price, axis=1, result_type='expand')
-    df_clean['Price_Clean'] = price_fixes[0]
-    df_clean['Price_Was_Fixed'] = price_fixes[1]
+        price_missing = price.isna()
+        price_derivable = price_missing & total_value.notna() & quantity.notna() & (quantity > 0)
+        df_clean['Price_Clean'] = np.select(
+            [price_derivable, price_missing],
+            [total_value / quantity, 0.0],
+            default=price
+        )
+        df_clean['Price_Was_Fixed'] = price_missing.astype('int8')
     
     # 5. OPRAVA PAYMENT METHODS
-    def fix_payment_method(method):
-        if pd.isna(method) or method == '':
-            return 'Not Specified'
-        elif method == 'UnsupportedMethod':
-            return 'Method Verification Needed'
-        return method
-    
-    df_clean['PaymentMethod_Clean'] = df_clean['PaymentMethod'].apply(fix_payment_method)
-    
-    # 6. OPRAVA ADRIES
-    def fix_address(address):
-        if pd.isna(address) or address == '':
-            return 'Address Not Provided'
-        elif address == 'UNKNOWN ADDRESS':
-            return 'Address Verification Needed'
-        return address
-    
-    df_clean['ShippingAddress_Clean'] = df_clean['ShippingAddress'].apply(fix_address)
-    
-    # 7. OPRAVA EMAILOV
-    def fix_email(email):
-        if pd.isna(email) or email in ['invalid_email', 'not_an_email']:
-            return 'Email Not Provided', 1
-        elif '@' not in str(email):
-            return 'Invalid Email Format', 1
-        return email, 0
-    
-    email_fixes = df_clean['Email'].apply(fix_email)
-    df_clean['Email_Clean'] = [fix[0] for fix in email_fixes]
-    df_clean['Email_Was_Invalid'] = [fix[1] for fix in email_fixes]
+    with metrics.stage('clean_data.payment_method', rows):
+        payment_method = df_clean['PaymentMethod']
+        df_clean['PaymentMethod_Clean'] = np.select(
+            [payment_method.isna() | (payment_method == ''), payment_method == 'UnsupportedMethod'],
+            ['Not Specified', 'Method Verification Needed'],
+            default=payment_method.astype(object)
+        )
     
-    # 8. OPRAVA ORDER STATUS
-    def fix_order_status(status):
-        if status == 'UnknownStatus':
-            return 'Status Verification Needed'
-        elif pd.isna(status):
-            return 'Pending'
-        return status
+    # 6. OPRAVA ADRIES (bez stĺpca pri projekcii vstupu len pre analytics)
+    if 'ShippingAddress' in df_clean:
+        with metrics.stage('clean_data.address', rows):
+            address = df_clean['ShippingAddress']
+            df_clean['ShippingAddress_Clean'] = np.select(
+                [address.isna() | (address == ''), address == 'UNKNOWN ADDRESS'],
+                ['Address Not Provided', 'Address Verification Needed'],
+                default=address.astype(object)
+            )
     
-    df_clean['OrderStatus_Clean'] = df_clean['OrderStatus'].apply(fix_order_status)
+    # 7. OPRAVA EMAILOV (pri projekcii len pre analytics je Email_Was_Invalid už zo vstupu)
+    if 'Email' in df_clean:
+        with metrics.stage('clean_data.email', rows):
+            email = df_clean['Email']
+            email_not_provided, email_bad_format = email_flags(email)
+            df_clean['Email_Clean'] = np.select(
+                [email_not_provided, email_bad_format],
+                ['Email Not Provided', 'Invalid Email Format'],
+                default=email.astype(object)
+            )
+            df_clean['Email_Was_Invalid'] = (email_not_provided | email_bad_format).astype('int8')
+    
+    # 8. OPRAVA ORDER STATUS
+    with metrics.stage('clean_data.order_status', rows):
+        status = df_clean['OrderStatus']
+        df_clean['OrderStatus_Clean'] = np.select(
+            [status == 'UnknownStatus', status.isna()],
+            ['Status Verification Needed', 'Pending'],
+            default=status.astype(object)
+        )
     
     # 9. OPRAVA PAYMENT AMOUNTS
-    def fix_payment_amount(row):
-        try:
-            payment_amount = pd.to_numeric(row['PaymentAmount'], errors='coerce')
-            total_value = pd.to_numeric(row['TotalValue'], errors='coerce')
-        except:
-            return row['TotalValue'] if not pd.isna(row['TotalValue']) else 0
-        
-        if pd.isna(payment_amount):
-            return total_value if not pd.isna(total_value) else 0
-        
-        if pd.isna(total_value):
-            return payment_amount
-            
+    with metrics.stage('clean_data.payment_amount', rows):
+        payment_amount = _float(df_clean['PaymentAmount'])
         # Ak je rozdiel väčší ako 10%, použiť TotalValue
-        if abs(payment_amount - total_value) > total_value * 0.1:
-            return total_value
-        return payment_amount
-    
-    df_clean['PaymentAmount_Clean'] = df_clean.apply(fix_payment_amount, axis=1)
+        payment_mismatch = (payment_amount - total_value).abs() > total_value * 0.1
+        df_clean['PaymentAmount_Clean'] = np.select(
+            [payment_amount.isna() & total_value.notna(),
+             payment_amount.isna(),
+             total_value.isna(),
+             payment_mismatch],
+            [total_value, 0.0, payment_amount, total_value],
+            default=payment_amount
+        )
     
+    with metrics.stage('clean_data.schema', rows):
+        df_clean = apply_table_schema(df_clean, 'cleaned_transactions')
     return df_clean
 
-# Vyčistenie dát
-df_cleaned = clean_data(df)
+# Príznaky opráv a ich názvy vo validačnej tabuľke
+VALIDATION_FIX_METRICS = [
+    ('Category_Was_Fixed', 'Records with Category Fixed'),
+    ('Product_Was_Fixed', 'Records with Product Fixed'),
+    ('Date_Was_Missing', 'Records with Missing Date'),
+    ('Email_Was_Invalid', 'Records with Invalid Email Fixed'),
+    ('Price_Was_Fixed', 'Records with Price Fixed'),
+]
+
+def count_fixes(df_cleaned):
+    """Počty opravených záznamov podľa príznakov"""
+    # Jedna redukcia nad blokom int8 príznakov namiesto súčtu po stĺpcoch
+    flags = [flag for flag, _ in VALIDATION_FIX_METRICS]
+    return dict(zip(flags, df_cleaned[flags].to_numpy().sum(axis=0, dtype=np.int64)))
 
-print(f"\nOpravy vykonané:")
-print(f"- Kategórie opravené: {df_cleaned['Category_Was_Fixed'].sum()}")
-print(f"- Produkty opravené: {df_cleaned['Product_Was_Fixed'].sum()}")
-print(f"- Chýbajúce dátumy: {df_cleaned['Date_Was_Missing'].sum()}")
-print(f"- Neplatné emaily opravené: {df_cleaned['Email_Was_Invalid'].sum()}")
-print(f"- Ceny opravené: {df_cleaned['Price_Was_Fixed'].sum()}")
+def print_fix_summary(fix_counts):
+    print(f"\nOpravy vykonané:")
+    print(f"- Kategórie opravené: {fix_counts['Category_Was_Fixed']}")
+    print(f"- Produkty opravené: {fix_counts['Product_Was_Fixed']}")
+    print(f"- Chýbajúce dátumy: {fix_counts['Date_Was_Missing']}")
+    print(f"- Neplatné emaily opravené: {fix_counts['Email_Was_Invalid']}")
+    print(f"- Ceny opravené: {fix_counts['Price_Was_Fixed']}")
 
 # =====================================================
 # 3. VYTVORENIE ANALYTICS-READY TABUĽKY
 # =====================================================
 
-def create_analytics_table(df_clean):
+def create_analytics_table(df_clean, metrics=None):
     """Vytvorenie tabuľky pripravenej na analýzu"""
+    metrics = StageMetrics() if metrics is None else metrics
     # Filtrovanie záznamov s platným dátumom
     df_analytics = df_clean[df_clean['TransactionDate_Clean'].notna()].copy()
     
@@ -302,29 +1077,20 @@ def create_analytics_table(df_clean):
     
     # Business metriky
     df_analytics['Had_Discount'] = (~df_analytics['DiscountCode'].isna() & 
-                                   (df_analytics['DiscountCode'] != '')).astype(int)
+                                   (df_analytics['DiscountCode'] != '')).astype('int8')
     
-    def categorize_transaction_value(total_value):
-        try:
-            value = pd.to_numeric(total_value, errors='coerce')
-            if pd.isna(value):
-                return 'Unknown Value'
-            elif value >= 1000:
-                return 'High Value'
-            elif value >= 500:
-                return 'Medium Value'
-            else:
-                return 'Low Value'
-        except:
-            return 'Unknown Value'
-    
-    df_analytics['Transaction_Value_Category'] = df_analytics['TotalValue'].apply(categorize_transaction_value)
+    total_value = _float(df_analytics['TotalValue'])
+    df_analytics['Transaction_Value_Category'] = np.select(
+        [total_value.isna(), total_value >= 1000, total_value >= 500],
+        ['Unknown Value', 'High Value', 'Medium Value'],
+        default='Low Value'
+    )
     
     # Indikátor kvality dát
     df_analytics['Had_Data_Quality_Issues'] = ((df_analytics['Category_Was_Fixed'] == 1) |
                                               (df_analytics['Product_Was_Fixed'] == 1) |
                                               (df_analytics['Date_Was_Missing'] == 1) |
-                                              (df_analytics['Email_Was_Invalid'] == 1)).astype(int)
+                                              (df_analytics['Email_Was_Invalid'] == 1)).astype('int8')
     
     # Výber finálnych stĺpcov
     final_columns = [
@@ -347,58 +1113,940 @@ def create_analytics_table(df_clean):
         'PaymentAmount_Clean': 'PaymentAmount'
     }
     
-    df_final = df_analytics[final_columns].rename(columns=column_mapping)
+    df_final = apply_table_schema(df_analytics[final_columns].rename(columns=column_mapping), 'analytics_ready')
     
-    return df_final.sort_values('TransactionDate', ascending=False)
-
-# Vytvorenie analytics tabuľky
-df_analytics = create_analytics_table(df_cleaned)
+    # Stabilné triedenie - rovnaké poradie ako pri zlučovaní chunkov v streamovacom režime
+    with metrics.stage('create_analytics_table.sort', len(df_final)):
+        df_final = df_final.sort_values('TransactionDate', ascending=False, kind='mergesort')
+    return df_final
 
 # =====================================================
 # 4. VYTVORENIE VALIDAČNEJ TABUĽKY
 # =====================================================
 
-validation_data = [
-    {'metric': 'Original Records', 'count': len(df)},
-    {'metric': 'Cleaned Records', 'count': len(df_cleaned)},
-    {'metric': 'Analytics Ready Records', 'count': len(df_analytics)},
-    {'metric': 'Records with Category Fixed', 'count': df_cleaned['Category_Was_Fixed'].sum()},
-    {'metric': 'Records with Product Fixed', 'count': df_cleaned['Product_Was_Fixed'].sum()},
-    {'metric': 'Records with Missing Date', 'count': df_cleaned['Date_Was_Missing'].sum()},
-    {'metric': 'Records with Invalid Email Fixed', 'count': df_cleaned['Email_Was_Invalid'].sum()},
-    {'metric': 'Records with Price Fixed', 'count': df_cleaned['Price_Was_Fixed'].sum()}
-]
-
-validation_summary = pd.DataFrame(validation_data)
+def build_validation_summary(original_records, cleaned_records, analytics_records, fix_counts):
+    """Validačná tabuľka z počtov záznamov a opráv"""
+    validation_data = [
+        {'metric': 'Original Records', 'count': original_records},
+        {'metric': 'Cleaned Records', 'count': cleaned_records},
+        {'metric': 'Analytics Ready Records', 'count': analytics_records},
+    ]
+    validation_data += [
+        {'metric': metric, 'count': fix_counts[flag]}
+        for flag, metric in VALIDATION_FIX_METRICS
+    ]
+    return pd.DataFrame(validation_data)
 
 # =====================================================
 # 5. ULOŽENIE VÝSTUPOV
 # =====================================================
 
-# Vytvorenie output adresára ak neexistuje
-os.makedirs('/data/out/tables', exist_ok=True)
+# Formát dátumov v CSV výstupoch - rovnaký v každom režime, nezávisle od hodnôt v chunku
+CSV_DATE_FORMAT = '%Y-%m-%d'
+
+def output_path(output_dir, table_name):
+    return os.path.join(output_dir, f'{table_name}.csv')
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow výstup a pyarrow parser vstupu vyžadujú balík pyarrow "
+                          "(pip install pyarrow)") from e
+    return pyarrow
+
+def _arrow_schema(columns, table_name):
+    """Pevná Arrow schéma - rovnaká pre všetky chunky bez ohľadu na ich obsah"""
+    pa = _import_pyarrow()
+    schema = TABLE_SCHEMAS.get(table_name, {})
+    fields = []
+    for col in columns:
+        dtype = schema.get(col, 'string')
+        if dtype == 'category':
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif dtype in ('string', 'uuid'):
+            arrow_type = pa.string()
+        elif dtype.startswith('datetime64'):
+            arrow_type = pa.timestamp('ns')
+        else:
+            arrow_type = pa.from_numpy_dtype(np.dtype(dtype.lower()))
+        fields.append(pa.field(col, arrow_type))
+    return pa.schema(fields)
+
+class ColumnarTableWriter:
+    """Zápis tabuľky do Parquet alebo Arrow IPC súboru, aj po častiach (chunkoch)"""
+    
+    def __init__(self, output_dir, table_name, output_format):
+        if output_format not in COLUMNAR_EXTENSIONS:
+            raise ValueError(f"Nepodporovaný stĺpcový formát: {output_format}")
+        self.path = os.path.join(output_dir, table_name + COLUMNAR_EXTENSIONS[output_format])
+        self.table_name = table_name
+        self.output_format = output_format
+        self._schema = None
+        self._writer = None
+    
+    def write(self, df):
+        pa = _import_pyarrow()
+        if self._writer is None:
+            self._schema = _arrow_schema(df.columns, self.table_name)
+            if self.output_format == 'parquet':
+                self._writer = pa.parquet.ParquetWriter(self.path, self._schema)
+            else:
+                # Stream formát - každý chunk môže mať vlastný slovník kategórií
+                self._writer = pa.ipc.new_stream(self.path, self._schema)
+        typed = apply_table_schema(df, self.table_name)
+        self._writer.write_table(pa.Table.from_pandas(typed, schema=self._schema, preserve_index=False))
+    
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def write_columnar_table(df, output_dir, table_name, output_format):
+    with ColumnarTableWriter(output_dir, table_name, output_format) as writer:
+        writer.write(df)
+    return writer.path
+
+def write_columnar_from_csv(csv_path, output_dir, table_name, output_format, chunk_size):
+    """Prepis hotovej CSV tabuľky do stĺpcového formátu po chunkoch (bez načítania celej tabuľky)"""
+    with ColumnarTableWriter(output_dir, table_name, output_format) as writer:
+        for chunk in pd.read_csv(csv_path, dtype=str, chunksize=chunk_size):
+            writer.write(chunk)
+    return writer.path
+
+def read_output_table(path):
+    """
+    Načítanie výstupnej tabuľky (CSV, Parquet alebo Arrow IPC) s typmi podľa TABLE_SCHEMAS.
+    Názov tabuľky sa odvodí z názvu súboru, napr. analytics_ready.parquet alebo analytics_ready.arrows.
+    """
+    table_name, extension = os.path.splitext(os.path.basename(path))
+    if extension == '.parquet':
+        df = pd.read_parquet(path)
+    elif extension == '.arrows':
+        pa = _import_pyarrow()
+        with pa.ipc.open_stream(path) as reader:
+            df = reader.read_pandas()
+    else:
+        df = pd.read_csv(path, dtype=str)
+    # Parquet / Arrow vracajú float64 s NaN namiesto nullable typov - rovnaké typy pre všetky formáty
+    return apply_table_schema(df, table_name)
+
+def print_transformation_summary(quality_issues, cleaned_records, validation_summary, analytics_records,
+                                 category_counts, value_category_counts, quality_issue_records,
+                                 columnar_files=(), rollups=None, duplicates=None):
+    """Súhrn behu - tabuľky krokov, ktoré sa nespúšťali (None), sa vynechajú"""
+    print(f"\n=== SÚHRN TRANSFORMÁCIE ===")
+    print(f"Vytvorené výstupné tabuľky:")
+    if quality_issues is not None:
+        print(f"1. data_quality_issues.csv - {len(quality_issues)} problémov identifikovaných")
+    if cleaned_records is not None:
+        print(f"2. cleaned_transactions.csv - {cleaned_records} vyčistených záznamov")
+    if validation_summary is not None:
+        print(f"3. validation_summary.csv - {len(validation_summary)} validačných metrík")
+    if analytics_records is not None:
+        print(f"4. analytics_ready.csv - {analytics_records} záznamov pripravených na analýzu")
+    if rollups is not None:
+        print(f"5. analytics_rollups.csv - {len(rollups)} riadkov v {rollups['rollup'].nunique()} rollupoch")
+    if duplicates is not None:
+        print(f"6. duplicate_transactions.csv - {len(duplicates)} duplicitných záznamov")
+    for columnar_file in columnar_files:
+        print(f"   + {columnar_file}")
+    
+    print(f"\nTransformácia úspešne dokončená!")
+    
+    if category_counts is None:
+        return
+    
+    # Zobrazenie prehľadu výsledkov
+    print(f"\n=== PREHĽAD VÝSLEDKOV ===")
+    print(f"Najčastejšie kategórie po čistení:")
+    print(category_counts.head())
+    
+    print(f"\nDistribúcia podľa hodnoty transakcií:")
+    print(value_category_counts)
+    
+    print(f"\nPočet transakcií s problémami kvality dát: {quality_issue_records}")
+
+def run_in_memory(input_file, output_dir, columnar_format=None, files_dir=FILES_OUTPUT_DIR, metrics=None,
+                  stages=ALL_STAGES):
+    """Spracovanie celého súboru naraz v pamäti (len kroky zo stages, načítajú sa len ich stĺpce)"""
+    metrics = StageMetrics() if metrics is None else metrics
+    usecols, email_flag = input_projection(stages)
+    with metrics.stage('load') as stage:
+        df = read_input(input_file, usecols=usecols, email_flag=email_flag)
+        stage['rows'] = len(df)
+    
+    print(f"Načítaných záznamov: {len(df)}")
+    print(f"Stĺpcov: {len(df.columns)}")
+    
+    with metrics.stage('apply_input_types', len(df)):
+        df = apply_input_types(df)
+    
+    output_tables = []
+    quality_issues = duplicates = None
+    if 'quality' in stages:
+        # Duplicity cez hash index presných kľúčov a blokov takmer-duplicít
+        with metrics.stage('find_duplicates', len(df)):
+            duplicates = find_duplicates(duplicate_keys(df))
+        
+        # Vytvorenie tabuľky s problémami
+        with metrics.stage('analyze_data_quality', len(df)):
+            quality_issues = analyze_data_quality(df, duplicates)
+        print("\nIdentifikované problémy:")
+        print(quality_issues)
+        output_tables.append(('data_quality_issues', quality_issues))
+    
+    df_cleaned = validation_summary = None
+    if 'clean' in stages or 'analytics' in stages:
+        # Vyčistenie dát
+        with metrics.stage('clean_data', len(df)):
+            df_cleaned = clean_data(df, metrics)
+        fix_counts = count_fixes(df_cleaned)
+        print_fix_summary(fix_counts)
+    
+    if 'clean' in stages:
+        # Do analytics tabuľky idú záznamy s platným dátumom - počet netreba tabuľku vytvárať
+        validation_summary = build_validation_summary(len(df), len(df_cleaned),
+                                                      int(df_cleaned['TransactionDate_Clean'].notna().sum()),
+                                                      fix_counts)
+        output_tables += [('cleaned_transactions', df_cleaned),
+                          ('validation_summary', validation_summary)]
+    
+    df_analytics = rollups = None
+    if 'analytics' in stages:
+        # Vytvorenie analytics tabuľky
+        with metrics.stage('create_analytics_table', len(df_cleaned)):
+            df_analytics = create_analytics_table(df_cleaned, metrics)
+        
+        # Predpočítané rollupy pre dashboardy
+        with metrics.stage('analytics_rollups', len(df_analytics)):
+            rollups = RollupCube.from_frame(df_analytics).table()
+        output_tables += [('analytics_ready', df_analytics),
+                          ('analytics_rollups', rollups)]
+    
+    if duplicates is not None:
+        output_tables.append(('duplicate_transactions', duplicates))
+    
+    # Vytvorenie output adresára ak neexistuje
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Uloženie tabuliek
+    for table_name, table in output_tables:
+        with metrics.stage(f'write.{table_name}', len(table)):
+            table.to_csv(output_path(output_dir, table_name), index=False, date_format=CSV_DATE_FORMAT)
+    
+    # Stĺpcový výstup (Parquet / Arrow) popri CSV
+    columnar_files = []
+    if columnar_format:
+        os.makedirs(files_dir, exist_ok=True)
+        for table_name, table in output_tables:
+            with metrics.stage(f'write.{table_name}.{columnar_format}', len(table)):
+                columnar_files.append(write_columnar_table(table, files_dir, table_name, columnar_format))
+    
+    analytics = df_analytics is not None
+    print_transformation_summary(
+        quality_issues, len(df_cleaned) if validation_summary is not None else None, validation_summary,
+        len(df_analytics) if analytics else None,
+        df_analytics['Category'].value_counts() if analytics else None,
+        df_analytics['Transaction_Value_Category'].value_counts() if analytics else None,
+        df_analytics['Had_Data_Quality_Issues'].sum() if analytics else None,
+        columnar_files,
+        rollups=rollups,
+        duplicates=duplicates
+    )
+    
+    if MEMORY_REPORT:
+        if validation_summary is not None:
+            print_memory_report('cleaned_transactions', df_cleaned)
+        if analytics:
+            print_memory_report('analytics_ready', df_analytics)
+
+# =====================================================
+# 6. STREAMOVACÍ REŽIM (CHUNKY)
+# =====================================================
+
+def _add_counts(total, counts):
+    """Sčítanie value_counts dvoch chunkov"""
+    return counts if total is None else total.add(counts, fill_value=0)
+
+def _sorted_counts(counts):
+    return counts.astype(int).sort_values(ascending=False, kind='mergesort')
+
+def merge_sorted_runs(run_files, output_file, sort_column, descending=True):
+    """
+    Externé zlučovanie (k-way merge) zotriedených CSV behov do jedného súboru.
+    V pamäti je naraz len jeden riadok z každého behu.
+    """
+    readers = []
+    handles = [open(run_file, newline='', encoding='utf-8') for run_file in run_files]
+    try:
+        header = None
+        for handle in handles:
+            reader = csv.reader(handle)
+            header = next(reader)
+            readers.append(reader)
+        
+        with open(output_file, 'w', newline='', encoding='utf-8') as out:
+            writer = csv.writer(out, lineterminator='\n')
+            if header is None:
+                return
+            writer.writerow(header)
+            key_index = header.index(sort_column)
+            # heapq.merge je stabilný - pri zhode kľúča ide skôr riadok zo skoršieho behu
+            writer.writerows(heapq.merge(*readers, key=lambda row: row[key_index], reverse=descending))
+    finally:
+        for handle in handles:
+            handle.close()
+
+def process_chunk(chunk, chunk_index, run_dir, columnar=False, category_matcher=None, stages=ALL_STAGES):
+    """
+    Spracovanie jedného chunku (partície riadkov) - beží v hlavnom procese
+    alebo vo worker procese. Vracia len počítadlá, vyčistený chunk ako CSV text
+    (a pri stĺpcovom výstupe aj typovaný frame), cestu k zotriedenému behu analytics tabuľky,
+    cube pre rollupy, kľúče duplicít a metriky krokov chunku - len pre kroky zo stages.
+    category_matcher je naučený z celého vstupu.
+    """
+    metrics = StageMetrics()
+    rows = len(chunk)
+    result = {'records': rows, 'columns': len(chunk.columns), 'metrics': metrics}
+    with metrics.stage('apply_input_types', rows):
+        chunk = apply_input_types(chunk)
+    
+    if 'quality' in stages:
+        with metrics.stage('analyze_data_quality', rows):
+            result['quality_profile'] = DataQualityProfile().update(chunk)
+        with metrics.stage('find_duplicates.keys', rows):
+            result['duplicate_keys'] = duplicate_keys(chunk)
+    
+    if 'clean' not in stages and 'analytics' not in stages:
+        return result
+    
+    with metrics.stage('clean_data', rows):
+        chunk_cleaned = clean_data(chunk, metrics, category_matcher)
+    result['fix_counts'] = count_fixes(chunk_cleaned)
+    result['analytics_records'] = int(chunk_cleaned['TransactionDate_Clean'].notna().sum())
+    
+    if 'clean' in stages:
+        with metrics.stage('write.cleaned_transactions', rows):
+            result['cleaned_csv'] = chunk_cleaned.to_csv(index=False, header=chunk_index == 0, lineterminator='\n',
+                                                         date_format=CSV_DATE_FORMAT)
+        result['cleaned_frame'] = apply_table_schema(chunk_cleaned, 'cleaned_transactions') if columnar else None
+    
+    if 'analytics' in stages:
+        with metrics.stage('create_analytics_table', rows):
+            chunk_analytics = create_analytics_table(chunk_cleaned, metrics)
+        run_file = os.path.join(run_dir, f'run_{chunk_index:05d}.csv')
+        with metrics.stage('write.analytics_runs', len(chunk_analytics)):
+            chunk_analytics.to_csv(run_file, index=False, date_format=CSV_DATE_FORMAT)
+        with metrics.stage('analytics_rollups', len(chunk_analytics)):
+            result['rollup_cube'] = RollupCube.from_frame(chunk_analytics)
+        result.update({
+            'category_counts': chunk_analytics['Category'].value_counts(),
+            'value_category_counts': chunk_analytics['Transaction_Value_Category'].value_counts(),
+            'quality_issue_records': chunk_analytics['Had_Data_Quality_Issues'].sum(),
+            'run_file': run_file,
+        })
+    return result
+
+def _chunks_or_empty(chunks, read_empty):
+    """Vstup len s hlavičkou nedá žiadny chunk - spracuje sa jeden prázdny, aby výstupy mali hlavičky"""
+    empty = True
+    for chunk in chunks:
+        empty = False
+        yield chunk
+    if empty:
+        yield read_empty()
+
+def _timed_chunks(chunks, metrics):
+    """Meranie načítania chunkov z CSV (čítanie prebieha až pri iterácii)"""
+    while True:
+        with metrics.stage('load') as stage:
+            chunk = next(chunks, None)
+            stage['rows'] = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            return
+        yield chunk
+
+def _process_chunks_parallel(chunks, run_dir, workers, columnar, category_matcher, stages):
+    """
+    Spracovanie chunkov v process poole. Výsledky sa vracajú v poradí vstupu,
+    rozpracovaných je najviac 2 * workers chunkov, takže pamäť ostáva ohraničená.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk_index, chunk in enumerate(chunks):
+            pending.append(executor.submit(process_chunk, chunk, chunk_index, run_dir, columnar,
+                                           category_matcher, stages))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def run_streaming(input_file, output_dir, chunk_size, workers=1, columnar_format=None,
+                  files_dir=FILES_OUTPUT_DIR, metrics=None, stages=ALL_STAGES):
+    """
+    Spracovanie vstupu po chunkoch - pamäť je ohraničená veľkosťou chunku.
+    Počítadlá kvality a validácie sa sčítavajú priebežne, analytics tabuľka
+    sa triedi externým merge sortom cez dočasné behy na disku, index duplicít
+    sa delí do partícií na disku.
+    Pri workers > 1 sa chunky spracúvajú paralelne, výstup je rovnaký ako sériovo;
+    metriky chunkov sa sčítajú (časy workerov sa prekrývajú).
+    """
+    metrics = StageMetrics() if metrics is None else metrics
+    os.makedirs(output_dir, exist_ok=True)
+    quality = 'quality' in stages
+    clean = 'clean' in stages
+    analytics = 'analytics' in stages
+    cleaning = clean or analytics
+    
+    total_records = 0
+    analytics_records = 0
+    column_count = 0
+    quality_profile = DataQualityProfile()
+    rollup_cube = RollupCube()
+    fix_counts = {flag: 0 for flag, _ in VALIDATION_FIX_METRICS}
+    category_counts = None
+    value_category_counts = None
+    quality_issue_records = 0
+    
+    columnar = bool(columnar_format)
+    columnar_files = {}
+    if columnar:
+        os.makedirs(files_dir, exist_ok=True)
+        cleaned_columnar = ColumnarTableWriter(files_dir, 'cleaned_transactions', columnar_format)
+    
+    # Mapovanie Product -> Category sa učí z celého vstupu - počty dvojíc sa sčítajú po chunkoch
+    category_matcher = None
+    if cleaning:
+        with metrics.stage('category_rules.learn') as stage:
+            config = load_category_rules()
+            pair_counts = None
+            stage['rows'] = 0
+            if config.get('learn_from_data'):
+                for chunk in read_input(input_file, usecols=['Product', 'Category'], chunksize=chunk_size):
+                    pair_counts = add_pair_counts(pair_counts, category_pair_counts(chunk['Product'],
+                                                                                    chunk['Category']))
+                    stage['rows'] += len(chunk)
+            category_matcher = CategoryMatcher.from_pair_counts(config, pair_counts)
+    
+    with tempfile.TemporaryDirectory(prefix='analytics_runs_') as run_dir, ExitStack() as outputs:
+        cleaned_out = None
+        if clean:
+            cleaned_out = outputs.enter_context(open(output_path(output_dir, 'cleaned_transactions'), 'w',
+                                                     newline='', encoding='utf-8'))
+        run_files = []
+        duplicate_index = DuplicateIndex(run_dir)
+        usecols, email_flag = input_projection(stages)
+        chunks = _chunks_or_empty(read_input(input_file, usecols=usecols, chunksize=chunk_size,
+                                             email_flag=email_flag),
+                                  lambda: read_input(input_file, usecols=usecols, email_flag=email_flag))
+        chunks = _timed_chunks(chunks, metrics)
+        if workers > 1:
+            results = _process_chunks_parallel(chunks, run_dir, workers, columnar, category_matcher, stages)
+        else:
+            results = (process_chunk(chunk, chunk_index, run_dir, columnar, category_matcher, stages)
+                       for chunk_index, chunk in enumerate(chunks))
+        
+        for chunk_index, result in enumerate(results):
+            total_records += result['records']
+            column_count = result['columns']
+            if quality:
+                quality_profile.merge(result['quality_profile'])
+                with metrics.stage('find_duplicates.spill', result['records']):
+                    duplicate_index.add(result['duplicate_keys'])
+            if cleaning:
+                analytics_records += result['analytics_records']
+                for flag, count in result['fix_counts'].items():
+                    fix_counts[flag] = fix_counts.get(flag, 0) + count
+            if analytics:
+                quality_issue_records += result['quality_issue_records']
+                with metrics.stage('analytics_rollups.merge'):
+                    rollup_cube.merge(result['rollup_cube'])
+                category_counts = _add_counts(category_counts, result['category_counts'])
+                value_category_counts = _add_counts(value_category_counts, result['value_category_counts'])
+                run_files.append(result['run_file'])
+            metrics.merge(result['metrics'])
+            
+            if clean:
+                with metrics.stage('write.cleaned_transactions'):
+                    cleaned_out.write(result['cleaned_csv'])
+                if columnar:
+                    with metrics.stage(f'write.cleaned_transactions.{columnar_format}', result['records']):
+                        cleaned_columnar.write(result['cleaned_frame'])
+            
+            print(f"Spracovaný chunk {chunk_index + 1}: {total_records} záznamov")
+        
+        print(f"Načítaných záznamov: {total_records}")
+        print(f"Stĺpcov: {column_count}")
+        
+        if analytics:
+            with metrics.stage('write.analytics_ready', analytics_records):
+                merge_sorted_runs(run_files, output_path(output_dir, 'analytics_ready'), 'TransactionDate')
+        
+        duplicates = None
+        if quality:
+            with metrics.stage('find_duplicates', total_records):
+                duplicates = duplicate_index.duplicates()
+    
+    if columnar and clean:
+        cleaned_columnar.close()
+        columnar_files['cleaned_transactions'] = cleaned_columnar.path
+    if columnar and analytics:
+        # Zotriedená analytics tabuľka sa do stĺpcového formátu prepíše po chunkoch
+        with metrics.stage(f'write.analytics_ready.{columnar_format}', analytics_records):
+            columnar_files['analytics_ready'] = write_columnar_from_csv(
+                output_path(output_dir, 'analytics_ready'), files_dir, 'analytics_ready', columnar_format, chunk_size)
+    
+    output_tables = []
+    quality_issues = None
+    if quality:
+        quality_issues = quality_profile.add_duplicates(duplicates).table()
+        print("\nIdentifikované problémy:")
+        print(quality_issues)
+        output_tables.append(('data_quality_issues', quality_issues))
+    if cleaning:
+        print_fix_summary(fix_counts)
+    
+    validation_summary = None
+    if clean:
+        validation_summary = build_validation_summary(total_records, total_records, analytics_records, fix_counts)
+        output_tables.append(('validation_summary', validation_summary))
+    rollups = None
+    if analytics:
+        rollups = rollup_cube.table()
+        output_tables.append(('analytics_rollups', rollups))
+    if quality:
+        output_tables.append(('duplicate_transactions', duplicates))
+    
+    for table_name, table in output_tables:
+        with metrics.stage(f'write.{table_name}', len(table)):
+            table.to_csv(output_path(output_dir, table_name), index=False)
+        if columnar:
+            columnar_files[table_name] = write_columnar_table(table, files_dir, table_name, columnar_format)
+    
+    print_transformation_summary(
+        quality_issues, total_records if clean else None, validation_summary,
+        analytics_records if analytics else None,
+        _sorted_counts(category_counts) if analytics else None,
+        _sorted_counts(value_category_counts) if analytics else None,
+        quality_issue_records if analytics else None,
+        [columnar_files[table_name] for table_name in OUTPUT_TABLES if table_name in columnar_files],
+        rollups=rollups, duplicates=duplicates
+    )
+
+# =====================================================
+# 7. INKREMENTÁLNY REŽIM
+# =====================================================
+
+STATE_FILE_NAME = 'transform_state.sqlite'
+ROLLUP_BASE_COLUMNS = list(ROLLUP_DIMENSIONS) + list(ROLLUP_MEASURES)
+STATE_VERSION = 5
 
-# Uloženie tabuliek
-quality_issues.to_csv('/data/out/tables/data_quality_issues.csv', index=False)
-df_cleaned.to_csv('/data/out/tables/cleaned_transactions.csv', index=False)
-validation_summary.to_csv('/data/out/tables/validation_summary.csv', index=False)
-df_analytics.to_csv('/data/out/tables/analytics_ready.csv', index=False)
+def _row_keys(df):
+    """Kľúč riadku - TransactionID + poradie výskytu (TransactionID v dátach nie je unikátne)"""
+    occurrence = df.groupby('TransactionID', dropna=False, sort=False).cumcount()
+    return df['TransactionID'].fillna('').astype(str) + '#' + occurrence.astype(str)
 
-print(f"\n=== SÚHRN TRANSFORMÁCIE ===")
-print(f"Vytvorené výstupné tabuľky:")
-print(f"1. data_quality_issues.csv - {len(quality_issues)} problémov identifikovaných")
-print(f"2. cleaned_transactions.csv - {len(df_cleaned)} vyčistených záznamov")
-print(f"3. validation_summary.csv - {len(validation_summary)} validačných metrík")
-print(f"4. analytics_ready.csv - {len(df_analytics)} záznamov pripravených na analýzu")
+def _row_hashes(df):
+    """Hash obsahu surového riadku (int64 kvôli SQLite)"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy().view('int64')
 
-print(f"\nTransformácia úspešne dokončená!")
+def _bitmask(flags, length):
+    mask = np.zeros(length, dtype=np.int64)
+    for bit, flag in enumerate(flags):
+        mask |= (np.asarray(flag) != 0).astype(np.int64) << bit
+    return mask
 
-# Zobrazenie prehľadu výsledkov
-print(f"\n=== PREHĽAD VÝSLEDKOV ===")
-print(f"Najčastejšie kategórie po čistení:")
-print(df_analytics['Category'].value_counts().head())
+def _bit_counts(masks, bit_count):
+    masks = np.asarray(masks, dtype=np.int64)
+    return [int(((masks >> bit) & 1).sum()) for bit in range(bit_count)]
 
-print(f"\nDistribúcia podľa hodnoty transakcií:")
-print(df_analytics['Transaction_Value_Category'].value_counts())
+def _csv_lines(df):
+    """Riadky CSV presne ako z to_csv, ale každý zvlášť (polia môžu obsahovať nové riadky)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    lines = []
+    for row in csv.reader(io.StringIO(df.to_csv(index=False, header=False, lineterminator='\n',
+                                                    date_format=CSV_DATE_FORMAT))):
+        writer.writerow(row)
+        lines.append(buffer.getvalue())
+        buffer.seek(0)
+        buffer.truncate()
+    return lines
+
+def _csv_header(columns):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerow(columns)
+    return buffer.getvalue()
+
+class IncrementalStateStore:
+    """
+    Perzistentný stav inkrementálnej transformácie v SQLite.
+    Pre každý riadok (kľúč z TransactionID) drží hash obsahu, pozíciu vo vstupe,
+    bitové masky problémov a opráv a hotové CSV riadky oboch výstupných tabuliek.
+    Súhrnné počítadlá aj base cuboid rollupov sa udržiavajú cez delty. Naučené mapovanie
+    Product -> Category sa ukladá tiež, aby sa pri jeho zmene prepočítali len dotknuté riadky.
+    """
+    
+    def __init__(self, path, input_columns, category_rules=None):
+        self.path = path
+        self.input_columns = list(input_columns)
+        self.category_rules = category_rules
+        self.conn = None
+    
+    def __enter__(self):
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS rows (
+                row_key TEXT PRIMARY KEY,
+                row_hash INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                issue_mask INTEGER NOT NULL,
+                fix_mask INTEGER NOT NULL,
+                cleaned_csv TEXT NOT NULL,
+                analytics_csv TEXT,
+                analytics_date TEXT,
+                analytics_category TEXT,
+                analytics_value_category TEXT,
+                analytics_quality INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS rows_position ON rows (position);
+            CREATE INDEX IF NOT EXISTS rows_analytics_order ON rows (analytics_date DESC, position)
+                WHERE analytics_csv IS NOT NULL;
+        """)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS rollup_base ({', '.join(ROLLUP_BASE_COLUMNS)})")
+        # Zmena verzie stavu, stĺpcov vstupu alebo pravidiel kategórií (nie naučeného mapovania) = plný prepočet
+        expected = json.dumps({'version': STATE_VERSION, 'columns': self.input_columns,
+                               'category_rules': self.category_rules})
+        if self._get_meta('schema') != expected:
+            self.conn.execute("DELETE FROM rows")
+            self.conn.execute("DELETE FROM rollup_base")
+            self.conn.execute("DELETE FROM meta")
+            self._set_meta('schema', expected)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.conn.close()
+    
+    def _get_meta(self, name):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_meta(self, name, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+    
+    def load_counters(self):
+        counters = self._get_meta('counters')
+        if counters is None:
+            return {'analytics_records': 0, 'issue_counts': {}, 'fix_counts': {}}
+        return json.loads(counters)
+    
+    def save_counters(self, counters):
+        def plain(value):
+            return float(value) if isinstance(value, float) else int(value)
+        self._set_meta('counters', json.dumps({
+            'analytics_records': plain(counters['analytics_records']),
+            'issue_counts': {name: plain(count) for name, count in counters['issue_counts'].items()},
+            'fix_counts': {name: plain(count) for name, count in counters['fix_counts'].items()},
+        }))
+    
+    def load_learned_categories(self):
+        learned = self._get_meta('learned_categories')
+        return json.loads(learned) if learned is not None else {}
+    
+    def save_learned_categories(self, learned):
+        self._set_meta('learned_categories', json.dumps(learned, sort_keys=True))
+    
+    def load_index(self):
+        """Hash index aktuálneho stavu (bez CSV riadkov)"""
+        return pd.read_sql_query(
+            "SELECT row_key, row_hash, position, issue_mask, fix_mask, analytics_csv IS NOT NULL AS in_analytics "
+            "FROM rows", self.conn)
+    
+    def delete_rows(self, row_keys):
+        self.conn.executemany("DELETE FROM rows WHERE row_key = ?", ((key,) for key in row_keys))
+    
+    def move_rows(self, row_keys, positions):
+        self.conn.executemany("UPDATE rows SET position = ? WHERE row_key = ?",
+                              zip((int(position) for position in positions), row_keys))
+    
+    def upsert_rows(self, records):
+        self.conn.executemany("""
+            INSERT OR REPLACE INTO rows (row_key, row_hash, position, issue_mask, fix_mask, cleaned_csv,
+                                         analytics_csv, analytics_date, analytics_category,
+                                         analytics_value_category, analytics_quality)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, records)
+    
+    def analytics_frame(self, row_keys, header):
+        """Uložené riadky analytics tabuľky pre dané kľúče (stringy, ako v CSV)"""
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS selected_keys (row_key TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM selected_keys")
+        self.conn.executemany("INSERT OR IGNORE INTO selected_keys (row_key) VALUES (?)",
+                              ((key,) for key in row_keys))
+        lines = [line for (line,) in self.conn.execute(
+            "SELECT analytics_csv FROM rows JOIN selected_keys USING (row_key) WHERE analytics_csv IS NOT NULL")]
+        return pd.read_csv(io.StringIO(header + ''.join(lines)), dtype=str)
+    
+    def load_rollup_cube(self):
+        base = pd.read_sql_query(f"SELECT {', '.join(ROLLUP_BASE_COLUMNS)} FROM rollup_base", self.conn)
+        return RollupCube(base) if len(base) else RollupCube()
+    
+    def save_rollup_cube(self, cube):
+        self.conn.execute("DELETE FROM rollup_base")
+        base = cube.base[ROLLUP_BASE_COLUMNS].astype(object)
+        self.conn.executemany(
+            f"INSERT INTO rollup_base ({', '.join(ROLLUP_BASE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(ROLLUP_BASE_COLUMNS))})",
+            base.where(base.notna(), None).itertuples(index=False, name=None))
+    
+    def write_cleaned(self, output_file, header):
+        with open(output_file, 'w', newline='', encoding='utf-8') as out:
+            out.write(header)
+            for (line,) in self.conn.execute("SELECT cleaned_csv FROM rows ORDER BY position"):
+                out.write(line)
+    
+    def write_analytics(self, output_file, header):
+        # Rovnaké poradie ako stabilné triedenie podľa dátumu zostupne
+        with open(output_file, 'w', newline='', encoding='utf-8') as out:
+            out.write(header)
+            for (line,) in self.conn.execute("SELECT analytics_csv FROM rows WHERE analytics_csv IS NOT NULL "
+                                             "ORDER BY analytics_date DESC, position"):
+                out.write(line)
+    
+    def analytics_value_counts(self, column, name):
+        rows = self.conn.execute(f"SELECT {column}, COUNT(*) FROM rows WHERE analytics_csv IS NOT NULL "
+                                 f"GROUP BY {column} ORDER BY COUNT(*) DESC").fetchall()
+        counts = pd.Series([count for _, count in rows], index=[value for value, _ in rows], name='count')
+        counts.index.name = name
+        return counts
+    
+    def analytics_quality_records(self):
+        return self.conn.execute("SELECT COALESCE(SUM(analytics_quality), 0) FROM rows "
+                                 "WHERE analytics_csv IS NOT NULL").fetchone()[0]
+
+def run_incremental(input_file, output_dir, state_dir, metrics=None, stages=ALL_STAGES, columnar_format='',
+                    files_dir=None):
+    """
+    Inkrementálne spracovanie: čistia sa len nové alebo zmenené riadky (podľa hashu obsahu),
+    ostatné sa prevezmú zo stavu. Počítadlá kvality a validácie sa upravia o delty.
+    Stav drží všetky výstupy naraz, preto vždy bežia všetky kroky. Stĺpcové výstupy
+    (columnar_format) sa prepíšu z hotových CSV tabuliek.
+    """
+    if set(stages) != set(ALL_STAGES):
+        raise ValueError("Inkrementálny režim (TRANSFORM_STATE_DIR) podporuje len všetky kroky transformácie")
+    metrics = StageMetrics() if metrics is None else metrics
+    with metrics.stage('load') as stage:
+        df = read_input(input_file)
+        stage['rows'] = len(df)
+    
+    print(f"Načítaných záznamov: {len(df)}")
+    print(f"Stĺpcov: {len(df.columns)}")
+    
+    with metrics.stage('state.hash_rows', len(df)):
+        current = pd.DataFrame({'row_key': _row_keys(df), 'row_hash': _row_hashes(df),
+                                'position': np.arange(len(df))})
+    
+    # Naučené mapovanie kategórií závisí od celého vstupu - porovná sa s mapovaním uloženým v stave
+    with metrics.stage('category_rules.learn', len(df)):
+        category_matcher = build_category_matcher(df)
+    
+    os.makedirs(state_dir, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    with IncrementalStateStore(os.path.join(state_dir, STATE_FILE_NAME), df.columns,
+                               category_matcher.fingerprint()) as state:
+        with metrics.stage('state.diff', len(df)):
+            previous = state.load_index().add_suffix('_old').rename(columns={'row_key_old': 'row_key'})
+            merged = current.merge(previous, on='row_key', how='outer', indicator=True)
+        
+        is_new = merged['_merge'] == 'left_only'
+        is_removed = merged['_merge'] == 'right_only'
+        is_both = merged['_merge'] == 'both'
+        is_changed = is_both & (merged['row_hash'] != merged['row_hash_old'])
+        
+        # Zmena naučenej kategórie produktu mení len jeho riadky bez vyplnenej kategórie
+        relearned = category_matcher.relearned_products(state.load_learned_categories())
+        category_missing = (df['Category'].isna() | (df['Category'] == '')).to_numpy()
+        relearned_keys = current.loc[category_missing & df['Product'].isin(relearned).to_numpy(), 'row_key']
+        is_recategorized = is_both & ~is_changed & merged['row_key'].isin(relearned_keys)
+        is_unchanged = is_both & ~is_changed & ~is_recategorized
+        is_moved = is_unchanged & (merged['position'] != merged['position_old'])
+        
+        print(f"Nové záznamy: {is_new.sum()}, zmenené: {is_changed.sum()}, "
+              f"odstránené: {is_removed.sum()}, nová naučená kategória: {is_recategorized.sum()}, "
+              f"nezmenené: {is_unchanged.sum()}")
+        
+        # Čistenie len nových a zmenených riadkov
+        dirty_positions = merged.loc[is_new | is_changed | is_recategorized, 'position'].astype(int).sort_values().to_numpy()
+        with metrics.stage('apply_input_types', len(dirty_positions)):
+            df_dirty = apply_input_types(df.iloc[dirty_positions].copy())
+        dirty_keys = current['row_key'].to_numpy()[dirty_positions]
+        dirty_hashes = current['row_hash'].to_numpy()[dirty_positions]
+        
+        with metrics.stage('analyze_data_quality', len(df_dirty)):
+            issue_matrix = data_quality_issue_matrix(df_dirty)
+        with metrics.stage('clean_data', len(df_dirty)):
+            df_cleaned = clean_data(df_dirty, metrics, category_matcher)
+        with metrics.stage('create_analytics_table', len(df_cleaned)):
+            df_analytics = create_analytics_table(df_cleaned, metrics)
+        
+        # Delty počítadiel: + nové hodnoty, - pôvodné hodnoty zmenených a odstránených riadkov
+        counters = state.load_counters()
+        replaced = merged[is_changed | is_recategorized | is_removed]
+        old_issue_counts = _bit_counts(replaced['issue_mask_old'], len(DATA_QUALITY_RULES))
+        old_fix_counts = _bit_counts(replaced['fix_mask_old'], len(VALIDATION_FIX_METRICS))
+        
+        for bit, ((issue_type, _, _), count) in enumerate(zip(DATA_QUALITY_RULES, issue_matrix.sum(axis=0))):
+            counters['issue_counts'][issue_type] = (counters['issue_counts'].get(issue_type, 0) +
+                                                    count - old_issue_counts[bit])
+        for bit, (flag, count) in enumerate(count_fixes(df_cleaned).items()):
+            counters['fix_counts'][flag] = counters['fix_counts'].get(flag, 0) + count - old_fix_counts[bit]
+        counters['analytics_records'] += len(df_analytics) - int(replaced['in_analytics_old'].sum())
+        
+        # Rollupy: - cuboid pôvodných analytics riadkov zmenených / odstránených záznamov, + cuboid nových
+        with metrics.stage('analytics_rollups', len(df_analytics)):
+            rollup_cube = state.load_rollup_cube()
+            replaced_analytics = state.analytics_frame(
+                replaced.loc[replaced['in_analytics_old'] == 1, 'row_key'], _csv_header(df_analytics.columns))
+            rollup_cube.merge(RollupCube.from_frame(replaced_analytics), sign=-1)
+            rollup_cube.merge(RollupCube.from_frame(df_analytics))
+            rollups = rollup_cube.table()
+        
+        # Uloženie zmien do stavu
+        cleaned_lines = _csv_lines(df_cleaned)
+        analytics_lines = pd.Series(_csv_lines(df_analytics), index=df_analytics.index, dtype=object)
+        analytics_dates = df_analytics['TransactionDate'].dt.strftime('%Y-%m-%dT%H:%M:%S')
+        
+        issue_mask_values = _bitmask(issue_matrix.T, len(df_dirty))
+        fix_mask_values = _bitmask([df_cleaned[flag] for flag, _ in VALIDATION_FIX_METRICS], len(df_cleaned))
+        
+        records = []
+        for i, index in enumerate(df_cleaned.index):
+            in_analytics = index in analytics_lines.index
+            records.append((
+                dirty_keys[i], int(dirty_hashes[i]), int(dirty_positions[i]),
+                int(issue_mask_values[i]), int(fix_mask_values[i]), cleaned_lines[i],
+                analytics_lines[index] if in_analytics else None,
+                analytics_dates[index] if in_analytics else None,
+                df_analytics.at[index, 'Category'] if in_analytics else None,
+                df_analytics.at[index, 'Transaction_Value_Category'] if in_analytics else None,
+                int(df_analytics.at[index, 'Had_Data_Quality_Issues']) if in_analytics else None,
+            ))
+        
+        with metrics.stage('state.update', len(records)):
+            state.delete_rows(merged.loc[is_removed, 'row_key'])
+            state.move_rows(merged.loc[is_moved, 'row_key'], merged.loc[is_moved, 'position'])
+            state.upsert_rows(records)
+            state.save_counters(counters)
+            state.save_rollup_cube(rollup_cube)
+            state.save_learned_categories(category_matcher.learned)
+        
+        # Duplicity nie sú vlastnosťou riadku - hľadajú sa v kľúčoch celého vstupu (hash, bez čistenia)
+        with metrics.stage('find_duplicates', len(df)):
+            duplicates = find_duplicates(duplicate_keys(apply_input_types(
+                df[['TransactionID', 'CustomerID', 'Product', 'TotalValue', 'TransactionDate']])))
+        issue_counts = dict(counters['issue_counts'])
+        issue_counts.update(DataQualityProfile().add_duplicates(duplicates).duplicate_counts)
+        quality_issues = build_quality_issues_table(issue_counts, len(df))
+        print("\nIdentifikované problémy:")
+        print(quality_issues)
+        print_fix_summary(counters['fix_counts'])
+        
+        validation_summary = build_validation_summary(len(df), len(df), counters['analytics_records'],
+                                                      counters['fix_counts'])
+        
+        # Uloženie tabuliek - nezmenené riadky sa len prepíšu zo stavu
+        quality_issues.to_csv(output_path(output_dir, 'data_quality_issues'), index=False)
+        with metrics.stage('write.cleaned_transactions', len(df)):
+            state.write_cleaned(output_path(output_dir, 'cleaned_transactions'), _csv_header(df_cleaned.columns))
+        validation_summary.to_csv(output_path(output_dir, 'validation_summary'), index=False)
+        with metrics.stage('write.analytics_ready', counters['analytics_records']):
+            state.write_analytics(output_path(output_dir, 'analytics_ready'), _csv_header(df_analytics.columns))
+        with metrics.stage('write.analytics_rollups', len(rollups)):
+            rollups.to_csv(output_path(output_dir, 'analytics_rollups'), index=False)
+        duplicates.to_csv(output_path(output_dir, 'duplicate_transactions'), index=False)
+        
+        columnar_files = []
+        if columnar_format:
+            files_dir = output_dir if files_dir is None else files_dir
+            os.makedirs(files_dir, exist_ok=True)
+            output_tables = {'data_quality_issues': quality_issues, 'cleaned_transactions': None,
+                             'validation_summary': validation_summary, 'analytics_ready': None,
+                             'analytics_rollups': rollups, 'duplicate_transactions': duplicates}
+            for table_name in OUTPUT_TABLES:
+                table = output_tables[table_name]
+                with metrics.stage(f'write.{table_name}.{columnar_format}'):
+                    if table is None:
+                        columnar_files.append(write_columnar_from_csv(
+                            output_path(output_dir, table_name), files_dir, table_name, columnar_format,
+                            PARALLEL_CHUNK_SIZE))
+                    else:
+                        columnar_files.append(write_columnar_table(table, files_dir, table_name, columnar_format))
+        
+        print_transformation_summary(
+            quality_issues, len(df), validation_summary, counters['analytics_records'],
+            state.analytics_value_counts('analytics_category', 'Category'),
+            state.analytics_value_counts('analytics_value_category', 'Transaction_Value_Category'),
+            state.analytics_quality_records(),
+            columnar_files,
+            rollups=rollups,
+            duplicates=duplicates
+        )
+
+# =====================================================
+# 8. SPUSTENIE
+# =====================================================
+
+def run_transformation(input_file=INPUT_FILE, output_dir=OUTPUT_DIR, files_dir=FILES_OUTPUT_DIR, stages=STAGES,
+                       chunk_size=CHUNK_SIZE, workers=WORKERS, columnar_format=COLUMNAR_FORMAT,
+                       state_dir=STATE_DIR, profiler=PROFILER, metrics_enabled=METRICS_ENABLED):
+    """
+    Jeden beh transformácie - režim (inkrementálny, paralelný, streamovací, v pamäti)
+    podľa nastavení, predvolené hodnoty sú z env premenných. Vracia metriky krokov.
+    """
+    if columnar_format and columnar_format not in COLUMNAR_EXTENSIONS:
+        raise ValueError(f"Nepodporovaný stĺpcový formát: {columnar_format}")
+    unknown_stages = set(stages) - set(ALL_STAGES)
+    if unknown_stages or not stages:
+        raise ValueError(f"Neznáme kroky transformácie: {sorted(unknown_stages)} (povolené: {ALL_STAGES})")
+    if state_dir and (chunk_size > 0 or workers > 1):
+        raise ValueError("Inkrementálny režim (TRANSFORM_STATE_DIR) nepodporuje chunky ani paralelné spracovanie "
+                         "(TRANSFORM_CHUNK_SIZE, TRANSFORM_WORKERS) - načítava celý vstup")
+    
+    metrics = StageMetrics()
+    # Výpisy tabuliek bez skracovania stĺpcov - len počas behu, import modulu pandas nemení
+    with pd.option_context('display.max_columns', None, 'display.width', None), \
+            profile_run(profiler, files_dir), metrics.stage('total'):
+        if state_dir:
+            run_incremental(input_file, output_dir, state_dir, metrics=metrics, stages=stages,
+                            columnar_format=columnar_format, files_dir=files_dir)
+        elif workers > 1:
+            run_streaming(input_file, output_dir, chunk_size or PARALLEL_CHUNK_SIZE, workers, columnar_format,
+                          files_dir, metrics=metrics, stages=stages)
+        elif chunk_size > 0:
+            run_streaming(input_file, output_dir, chunk_size, columnar_format=columnar_format, files_dir=files_dir,
+                          metrics=metrics, stages=stages)
+        else:
+            run_in_memory(input_file, output_dir, columnar_format, files_dir, metrics=metrics, stages=stages)
+    
+    if metrics_enabled:
+        write_metrics_table(metrics, output_dir)
+    return metrics
 
-print(f"\nPočet transakcií s problémami kvality dát: {df_analytics['Had_Data_Quality_Issues'].sum()}")
\ No newline at end of file
+if __name__ == '__main__':
+    run_transformation()
@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+"""
+Načítanie analytics_ready do hviezdicovej schémy z ecommerce_schema.sql (SQLite).
+
+Dimenzie sa dopĺňajú cez cache surogátnych kľúčov v pamäti - každá unikátna
+hodnota dávky sa rieši raz, nie pre každý riadok. Fakty sa vkladajú hromadne
+(executemany) po veľkých dávkach v jednej transakcii. Opakované spustenie nad
+rozšíreným súborom doplní len nové riadky (kľúč TransactionID + hash obsahu riadku,
+nezávislý od poradia riadkov v súbore).
+
+ProductDim a CustomerDim držia históriu (SCD typ 2, ValidFrom / ValidTo / IsCurrent).
+Prvý prechod cez dáta zapíše nové verzie dimenzií, druhý načíta fakty s verziou
+platnou k dátumu transakcie. Atribúty zákazníkov (email, adresa, región) sa berú
+z cleaned_transactions.csv vedľa analytics_ready, ak existuje.
+
+Použitie: python warehouse_loader.py [analytics_ready.csv] [warehouse.sqlite] [--cleaned-file CSV]
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+import transform_script_keboola as transform
+
+ANALYTICS_FILE = '/data/out/tables/analytics_ready.csv'
+WAREHOUSE_FILE = '/data/out/files/warehouse.sqlite'
+BATCH_SIZE = 200_000
+
+# Stĺpce analytics_ready, ktoré loader potrebuje - ostatné sa z CSV ani nečítajú
+SOURCE_COLUMNS = [
+    'TransactionID', 'Category', 'Product', 'TransactionDate', 'Quantity', 'Price', 'TotalValue',
+    'CustomerID', 'PaymentMethod', 'PaymentAmount',
+]
+# Stĺpce pre 1. prechod (pozorovania atribútov dimenzií)
+OBSERVED_COLUMNS = ['Category', 'Product', 'TransactionDate', 'Price', 'CustomerID']
+CUSTOMER_SOURCE_COLUMNS = ['CustomerID', 'TransactionDate_Clean', 'Email_Clean', 'ShippingAddress_Clean']
+
+# Zástupné hodnoty z clean_data - znamenajú chýbajúci údaj, nie zmenu atribútu
+PLACEHOLDER_VALUES = {
+    'Email': ['Email Not Provided', 'Invalid Email Format'],
+    'Address': ['Address Not Provided', 'Address Verification Needed'],
+}
+# Kód štátu na konci adresy ("Mesto, ST 12345", "APO AP 02637")
+REGION_PATTERN = r'\b([A-Z]{2})\s+\d{5}\s*$'
+
+# ValidTo aktuálnej verzie a ValidFrom verzií prenesených z rozloženia bez histórie
+OPEN_VALID_TO = '9999-12-31'
+MIGRATED_VALID_FROM = '1900-01-01'
+SCHEMA_VERSION = 3
+
+# Obsah riadku faktu pre jeho kľúč - len hodnoty uložené vo faktoch a ich dimenziách,
+# aby sa kľúč dal prepočítať aj z databázy
+FACT_KEY_TEXT_COLUMNS = ['TransactionID', 'CustomerID', 'Product', 'Category', 'OrderDate']
+FACT_KEY_NUMBER_COLUMNS = ['Quantity', 'UnitPrice', 'TotalAmount']
+
+# Star schema z ecommerce_schema.sql, doplnená o zdrojové (prirodzené) kľúče,
+# bez ktorých sa pri inkrementálnom načítaní nedajú nájsť existujúce záznamy
+WAREHOUSE_DDL = """
+    CREATE TABLE IF NOT EXISTS TimeDim (
+        TimeID INTEGER PRIMARY KEY,
+        OrderDate DATE NOT NULL UNIQUE,
+        Year INT,
+        Quarter INT,
+        Month INT,
+        Day INT
+    );
+    CREATE TABLE IF NOT EXISTS CategoryDim (
+        CategoryID INTEGER PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL UNIQUE,
+        ParentCategoryID INT
+    );
+    CREATE TABLE IF NOT EXISTS ProductDim (
+        ProductID INTEGER PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Price DECIMAL(10, 2),
+        Description TEXT,
+        Availability BOOLEAN,
+        CategoryID INT REFERENCES CategoryDim(CategoryID),
+        ValidFrom DATE NOT NULL,
+        ValidTo DATE NOT NULL,
+        IsCurrent BOOLEAN NOT NULL,
+        UNIQUE (Name, CategoryID, ValidFrom)
+    );
+    CREATE TABLE IF NOT EXISTS CustomerDim (
+        CustomerID INTEGER PRIMARY KEY,
+        SourceCustomerID VARCHAR(36) NOT NULL,
+        Name VARCHAR(100),
+        Email VARCHAR(100),
+        Address VARCHAR(255),
+        Region VARCHAR(50),
+        RegistrationDate DATE,
+        ValidFrom DATE NOT NULL,
+        ValidTo DATE NOT NULL,
+        IsCurrent BOOLEAN NOT NULL,
+        UNIQUE (SourceCustomerID, ValidFrom)
+    );
+    CREATE TABLE IF NOT EXISTS TransactionDim (
+        TransactionID INTEGER PRIMARY KEY,
+        SourceTransactionID VARCHAR(36) NOT NULL UNIQUE,
+        TransactionDate DATE,
+        PaymentMethod VARCHAR(50),
+        Amount DECIMAL(10, 2)
+    );
+    CREATE TABLE IF NOT EXISTS SalesFact (
+        OrderItemID INTEGER PRIMARY KEY,
+        SourceRowKey VARCHAR(64) NOT NULL UNIQUE,
+        OrderID INT,
+        ProductID INT REFERENCES ProductDim(ProductID),
+        CustomerID INT REFERENCES CustomerDim(CustomerID),
+        TransactionID INT REFERENCES TransactionDim(TransactionID),
+        TimeID INT REFERENCES TimeDim(TimeID),
+        Quantity INT,
+        UnitPrice DECIMAL(10, 2),
+        TotalAmount DECIMAL(10, 2)
+    );
+"""
+
+# Prechod z rozloženia bez histórie: tabuľky sa prestavajú (mení sa UNIQUE), surogátne kľúče
+# ostanú, takže existujúce fakty ďalej ukazujú na správny záznam. legacy_alter_table bráni
+# SQLite prepísať referencie v SalesFact na premenovanú tabuľku.
+SCD2_MIGRATION = """
+    PRAGMA legacy_alter_table = ON;
+    BEGIN;
+    ALTER TABLE ProductDim RENAME TO ProductDim_v1;
+    ALTER TABLE CustomerDim RENAME TO CustomerDim_v1;
+""" + WAREHOUSE_DDL + f"""
+    INSERT INTO ProductDim (ProductID, Name, Price, Description, Availability, CategoryID,
+                            ValidFrom, ValidTo, IsCurrent)
+    SELECT ProductID, Name, Price, Description, Availability, CategoryID,
+           '{MIGRATED_VALID_FROM}', '{OPEN_VALID_TO}', 1
+    FROM ProductDim_v1;
+    INSERT INTO CustomerDim (CustomerID, SourceCustomerID, Name, Email, Address, Region, RegistrationDate,
+                             ValidFrom, ValidTo, IsCurrent)
+    SELECT CustomerID, SourceCustomerID, Name, Email, Address, Region, RegistrationDate,
+           '{MIGRATED_VALID_FROM}', '{OPEN_VALID_TO}', 1
+    FROM CustomerDim_v1;
+    DROP TABLE ProductDim_v1;
+    DROP TABLE CustomerDim_v1;
+    COMMIT;
+    PRAGMA legacy_alter_table = OFF;
+"""
+
+def _table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+# Obsah existujúcich faktov z faktov a dimenzií (pre prepočet kľúčov riadkov)
+STORED_FACT_CONTENT = """
+    SELECT f.OrderItemID, t.SourceTransactionID AS TransactionID, c.SourceCustomerID AS CustomerID,
+           p.Name AS Product, cat.Name AS Category, tm.OrderDate, f.Quantity, f.UnitPrice, f.TotalAmount
+    FROM SalesFact f
+    LEFT JOIN TransactionDim t ON t.TransactionID = f.TransactionID
+    LEFT JOIN CustomerDim c ON c.CustomerID = f.CustomerID
+    LEFT JOIN ProductDim p ON p.ProductID = f.ProductID
+    LEFT JOIN CategoryDim cat ON cat.CategoryID = p.CategoryID
+    LEFT JOIN TimeDim tm ON tm.TimeID = f.TimeID
+    ORDER BY f.OrderItemID
+"""
+
+def migrate_schema(conn):
+    """Vytvorí chýbajúce tabuľky a prevedie staršie rozloženie databázy na aktuálne"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    existing = _table_columns(conn, 'ProductDim')
+    if existing and 'ValidFrom' not in existing:
+        conn.executescript(SCD2_MIGRATION)
+    conn.executescript(WAREHOUSE_DDL)
+    if version < 3:
+        rekey_facts(conn)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def rekey_facts(conn):
+    """
+    Kľúče faktov z verzie 2 (TransactionID + poradie výskytu v súbore) -> kľúče z obsahu riadku.
+    Fakty, ktoré staré kľúče zdvojili (posunuté poradie), ostanú ako dva rovnaké riadky.
+    """
+    stored = pd.read_sql_query(STORED_FACT_CONTENT, conn)
+    if stored.empty:
+        return
+    row_keys = fact_row_keys(stored, {})
+    with conn:
+        conn.executemany("UPDATE SalesFact SET SourceRowKey = ? WHERE OrderItemID = ?",
+                         zip(row_keys.tolist(), stored['OrderItemID'].astype(np.int64).tolist()))
+
+def _text_values(values):
+    return pd.Series(values.astype(object).where(values.notna(), '').astype(str).to_numpy(dtype=object),
+                     index=values.index, dtype=object)
+
+def fact_row_keys(frame, occurrences):
+    """
+    Kľúč riadku faktu nezávislý od poradia v súbore: TransactionID + hash obsahu riadku + poradie
+    výskytu medzi úplne rovnakými riadkami (na ich poradí nezáleží). Riadok s opakovaným
+    TransactionID, ale iným obsahom (replay), tak dostane vlastný kľúč a existujúce sa neposunú.
+    occurrences (kľúč obsahu -> počet) pokračuje cez dávky.
+    """
+    content = pd.DataFrame({
+        **{column: _text_values(frame[column]) for column in FACT_KEY_TEXT_COLUMNS},
+        **{column: pd.to_numeric(frame[column], errors='coerce').astype('float64')
+           for column in FACT_KEY_NUMBER_COLUMNS},
+    }, index=frame.index)
+    hashes = pd.Series(pd.util.hash_pandas_object(content, index=False).to_numpy(), index=frame.index)
+    content_keys = content['TransactionID'] + '#' + hashes.map('{:016x}'.format)
+    occurrence = content_keys.groupby(content_keys, sort=False).cumcount()
+    occurrence += content_keys.map(occurrences).fillna(0).astype(int)
+    for content_key, count in content_keys.value_counts().items():
+        occurrences[content_key] = occurrences.get(content_key, 0) + count
+    return content_keys + '#' + occurrence.astype(str)
+
+def _sql_values(column):
+    """Stĺpec ako zoznam Python hodnôt pre executemany (NA -> NULL)"""
+    values = pd.Series(column).astype(object)
+    return values.where(pd.Series(column).notna(), None).tolist()
+
+class SurrogateKeyCache:
+    """
+    Cache prirodzený kľúč -> surogátny kľúč jednej dimenzie, načítaná raz z databázy.
+    Nové hodnoty dostanú ďalšie kľúče v poradí a vložia sa jedným executemany.
+    """
+
+    def __init__(self, conn, table, key_column, natural_columns, attribute_columns=()):
+        self.conn = conn
+        self.table = table
+        self.key_column = key_column
+        self.natural_columns = list(natural_columns)
+        self.attribute_columns = list(attribute_columns)
+        rows = conn.execute(f"SELECT {key_column}, {', '.join(self.natural_columns)} FROM {table}").fetchall()
+        self.keys = {self._key(row[1:]): row[0] for row in rows}
+        self.next_key = max(self.keys.values(), default=0) + 1
+        self.inserted = 0
+
+    def _key(self, values):
+        return values[0] if len(values) == 1 else tuple(values)
+
+    def resolve(self, natural, attributes=None):
+        """
+        Surogátne kľúče pre stĺpce natural (DataFrame prirodzených kľúčov). Atribúty nových
+        členov dimenzie sa vezmú z prvého výskytu v attributes. Chýbajúci kľúč -> NULL.
+        """
+        if len(self.natural_columns) == 1:
+            codes, uniques = pd.factorize(natural.iloc[:, 0])
+            unique_keys = list(uniques)
+        else:
+            codes, uniques = pd.factorize(pd.MultiIndex.from_frame(natural))
+            unique_keys = list(uniques)
+
+        first_positions = np.flatnonzero(~pd.Series(codes).duplicated().to_numpy() & (codes >= 0))
+        unique_ids = np.empty(len(unique_keys), dtype=np.int64)
+        new_members = []
+        for unique_index, key in enumerate(unique_keys):
+            key_id = self.keys.get(key)
+            if key_id is None:
+                key_id = self.next_key
+                self.next_key += 1
+                self.keys[key] = key_id
+                new_members.append(unique_index)
+            unique_ids[unique_index] = key_id
+
+        if new_members:
+            positions = first_positions[new_members]
+            columns = [unique_ids[new_members].tolist()]
+            columns += [_sql_values(natural.iloc[positions, i]) for i in range(len(self.natural_columns))]
+            if self.attribute_columns:
+                columns += [_sql_values(attributes[column].iloc[positions]) for column in self.attribute_columns]
+            all_columns = [self.key_column] + self.natural_columns + self.attribute_columns
+            self.conn.executemany(
+                f"INSERT INTO {self.table} ({', '.join(all_columns)}) "
+                f"VALUES ({', '.join('?' * len(all_columns))})",
+                zip(*columns)
+            )
+            self.inserted += len(new_members)
+
+        ids = pd.Series(unique_ids[np.maximum(codes, 0)], dtype='Int64')
+        ids[codes < 0] = pd.NA
+        return ids
+
+class SCD2Dimension:
+    """
+    Dimenzia s históriou (SCD typ 2). Zmeny sa hľadajú porovnaním hashu sledovaných atribútov
+    s hash indexom aktuálnych verzií (prirodzený kľúč -> hash), nie porovnávaním riadok po riadku.
+    Ukončenie starých a vloženie nových verzií ide hromadne (executemany); fakty si verziu platnú
+    k dátumu nájdu binárnym vyhľadávaním v zoradených intervaloch platnosti.
+    """
+
+    def __init__(self, conn, table, key_column, natural_columns, tracked_columns):
+        self.conn = conn
+        self.table = table
+        self.key_column = key_column
+        self.natural_columns = list(natural_columns)
+        # Sledované atribúty a ich typy - hodnoty z databázy aj z dát sa hashujú v rovnakom type
+        self.tracked_columns = dict(tracked_columns)
+        self.inserted = 0
+        self.expired = 0
+
+        columns = [key_column] + self.natural_columns + ['ValidFrom', 'IsCurrent'] + list(self.tracked_columns)
+        stored = pd.DataFrame(conn.execute(f"SELECT {', '.join(columns)} FROM {table}").fetchall(),
+                              columns=columns)
+        stored['ValidFrom'] = pd.to_datetime(stored['ValidFrom'], format='%Y-%m-%d')
+        stored[key_column] = stored[key_column].astype(np.int64)
+        self.next_key = int(stored[key_column].max()) + 1 if len(stored) else 1
+        self.versions = stored[[key_column] + self.natural_columns + ['ValidFrom']]
+        self.current = self._index_current(stored[stored['IsCurrent'] == 1])
+        self._intervals = None
+
+    def _key_index(self, frame):
+        if len(self.natural_columns) == 1:
+            return pd.Index(frame[self.natural_columns[0]].astype(object))
+        return pd.MultiIndex.from_arrays([frame[column].astype(object) for column in self.natural_columns])
+
+    def _typed(self, frame):
+        return frame[list(self.tracked_columns)].astype(self.tracked_columns)
+
+    def _hash(self, attributes):
+        """Hash sledovaných atribútov po riadkoch (NA a prázdny reťazec sa nerozlišujú)"""
+        text = pd.DataFrame({
+            column: values.astype(object).where(values.notna(), '').astype(str)
+            for column, values in attributes.items()
+        }, index=attributes.index)
+        return pd.util.hash_pandas_object(text, index=False).to_numpy()
+
+    def _index_current(self, current):
+        """Hash index aktuálnych verzií: prirodzený kľúč -> surogátny kľúč, ValidFrom, hash, atribúty"""
+        attributes = self._typed(current)
+        index = pd.DataFrame({
+            self.key_column: current[self.key_column].to_numpy(),
+            'ValidFrom': current['ValidFrom'].to_numpy(),
+            'Hash': pd.array(self._hash(attributes), dtype='UInt64'),
+        }, index=self._key_index(current))
+        return pd.concat([index, attributes.set_axis(index.index)], axis=1)
+
+    def daily(self, observations):
+        """Posledná známa hodnota každého atribútu za kľúč a deň (NA = hodnota neznáma)"""
+        return (observations.dropna(subset=self.natural_columns + ['ValidFrom'])
+                .groupby(self.natural_columns + ['ValidFrom'], sort=True).last()
+                .reset_index())
+
+    def apply(self, observations):
+        """
+        Zapíše novú históriu z pozorovaní (prirodzený kľúč, ValidFrom, sledované atribúty).
+        Verzia vzniká len pri zmene hashu atribútov; pozorovania nie novšie ako aktuálna
+        verzia kľúča sa ignorujú (história sa neprepisuje). Vracia počet nových verzií.
+        """
+        daily = self.daily(observations)
+        current = self.current.reindex(self._key_index(daily))
+        known = current[self.key_column].notna().to_numpy()
+        newer = ~known | (daily['ValidFrom'].to_numpy() > current['ValidFrom'].to_numpy())
+        daily = daily[newer].reset_index(drop=True)
+        current = current[newer].reset_index(drop=True)
+        known = known[newer]
+        if daily.empty:
+            return 0
+
+        codes = pd.factorize(self._key_index(daily))[0]
+        first = np.r_[True, codes[1:] != codes[:-1]]
+        # Neznáme hodnoty doplní posledná známa hodnota kľúča - z dát, potom z aktuálnej verzie
+        attributes = self._typed(daily).groupby(codes).ffill()
+        attributes = attributes.fillna(self._typed(current))
+        hashes = self._hash(attributes)
+
+        previous = np.r_[hashes[:1], hashes[:-1]]
+        previous[first] = current['Hash'].to_numpy(dtype=np.uint64, na_value=0)[first]
+        changed = (hashes != previous) | (first & ~known)
+        if not changed.any():
+            return 0
+
+        versions = daily.loc[changed, self.natural_columns + ['ValidFrom']].reset_index(drop=True)
+        attributes = attributes[changed].reset_index(drop=True)
+        version_codes = codes[changed]
+        version_first = np.r_[True, version_codes[1:] != version_codes[:-1]]
+        version_last = np.r_[version_codes[1:] != version_codes[:-1], True]
+        valid_from = versions['ValidFrom'].dt.strftime('%Y-%m-%d')
+        valid_to = valid_from.shift(-1).where(~version_last, OPEN_VALID_TO)
+        keys = np.arange(self.next_key, self.next_key + len(versions), dtype=np.int64)
+        self.next_key += len(versions)
+
+        # Ukončenie aktuálnych verzií kľúčov, ktoré dostali novú verziu
+        expire = version_first & known[changed]
+        self.conn.executemany(
+            f"UPDATE {self.table} SET ValidTo = ?, IsCurrent = 0 WHERE {self.key_column} = ?",
+            zip(valid_from[expire].tolist(),
+                current.loc[changed, self.key_column].to_numpy()[expire].astype(np.int64).tolist())
+        )
+        all_columns = ([self.key_column] + self.natural_columns + ['ValidFrom', 'ValidTo', 'IsCurrent']
+                       + list(self.tracked_columns))
+        self.conn.executemany(
+            f"INSERT INTO {self.table} ({', '.join(all_columns)}) VALUES ({', '.join('?' * len(all_columns))})",
+            zip(keys.tolist(), *[_sql_values(versions[column]) for column in self.natural_columns],
+                valid_from.tolist(), valid_to.tolist(), version_last.astype(int).tolist(),
+                *[_sql_values(attributes[column]) for column in self.tracked_columns])
+        )
+        self.inserted += len(versions)
+        self.expired += int(expire.sum())
+
+        versions[self.key_column] = keys
+        self.versions = pd.concat([self.versions, versions[self.versions.columns]], ignore_index=True)
+        new_current = self._index_current(pd.concat([versions, attributes], axis=1)[version_last])
+        self.current = pd.concat([self.current.drop(index=new_current.index, errors='ignore'), new_current])
+        self._intervals = None
+        return len(versions)
+
+    def _build_intervals(self):
+        """Verzie zoradené podľa (kód kľúča, ValidFrom) ako jedno int64 pre np.searchsorted"""
+        codes, uniques = pd.factorize(self._key_index(self.versions))
+        days = self.versions['ValidFrom'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        combined = (codes.astype(np.int64) << 32) + (days + (1 << 31))
+        order = np.argsort(combined, kind='stable')
+        combined = combined[order]
+        code_range = np.arange(len(uniques), dtype=np.int64) << 32
+        first = np.searchsorted(combined, code_range)
+        last = np.searchsorted(combined, code_range + (1 << 32)) - 1
+        keys = self.versions[self.key_column].to_numpy(dtype=np.int64)[order]
+        self._intervals = (uniques, combined, keys, first, last)
+
+    def lookup(self, natural, dates):
+        """
+        Surogátny kľúč verzie platnej k dátumu. Dátum pred prvou verziou -> prvá verzia,
+        chýbajúci dátum -> aktuálna verzia, neznámy kľúč -> NULL.
+        """
+        if self._intervals is None:
+            self._build_intervals()
+        uniques, combined, keys, first, last = self._intervals
+        codes = uniques.get_indexer(self._key_index(natural))
+        ids = pd.Series(pd.NA, index=range(len(codes)), dtype='Int64')
+        if not len(uniques):
+            return ids
+
+        day_values = pd.Series(dates).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        missing_date = np.isnat(day_values)
+        days = np.where(missing_date, 0, day_values.astype(np.int64))
+        safe_codes = np.maximum(codes, 0).astype(np.int64)
+        positions = np.searchsorted(combined, (safe_codes << 32) + (days + (1 << 31)), side='right') - 1
+        positions = np.clip(positions, first[safe_codes], last[safe_codes])
+        positions[missing_date] = last[safe_codes][missing_date]
+        found = codes >= 0
+        ids[found] = keys[positions[found]]
+        return ids
+
+class WarehouseLoader:
+    """
+    Hromadné načítanie analytics_ready do SQLite star schémy. Celé načítanie beží
+    v jednej transakcii - pri chybe sa nič nezapíše.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+
+    def __enter__(self):
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA cache_size = -65536")
+        migrate_schema(self.conn)
+
+        self.categories = SurrogateKeyCache(self.conn, 'CategoryDim', 'CategoryID', ['Name'])
+        self.products = SCD2Dimension(self.conn, 'ProductDim', 'ProductID', ['Name', 'CategoryID'],
+                                      {'Price': 'float64', 'Availability': 'Int64'})
+        self.customers = SCD2Dimension(self.conn, 'CustomerDim', 'CustomerID', ['SourceCustomerID'],
+                                       {'Email': 'object', 'Address': 'object', 'Region': 'object'})
+        self.transactions = SurrogateKeyCache(self.conn, 'TransactionDim', 'TransactionID',
+                                              ['SourceTransactionID'],
+                                              ['TransactionDate', 'PaymentMethod', 'Amount'])
+        self.times = SurrogateKeyCache(self.conn, 'TimeDim', 'TimeID', ['OrderDate'],
+                                       ['Year', 'Quarter', 'Month', 'Day'])
+
+        # Počty výskytov rovnakého obsahu v načítavanom súbore (pre kľúč riadku faktu)
+        self.occurrences = {}
+        # Pozorovania atribútov SCD2 dimenzií z 1. prechodu (zredukované na kľúč a deň)
+        self.product_observations = []
+        self.customer_observations = []
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.conn.close()
+
+    def _product_natural(self, batch):
+        category_ids = self.categories.resolve(batch[['Category']].astype(object).set_axis(['Name'], axis=1))
+        return pd.DataFrame({'Name': batch['Product'].astype(object),
+                             'CategoryID': category_ids.to_numpy()}, index=batch.index)
+
+    def observe_batch(self, batch):
+        """1. prechod: cena produktov a výskyt zákazníkov k dátumu transakcie z dávky analytics_ready"""
+        valid_from = batch['TransactionDate'].dt.normalize()
+        products = self._product_natural(batch).assign(ValidFrom=valid_from, Price=batch['Price'], Availability=1)
+        self.product_observations.append(self.products.daily(products))
+        # Zákazník bez záznamu v cleaned_transactions dostane verziu s neznámymi atribútmi
+        customers = pd.DataFrame({'SourceCustomerID': batch['CustomerID'].astype(object), 'ValidFrom': valid_from,
+                                  'Email': None, 'Address': None, 'Region': None}, index=batch.index)
+        self.customer_observations.append(self.customers.daily(customers))
+
+    def observe_customers(self, batch):
+        """1. prechod: email a adresa zákazníkov k dátumu transakcie z dávky cleaned_transactions"""
+        email = batch['Email_Clean'].astype(object)
+        email = email.where(~email.isin(PLACEHOLDER_VALUES['Email']))
+        address = batch['ShippingAddress_Clean'].astype(object)
+        address = address.where(~address.isin(PLACEHOLDER_VALUES['Address']))
+        region = address.str.extract(REGION_PATTERN, expand=False).astype(object)
+        region = region.where(address.isna() | region.notna(), 'Not Specified')
+        customers = pd.DataFrame({
+            'SourceCustomerID': batch['CustomerID'].astype(object),
+            'ValidFrom': batch['TransactionDate_Clean'].dt.normalize(),
+            'Email': email, 'Address': address, 'Region': region,
+        }, index=batch.index)
+        self.customer_observations.append(self.customers.daily(customers))
+
+    def apply_dimension_changes(self):
+        """Zapíše nové verzie SCD2 dimenzií zo všetkých pozorovaní 1. prechodu"""
+        for dimension, observations in ((self.products, self.product_observations),
+                                        (self.customers, self.customer_observations)):
+            if observations:
+                dimension.apply(pd.concat(observations, ignore_index=True))
+            observations.clear()
+
+    def load_batch(self, batch):
+        """
+        Jedna dávka analytics_ready (typovaná) -> nové členy dimenzií + fakty.
+        Už načítané riadky (rovnaký SourceRowKey) sa preskočia; vracia počet nových faktov.
+        """
+        dates = batch['TransactionDate']
+        order_dates = dates.dt.normalize()
+        quantity = pd.to_numeric(batch['Quantity'], errors='coerce').round().astype('Int64')
+        row_keys = fact_row_keys(pd.DataFrame({
+            'TransactionID': batch['TransactionID'], 'CustomerID': batch['CustomerID'],
+            'Product': batch['Product'], 'Category': batch['Category'],
+            'OrderDate': order_dates.dt.strftime('%Y-%m-%d'),
+            'Quantity': quantity, 'UnitPrice': batch['Price'], 'TotalAmount': batch['TotalValue'],
+        }, index=batch.index), self.occurrences)
+
+        time_attributes = pd.DataFrame({
+            'Year': order_dates.dt.year, 'Quarter': order_dates.dt.quarter,
+            'Month': order_dates.dt.month, 'Day': order_dates.dt.day,
+        }, index=batch.index)
+        time_ids = self.times.resolve(order_dates.dt.strftime('%Y-%m-%d').to_frame('OrderDate'), time_attributes)
+
+        # Verzia produktu a zákazníka platná k dátumu transakcie
+        product_ids = self.products.lookup(self._product_natural(batch), dates)
+        customer_ids = self.customers.lookup(batch[['CustomerID']].set_axis(['SourceCustomerID'], axis=1), dates)
+        transaction_attributes = pd.DataFrame({
+            'TransactionDate': dates.dt.strftime('%Y-%m-%d %H:%M:%S'),
+            'PaymentMethod': batch['PaymentMethod'].astype(object),
+            'Amount': batch['PaymentAmount'],
+        }, index=batch.index)
+        transaction_ids = self.transactions.resolve(batch[['TransactionID']].astype(object)
+                                                    .set_axis(['SourceTransactionID'], axis=1),
+                                                    transaction_attributes)
+
+        changes_before = self.conn.total_changes
+        # OrderItemID prideľuje SQLite (rowid), duplicitný SourceRowKey sa ignoruje
+        self.conn.executemany("""
+            INSERT OR IGNORE INTO SalesFact (SourceRowKey, OrderID, ProductID, CustomerID, TransactionID,
+                                             TimeID, Quantity, UnitPrice, TotalAmount)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, zip(
+            row_keys.tolist(),
+            # Jedna transakcia = jedna objednávka - OrderID je kľúč z TransactionDim
+            _sql_values(transaction_ids), _sql_values(product_ids), _sql_values(customer_ids),
+            _sql_values(transaction_ids), _sql_values(time_ids), _sql_values(quantity),
+            _sql_values(batch['Price']), _sql_values(batch['TotalValue']),
+        ))
+        return self.conn.total_changes - changes_before
+
+    def dimension_counts(self):
+        return {cache.table: cache.inserted
+                for cache in (self.times, self.categories, self.products, self.customers, self.transactions)}
+
+    def expired_counts(self):
+        return {dimension.table: dimension.expired for dimension in (self.products, self.customers)}
+
+def load_warehouse(analytics_file, warehouse_file, batch_size=BATCH_SIZE, cleaned_file=None):
+    """
+    Načítanie analytics_ready.csv do warehouse_file; vracia štatistiky behu.
+    cleaned_file (predvolene cleaned_transactions.csv vedľa analytics_ready) dodáva atribúty zákazníkov.
+    """
+    if cleaned_file is None:
+        cleaned_file = os.path.join(os.path.dirname(os.path.abspath(analytics_file)), 'cleaned_transactions.csv')
+        cleaned_file = cleaned_file if os.path.exists(cleaned_file) else None
+    os.makedirs(os.path.dirname(os.path.abspath(warehouse_file)), exist_ok=True)
+    start = time.perf_counter()
+    read_records = 0
+    loaded_records = 0
+    with WarehouseLoader(warehouse_file) as loader:
+        # 1. prechod: nové verzie ProductDim / CustomerDim, aby fakty našli verziu platnú k dátumu
+        for batch in pd.read_csv(analytics_file, dtype=str, usecols=OBSERVED_COLUMNS, chunksize=batch_size):
+            loader.observe_batch(transform.apply_table_schema(batch, 'analytics_ready'))
+        if cleaned_file:
+            for batch in pd.read_csv(cleaned_file, dtype=str, usecols=CUSTOMER_SOURCE_COLUMNS,
+                                     chunksize=batch_size):
+                loader.observe_customers(transform.apply_table_schema(batch, 'cleaned_transactions'))
+        loader.apply_dimension_changes()
+
+        # 2. prechod: fakty
+        for batch in pd.read_csv(analytics_file, dtype=str, usecols=SOURCE_COLUMNS, chunksize=batch_size):
+            batch = transform.apply_table_schema(batch, 'analytics_ready')
+            read_records += len(batch)
+            loaded_records += loader.load_batch(batch)
+            print(f"Spracovaných {read_records} riadkov, nových faktov {loaded_records}")
+        dimension_counts = loader.dimension_counts()
+        expired_counts = loader.expired_counts()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'read_records': read_records,
+        'loaded_records': loaded_records,
+        'new_dimension_rows': dimension_counts,
+        'expired_dimension_rows': expired_counts,
+        'seconds': elapsed,
+        'rows_per_second': read_records / elapsed if elapsed else 0.0,
+    }
+
+def print_load_summary(stats):
+    print(f"\n=== NAČÍTANIE DO WAREHOUSE ===")
+    print(f"Prečítaných riadkov: {stats['read_records']}, nových faktov: {stats['loaded_records']}")
+    for table, count in stats['new_dimension_rows'].items():
+        print(f"- {table}: {count} nových záznamov")
+    for table, count in stats['expired_dimension_rows'].items():
+        print(f"- {table}: {count} ukončených verzií")
+    print(f"Čas: {stats['seconds']:.2f} s ({stats['rows_per_second']:.0f} riadkov/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Načítanie analytics_ready do star schémy (SQLite)')
+    parser.add_argument('analytics_file', nargs='?', default=ANALYTICS_FILE)
+    parser.add_argument('warehouse_file', nargs='?', default=WAREHOUSE_FILE)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--cleaned-file', help='cleaned_transactions.csv s atribútmi zákazníkov '
+                                               '(predvolene vedľa analytics_ready)')
+    args = parser.parse_args()
+
+    print_load_summary(load_warehouse(args.analytics_file, args.warehouse_file, args.batch_size,
+                                      args.cleaned_file))
+
+if __name__ == '__main__':
+    main()